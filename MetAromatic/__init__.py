@@ -1,4 +1,54 @@
-from .get_bridge import get_bridges
-from .get_pair import get_pairs_from_pdb, get_pairs_from_file
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["get_bridges", "get_pairs_from_pdb", "get_pairs_from_file"]
+if TYPE_CHECKING:
+    from .get_bridge import async_get_bridges, get_bridges
+    from .motifs import get_motifs
+    from .get_pair import (
+        async_get_pairs_from_pdb,
+        get_pairs_from_pdb,
+        get_pairs_from_file,
+        get_pairs_many,
+        screen_many,
+        screen_pdb,
+    )
+
+__all__ = [
+    "async_get_bridges",
+    "async_get_pairs_from_pdb",
+    "get_bridges",
+    "get_motifs",
+    "get_pairs_from_pdb",
+    "get_pairs_from_file",
+    "get_pairs_many",
+    "screen_many",
+    "screen_pdb",
+]
+
+# Submodules are imported on first access so that importing the package, and in
+# turn starting the CLI, does not pay for NumPy, pydantic and friends up front
+_LAZY_ATTRIBUTES = {
+    "async_get_bridges": ".get_bridge",
+    "async_get_pairs_from_pdb": ".get_pair",
+    "get_bridges": ".get_bridge",
+    "get_motifs": ".motifs",
+    "get_pairs_from_pdb": ".get_pair",
+    "get_pairs_from_file": ".get_pair",
+    "get_pairs_many": ".get_pair",
+    "screen_many": ".get_pair",
+    "screen_pdb": ".get_pair",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,106 @@
+from contextlib import contextmanager, nullcontext
+from sys import getsizeof
+from threading import Condition, Lock
+from typing import Iterable, Iterator
+from .aliases import Coordinates, RawData
+from .models import FeatureSpace
+
+# Peak memory of a search relative to the size of the decompressed entry. While
+# an entry is decompressed and parsed its text, its lines and the parsed rows are
+# alive at once. Measured peaks range from 3x for large entries to 7x for entries
+# crowded with MET and aromatic residues
+EXPANSION = 4
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def estimate_entry_memory(data: bytes) -> int:
+    # A gzip file ends with the size of its contents modulo 2 ** 32, so the cost of
+    # an entry is known before it is decompressed
+    size = len(data)
+
+    if data[:2] == GZIP_MAGIC and size >= 18:
+        size = max(size, int.from_bytes(data[-4:], "little"))
+
+    return EXPANSION * size
+
+
+def _get_rows_size(rows: Coordinates) -> int:
+    return getsizeof(rows) + sum(
+        getsizeof(row) + sum(map(getsizeof, row)) for row in rows
+    )
+
+
+def measure_entry_memory(raw_data: RawData, spaces: Iterable[FeatureSpace]) -> int:
+    # Bytes held by the lines of an entry and by the rows parsed from them. Lines of
+    # the first model are shared with raw_data and only their list is counted
+    size = getsizeof(raw_data) + sum(map(getsizeof, raw_data))
+
+    for fs in spaces:
+        size += getsizeof(fs.first_model)
+
+        for rows in (fs.coords_met, fs.coords_phe, fs.coords_tyr, fs.coords_trp):
+            size += _get_rows_size(rows)
+
+    return size
+
+
+class MemoryBudget:
+    """
+    Admission control for the entries of a batch job. Each entry reserves its
+    estimated cost before it is decompressed and searched, and waits while the
+    reservations in flight would exceed the budget. A waiting worker pulls no
+    further codes, so downloads are held back too. Entries costing more than
+    large_entry go through a lane of their own that admits one at a time, and
+    no small entry is admitted ahead of a large entry waiting for room. An entry
+    costing more than the whole budget is searched alone.
+    """
+
+    def __init__(self, budget: int, large_entry: int) -> None:
+        self.budget = budget
+        self.large_entry = large_entry
+
+        self.condition = Condition()
+        self.large_lane = Lock()
+
+        self.reserved = 0
+        self.peak_reserved = 0
+        self.pending = 0
+        self.num_large = 0
+
+    def _reserve(self, cost: int, large: bool) -> None:
+        with self.condition:
+            if large:
+                self.pending = cost
+                self.condition.wait_for(lambda: self.reserved + cost <= self.budget)
+                self.pending = 0
+                self.num_large += 1
+
+                # Small entries held back for this one may fit now
+                self.condition.notify_all()
+            else:
+                # Room is kept free for a large entry waiting in its lane
+                self.condition.wait_for(
+                    lambda: self.reserved + self.pending + cost <= self.budget
+                )
+
+            self.reserved += cost
+            self.peak_reserved = max(self.peak_reserved, self.reserved)
+
+    def _release(self, cost: int) -> None:
+        with self.condition:
+            self.reserved -= cost
+            self.condition.notify_all()
+
+    @contextmanager
+    def admit(self, cost: int) -> Iterator[None]:
+        cost = min(cost, self.budget)
+        large = cost > self.large_entry
+
+        with self.large_lane if large else nullcontext():
+            self._reserve(cost, large)
+
+            try:
+                yield
+            finally:
+                self._release(cost)
@@ -0,0 +1,170 @@
+import asyncio
+from contextlib import suppress
+from ssl import create_default_context
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+Origin = tuple[str, str, int]
+
+
+class AsyncHTTPPool:
+    """
+    A minimal HTTP/1.1 GET client on asyncio streams. Connections are kept
+    alive and reused per origin, and at most max_connections are opened to
+    any one origin, so many concurrent downloads share a few sockets. Callers
+    hold the pool with async with, and idle connections are closed once the
+    last holder leaves.
+    """
+
+    def __init__(self, max_connections: int = 8) -> None:
+        self.max_connections = max_connections
+        self.idle: dict[Origin, list[Connection]] = {}
+        self.limits: dict[Origin, asyncio.Semaphore] = {}
+        self.num_connections = 0
+        self.num_users = 0
+
+    async def __aenter__(self) -> "AsyncHTTPPool":
+        self.num_users += 1
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.num_users -= 1
+
+        if self.num_users == 0:
+            await self.close()
+
+    async def _connect(self, origin: Origin) -> Connection:
+        scheme, host, port = origin
+
+        if scheme == "https":
+            return await asyncio.open_connection(
+                host, port, ssl=create_default_context()
+            )
+
+        return await asyncio.open_connection(host, port)
+
+    @staticmethod
+    async def _read_body(
+        reader: asyncio.StreamReader, headers: dict[str, str]
+    ) -> tuple[bytes, bool]:
+        # Returns the body and whether the connection can be reused afterwards
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+
+            while (size := int((await reader.readline()).split(b";")[0], 16)) > 0:
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+
+            while (await reader.readline()).strip() != b"":
+                pass
+
+            return b"".join(chunks), True
+
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"])), True
+
+        return await reader.read(), False
+
+    async def _request(
+        self, connection: Connection, host: str, target: str
+    ) -> tuple[int, bytes, bool]:
+        reader, writer = connection
+
+        writer.write(
+            f"GET {target} HTTP/1.1\r\nHost: {host}\r\n"
+            "Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n".encode()
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+
+        if len(status_line) == 0:
+            raise ConnectionResetError("Connection closed by server")
+
+        version, status, _ = status_line.decode("latin-1").split(" ", 2)
+        headers = {}
+
+        while (line := await reader.readline()).strip() != b"":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        body, reusable = await self._read_body(reader, headers)
+        reusable = (
+            reusable
+            and version == "HTTP/1.1"
+            and headers.get("connection", "").lower() != "close"
+        )
+
+        return int(status), body, reusable
+
+    async def _exchange(
+        self, origin: Origin, connection: Connection, target: str
+    ) -> tuple[int, bytes]:
+        try:
+            status, body, reusable = await self._request(connection, origin[1], target)
+        except BaseException:
+            connection[1].close()
+            raise
+
+        if reusable:
+            self.idle[origin].append(connection)
+        else:
+            connection[1].close()
+
+        return status, body
+
+    async def get(self, url: str, timeout: float | None = None) -> tuple[int, bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = parts.hostname or "localhost"
+        origin = (scheme, host, parts.port or (443 if scheme == "https" else 80))
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+
+        if origin not in self.limits:
+            self.limits[origin] = asyncio.Semaphore(self.max_connections)
+            self.idle[origin] = []
+
+        async with self.limits[origin], asyncio.timeout(timeout):
+            if len(self.idle[origin]) > 0:
+                try:
+                    return await self._exchange(origin, self.idle[origin].pop(), target)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # The server closed the connection while it sat idle. Retry on a new one
+                    pass
+
+            connection = await self._connect(origin)
+            self.num_connections += 1
+
+            return await self._exchange(origin, connection, target)
+
+    async def close(self) -> None:
+        writers = [
+            writer for connections in self.idle.values() for _, writer in connections
+        ]
+
+        for connections in self.idle.values():
+            connections.clear()
+
+        for writer in writers:
+            writer.close()
+
+        # Transports are only released once the loop has run their close callbacks
+        for writer in writers:
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+
+_POOLS: WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHTTPPool] = (
+    WeakKeyDictionary()
+)
+
+
+def get_http_pool() -> AsyncHTTPPool:
+    # Streams belong to the loop that opened them, so each event loop gets its own pool
+    loop = asyncio.get_running_loop()
+
+    if loop not in _POOLS:
+        _POOLS[loop] = AsyncHTTPPool()
+
+    return _POOLS[loop]
@@ -1,24 +1,43 @@
+from heapq import heappush, heappushpop
 from itertools import groupby
 from operator import itemgetter
 from re import match
-from numpy import array, linalg
+from typing import Callable, Iterable, Sequence, TypeAlias
+from numpy import argsort, argwhere, array, linalg
 from .errors import SearchError
 from .get_aromatic_midpoints import (
     get_phe_midpoints,
     get_trp_midpoints,
     get_tyr_midpoints,
 )
+from .kernel import apply_criteria, stack_ragged
 from .lone_pair_interpolators import CrossProductMethod, RodriguesMethod
-from .models import MetAromaticParams, FeatureSpace, LonePairs, Interactions
+from .models import (
+    MetAromaticParams,
+    FeatureSpace,
+    LonePairs,
+    Interactions,
+    StageTiming,
+)
+from .profiling import record_stage, StageHook
 from .utils import get_angle_between_vecs, get_search_pattern
-from .aliases import RawData, FloatArray
+from .aliases import Coordinates, FloatArray, Midpoints, RawData
+
+# The ring atoms of an aromatic residue and the function computing its midpoints
+AromaticResidue: TypeAlias = tuple[Coordinates, Callable[[Coordinates], Midpoints]]
 
 
 class MetAromatic:
 
-    def __init__(self, params: MetAromaticParams, raw_data: RawData) -> None:
+    def __init__(
+        self,
+        params: MetAromaticParams,
+        raw_data: RawData,
+        hook: StageHook | None = None,
+    ) -> None:
         self.params = params
         self.raw_data = raw_data
+        self.hook = hook
         self.f: FeatureSpace
 
     def get_first_model(self) -> None:
@@ -59,100 +78,448 @@ class MetAromatic:
             if match(pattern, line):
                 self.f.coords_trp.append(line.split()[:9])
 
-    def get_met_lone_pairs_cp(self) -> None:
-        for position, groups in groupby(self.f.coords_met, lambda entry: entry[5]):
-            ordered = sorted(list(groups), key=itemgetter(2))
-
-            coords_ce: FloatArray = array(ordered[0][6:9]).astype(float)
-            coords_cg: FloatArray = array(ordered[1][6:9]).astype(float)
-            coords_sd: FloatArray = array(ordered[2][6:9]).astype(float)
-
-            lp = CrossProductMethod(coords_cg, coords_sd, coords_ce)
+    @staticmethod
+    def _get_lone_pairs(
+        interpolator: type[CrossProductMethod] | type[RodriguesMethod],
+        position: str,
+        ordered: Coordinates,
+    ) -> LonePairs:
+        # Rows are ordered by atom name, i.e. CE, CG, SD
+        coords_ce: FloatArray = array(ordered[0][6:9]).astype(float)
+        coords_cg: FloatArray = array(ordered[1][6:9]).astype(float)
+        coords_sd: FloatArray = array(ordered[2][6:9]).astype(float)
+
+        lp = interpolator(coords_cg, coords_sd, coords_ce)
+
+        return LonePairs(
+            coords_sd=coords_sd,
+            position=position,
+            vector_a=lp.get_vector_a(),
+            vector_g=lp.get_vector_g(),
+        )
+
+    @staticmethod
+    def _group_met_coordinates(coords: Coordinates) -> list[tuple[str, Coordinates]]:
+        return [
+            (position, sorted(list(groups), key=itemgetter(2)))
+            for position, groups in groupby(coords, lambda entry: entry[5])
+        ]
 
+    def get_met_lone_pairs_cp(self) -> None:
+        for position, ordered in self._group_met_coordinates(self.f.nearby_met):
             self.f.lone_pairs_met.append(
-                LonePairs(
-                    coords_sd=coords_sd,
-                    position=position,
-                    vector_a=lp.get_vector_a(),
-                    vector_g=lp.get_vector_g(),
-                )
+                self._get_lone_pairs(CrossProductMethod, position, ordered)
             )
 
     def get_met_lone_pairs_rm(self) -> None:
-        for position, groups in groupby(self.f.coords_met, lambda entry: entry[5]):
-            ordered = sorted(list(groups), key=itemgetter(2))
-
-            coords_ce: FloatArray = array(ordered[0][6:9]).astype(float)
-            coords_cg: FloatArray = array(ordered[1][6:9]).astype(float)
-            coords_sd: FloatArray = array(ordered[2][6:9]).astype(float)
-
-            lp = RodriguesMethod(coords_cg, coords_sd, coords_ce)
+        for position, ordered in self._group_met_coordinates(self.f.nearby_met):
+            self.f.lone_pairs_met.append(
+                self._get_lone_pairs(RodriguesMethod, position, ordered)
+            )
 
+    def get_met_lone_pairs_both(self) -> None:
+        for position, ordered in self._group_met_coordinates(self.f.nearby_met):
             self.f.lone_pairs_met.append(
-                LonePairs(
-                    coords_sd=coords_sd,
-                    position=position,
-                    vector_a=lp.get_vector_a(),
-                    vector_g=lp.get_vector_g(),
-                )
+                self._get_lone_pairs(CrossProductMethod, position, ordered)
+            )
+            self.f.lone_pairs_met_rm.append(
+                self._get_lone_pairs(RodriguesMethod, position, ordered)
             )
 
     def get_midpoints(self) -> None:
-        self.f.midpoints_phe = get_phe_midpoints(self.f.coords_phe)
-        self.f.midpoints_tyr = get_tyr_midpoints(self.f.coords_tyr)
-        self.f.midpoints_trp = get_trp_midpoints(self.f.coords_trp)
+        self.f.midpoints_phe = get_phe_midpoints(self.f.nearby_phe)
+        self.f.midpoints_tyr = get_tyr_midpoints(self.f.nearby_tyr)
+        self.f.midpoints_trp = get_trp_midpoints(self.f.nearby_trp)
+
+    def _test_criteria(
+        self, lone_pair: LonePairs, midpoint: tuple[str, str, FloatArray]
+    ) -> Interactions | None:
+        vector_v: FloatArray = midpoint[2] - lone_pair.coords_sd
+        norm_vector_v: float = linalg.norm(vector_v).item()
+
+        if norm_vector_v > self.params.cutoff_distance:
+            return None
+
+        return self._test_angles(lone_pair, midpoint, vector_v, norm_vector_v)
+
+    def _test_angles(
+        self,
+        lone_pair: LonePairs,
+        midpoint: tuple[str, str, FloatArray],
+        vector_v: FloatArray,
+        norm_vector_v: float,
+    ) -> Interactions | None:
+        met_theta_angle = get_angle_between_vecs(vector_v, lone_pair.vector_a)
+        met_phi_angle = get_angle_between_vecs(vector_v, lone_pair.vector_g)
+
+        if (met_theta_angle > self.params.cutoff_angle) and (
+            met_phi_angle > self.params.cutoff_angle
+        ):
+            return None
+
+        return Interactions(
+            aromatic_position=int(midpoint[0]),
+            aromatic_residue=midpoint[1],
+            met_phi_angle=round(met_phi_angle, 3),
+            met_theta_angle=round(met_theta_angle, 3),
+            methionine_position=int(lone_pair.position),
+            norm=round(norm_vector_v, 3),
+        )
+
+    def _get_top_k(
+        self, interactions: Iterable[Interactions], k: int
+    ) -> list[Interactions]:
+        # A bounded max heap per residue keeps only its k shortest interactions. Ties
+        # go to the interaction found first, and survivors keep their original order
+        heaps: dict[tuple[str, int], list[tuple[float, int, Interactions]]] = {}
+
+        for order, interaction in enumerate(interactions):
+            if self.params.top_k_per == "met":
+                residue = ("MET", interaction.methionine_position)
+            else:
+                residue = (interaction.aromatic_residue, interaction.aromatic_position)
+
+            heap = heaps.setdefault(residue, [])
+            item = (-interaction.norm, -order, interaction)
+
+            if len(heap) < k:
+                heappush(heap, item)
+            else:
+                heappushpop(heap, item)
+
+        kept = [item for heap in heaps.values() for item in heap]
+        kept.sort(key=lambda item: -item[1])
+
+        return [interaction for *_, interaction in kept]
+
+    def _select(self, interactions: Iterable[Interactions]) -> list[Interactions]:
+        if self.params.top_k is None:
+            return list(interactions)
+
+        return self._get_top_k(interactions, self.params.top_k)
+
+    def _get_lone_pair_models(self) -> list[list[LonePairs]]:
+        if self.params.model == "both":
+            return [self.f.lone_pairs_met, self.f.lone_pairs_met_rm]
+
+        return [self.f.lone_pairs_met]
+
+    def _get_all_midpoints(self) -> Midpoints:
+        return self.f.midpoints_phe + self.f.midpoints_tyr + self.f.midpoints_trp
+
+    @staticmethod
+    def _apply_criteria(mas: Sequence["MetAromatic"]) -> None:
+        # pylint: disable=protected-access
+        # The lone pairs and midpoints of every structure are stacked into ragged
+        # arrays and the criteria are evaluated for all of them in one vectorized call
+        params = mas[0].params
+
+        if any(ma.params != params for ma in mas):
+            raise ValueError("Structures computed together must share parameters")
+
+        models = [ma._get_lone_pair_models() for ma in mas]
+        midpoints = [ma._get_all_midpoints() for ma in mas]
+
+        # Lone pairs of every model share SD, so distances are computed once
+        lone_pairs = [lp for entry in models for lp in entry[0]]
+        all_midpoints = [m for entry in midpoints for m in entry]
+
+        matches = apply_criteria(
+            coords_sd=stack_ragged(
+                [array([lp.coords_sd for lp in entry[0]]) for entry in models]
+            ),
+            lone_pairs=[
+                (
+                    array([lp.vector_a for e in models for lp in e[i]]).reshape(-1, 3),
+                    array([lp.vector_g for e in models for lp in e[i]]).reshape(-1, 3),
+                )
+                for i in range(len(models[0]))
+            ],
+            midpoints=stack_ragged(
+                [array([m[2] for m in entry]) for entry in midpoints]
+            ),
+            cutoff_distance=params.cutoff_distance,
+            cutoff_angle=params.cutoff_angle,
+        )
+
+        for index, match in enumerate(matches):
+            found: list[list[Interactions]] = [[] for _ in mas]
+
+            for entry, i, j, norm, theta, phi in zip(*(a.tolist() for a in match)):
+                found[entry].append(
+                    Interactions(
+                        aromatic_position=int(all_midpoints[j][0]),
+                        aromatic_residue=all_midpoints[j][1],
+                        met_phi_angle=round(phi, 3),
+                        met_theta_angle=round(theta, 3),
+                        methionine_position=int(lone_pairs[i].position),
+                        norm=round(norm, 3),
+                    )
+                )
+
+            for ma, interactions in zip(mas, found):
+                if index == 0:
+                    ma.f.interactions.extend(ma._select(interactions))
+                else:
+                    ma.f.interactions_rm.extend(ma._select(interactions))
 
     def apply_met_aromatic_criteria(self) -> None:
-        midpoints = self.f.midpoints_phe + self.f.midpoints_tyr + self.f.midpoints_trp
+        self._apply_criteria([self])
+
+    def _get_aromatic_residues(self) -> list[AromaticResidue]:
+        residues: list[AromaticResidue] = []
+
+        for coords, get_midpoints in (
+            (self.f.coords_phe, get_phe_midpoints),
+            (self.f.coords_tyr, get_tyr_midpoints),
+            (self.f.coords_trp, get_trp_midpoints),
+        ):
+            for _, group in groupby(coords, lambda entry: entry[5]):
+                residues.append((list(group), get_midpoints))
+
+        return residues
+
+    def _get_candidates(
+        self, mets: list[tuple[str, Coordinates]], aromatics: list[AromaticResidue]
+    ) -> list[list[int]]:
+        # Midpoints lie on the ring, so no midpoint is closer to SD than the distance
+        # from SD to the ring centroid less the distance from the centroid to the ring
+        coords_sd = array([ordered[2][6:9] for _, ordered in mets]).astype(float)
+        rings = [
+            array([row[6:9] for row in group]).astype(float) for group, _ in aromatics
+        ]
+        centroids = array([ring.mean(axis=0) for ring in rings])
+        radii = array(
+            [linalg.norm(ring - c, axis=1).max() for ring, c in zip(rings, centroids)]
+        )
+
+        bounds = (
+            linalg.norm(coords_sd[:, None, :] - centroids[None, :, :], axis=2)
+            - radii[None, :]
+        )
+
+        # Returns (MET, aromatic) index pairs that may interact, nearest first
+        candidates = argwhere(bounds <= self.params.cutoff_distance + 1e-6)
+        order = argsort(bounds[candidates[:, 0], candidates[:, 1]], kind="stable")
+
+        pairs: list[list[int]] = candidates[order].tolist()
+        return pairs
+
+    def prefilter(self) -> None:
+        # Only residues that are within reach of some residue of the other kind
+        # are passed on to the lone pair and midpoint stages
+        mets = self._group_met_coordinates(self.f.coords_met)
+        aromatics = self._get_aromatic_residues()
+
+        pairs = self._get_candidates(mets, aromatics)
+        nearby_mets = {i for i, _ in pairs}
+        nearby_aromatics = {j for _, j in pairs}
+
+        for i, (_, ordered) in enumerate(mets):
+            if i in nearby_mets:
+                self.f.nearby_met.extend(ordered)
+
+        nearby = {
+            get_phe_midpoints: self.f.nearby_phe,
+            get_tyr_midpoints: self.f.nearby_tyr,
+            get_trp_midpoints: self.f.nearby_trp,
+        }
+
+        for j, (group, get_midpoints) in enumerate(aromatics):
+            if j in nearby_aromatics:
+                nearby[get_midpoints].extend(group)
+
+    def count_interactions(self, limit: int) -> int:
+        """
+        Count interactions in a parsed structure, stopping as soon as limit
+        are found. Lone pairs and midpoints are computed lazily, only for the
+        MET/aromatic pairs whose ring centroid can be within the cutoff
+        distance, and the closest pairs are tried first.
+        """
+
+        mets = self._group_met_coordinates(self.f.coords_met)
+        aromatics = self._get_aromatic_residues()
+
+        # With both models, interactions are counted with the cp model
+        if self.params.model == "rm":
+            interpolator: type[CrossProductMethod] | type[RodriguesMethod] = (
+                RodriguesMethod
+            )
+        else:
+            interpolator = CrossProductMethod
 
-        for lone_pair in self.f.lone_pairs_met:
-            for midpoint in midpoints:
-                vector_v: FloatArray = midpoint[2] - lone_pair.coords_sd
-                norm_vector_v: float = linalg.norm(vector_v).item()
+        lone_pairs: dict[int, LonePairs] = {}
+        midpoints: dict[int, Midpoints] = {}
 
-                if norm_vector_v > self.params.cutoff_distance:
-                    continue
+        for i, j in self._get_candidates(mets, aromatics):
+            if i not in lone_pairs:
+                lone_pairs[i] = self._get_lone_pairs(interpolator, *mets[i])
 
-                met_theta_angle = get_angle_between_vecs(vector_v, lone_pair.vector_a)
-                met_phi_angle = get_angle_between_vecs(vector_v, lone_pair.vector_g)
+            if j not in midpoints:
+                group, get_midpoints = aromatics[j]
+                midpoints[j] = get_midpoints(group)
 
-                if (met_theta_angle > self.params.cutoff_angle) and (
-                    met_phi_angle > self.params.cutoff_angle
-                ):
-                    continue
+            for midpoint in midpoints[j]:
+                if (
+                    interaction := self._test_criteria(lone_pairs[i], midpoint)
+                ) is not None:
+                    self.f.interactions.append(interaction)
 
-                self.f.interactions.append(
-                    Interactions(
-                        aromatic_position=int(midpoint[0]),
-                        aromatic_residue=midpoint[1],
-                        met_phi_angle=round(met_phi_angle, 3),
-                        met_theta_angle=round(met_theta_angle, 3),
-                        methionine_position=int(lone_pair.position),
-                        norm=round(norm_vector_v, 3),
-                    )
-                )
+                    if len(self.f.interactions) >= limit:
+                        return limit
 
-    def get_interactions(self) -> FeatureSpace:
-        self.f = FeatureSpace()
+        return len(self.f.interactions)
 
-        self.get_first_model()
-        self.get_met_coordinates()
-        self.get_phe_coordinates()
-        self.get_tyr_coordinates()
-        self.get_trp_coordinates()
+    def _run_stage(
+        self, stage: str, method: Callable[[], None], count: Callable[[], int]
+    ) -> None:
+        with record_stage(stage, self.f.timings, self.hook) as timing:
+            method()
+            timing.count = count()
+
+    def parse(self) -> None:
+        self.f = FeatureSpace()
+        f = self.f
+
+        self._run_stage("first_model", self.get_first_model, lambda: len(f.first_model))
+        self._run_stage(
+            "met_coordinates", self.get_met_coordinates, lambda: len(f.coords_met)
+        )
+        self._run_stage(
+            "phe_coordinates", self.get_phe_coordinates, lambda: len(f.coords_phe)
+        )
+        self._run_stage(
+            "tyr_coordinates", self.get_tyr_coordinates, lambda: len(f.coords_tyr)
+        )
+        self._run_stage(
+            "trp_coordinates", self.get_trp_coordinates, lambda: len(f.coords_trp)
+        )
 
         if len(self.f.coords_phe + self.f.coords_tyr + self.f.coords_trp) == 0:
             raise SearchError("No PHE/TYR/TRP residues")
 
+    def _prepare(self) -> None:
+        # Runs every stage up to the criteria
+        f = self.f
+
         if self.params.model == "cp":
-            self.get_met_lone_pairs_cp()
+            get_met_lone_pairs = self.get_met_lone_pairs_cp
+        elif self.params.model == "rm":
+            get_met_lone_pairs = self.get_met_lone_pairs_rm
         else:
-            self.get_met_lone_pairs_rm()
-
-        self.get_midpoints()
-        self.apply_met_aromatic_criteria()
-
-        if len(self.f.interactions) == 0:
+            get_met_lone_pairs = self.get_met_lone_pairs_both
+
+        self._run_stage(
+            "prefilter",
+            self.prefilter,
+            lambda: len(f.nearby_met)
+            + len(f.nearby_phe)
+            + len(f.nearby_tyr)
+            + len(f.nearby_trp),
+        )
+        self._run_stage(
+            "lone_pairs",
+            get_met_lone_pairs,
+            lambda: len(f.lone_pairs_met) + len(f.lone_pairs_met_rm),
+        )
+        self._run_stage(
+            "midpoints",
+            self.get_midpoints,
+            lambda: len(f.midpoints_phe) + len(f.midpoints_tyr) + len(f.midpoints_trp),
+        )
+
+    def _get_num_interactions(self) -> int:
+        return len(self.f.interactions) + len(self.f.interactions_rm)
+
+    def compute(self) -> FeatureSpace:
+        self._prepare()
+        self._run_stage(
+            "criteria", self.apply_met_aromatic_criteria, self._get_num_interactions
+        )
+
+        if self._get_num_interactions() == 0:
             raise SearchError("No Met-aromatic interactions")
 
         return self.f
+
+    @staticmethod
+    def compute_batch(mas: Sequence["MetAromatic"]) -> list[FeatureSpace | SearchError]:
+        """
+        Compute many parsed structures that share parameters. Lone pairs and
+        midpoints are found per structure, but the criteria are evaluated for
+        all structures in one vectorized call, which removes most of the per
+        structure overhead for small entries. Returns the feature space of each
+        structure, or the error it would have raised, in order.
+        """
+
+        # pylint: disable=protected-access
+        if len(mas) == 0:
+            return []
+
+        for ma in mas:
+            ma._prepare()
+
+        batch: list[StageTiming] = []
+
+        with record_stage("criteria", batch):
+            MetAromatic._apply_criteria(mas)
+
+        # The criteria stage is timed once and shared out by the number of
+        # MET/midpoint pairs of each structure
+        pairs = [len(ma.f.lone_pairs_met) * len(ma._get_all_midpoints()) for ma in mas]
+        results: list[FeatureSpace | SearchError] = []
+
+        for ma, num_pairs in zip(mas, pairs):
+            share = num_pairs / sum(pairs) if sum(pairs) > 0 else 1 / len(mas)
+            timing = StageTiming(
+                stage="criteria",
+                count=ma._get_num_interactions(),
+                cpu_time=batch[0].cpu_time * share,
+                wall_time=batch[0].wall_time * share,
+            )
+            ma.f.timings.append(timing)
+
+            if ma.hook is not None:
+                ma.hook(timing)
+
+            if timing.count == 0:
+                results.append(SearchError("No Met-aromatic interactions"))
+            else:
+                results.append(ma.f)
+
+        return results
+
+    def with_params(
+        self, params: MetAromaticParams, hook: StageHook | None = None
+    ) -> "MetAromatic":
+        # Search a parsed structure again with other parameters of the same chain,
+        # without parsing it again
+        if params.chain != self.params.chain:
+            raise ValueError("Parse results can only be shared within one chain")
+
+        ma = MetAromatic(params=params, raw_data=self.raw_data, hook=hook)
+        ma.f = FeatureSpace(
+            first_model=self.f.first_model,
+            coords_met=self.f.coords_met,
+            coords_phe=self.f.coords_phe,
+            coords_tyr=self.f.coords_tyr,
+            coords_trp=self.f.coords_trp,
+        )
+
+        return ma
+
+    def get_interactions(self) -> FeatureSpace:
+        self.parse()
+        return self.compute()
+
+    def screen(self, limit: int = 1) -> int:
+        # Structures without MET or aromatic residues simply have no interactions
+        try:
+            self.parse()
+        except SearchError:
+            return 0
+
+        with record_stage("screen", self.f.timings, self.hook) as timing:
+            timing.count = self.count_interactions(limit)
+
+        return timing.count
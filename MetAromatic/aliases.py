@@ -1,14 +1,19 @@
 from typing import TypeAlias, Literal
-from numpy import float64
+from numpy import bool_, float64, intp
 from numpy.typing import NDArray
 
+BoolArray: TypeAlias = NDArray[bool_]
 FloatArray: TypeAlias = NDArray[float64]
+IntArray: TypeAlias = NDArray[intp]
 
 Coordinates: TypeAlias = list[list[str]]
+ErrorClass: TypeAlias = Literal["network", "parse", "no_interaction"]
 Midpoints: TypeAlias = list[tuple[str, str, FloatArray]]
-Models: TypeAlias = Literal["cp", "rm"]
+Models: TypeAlias = Literal["cp", "rm", "both"]
 RawData: TypeAlias = list[str]
 Residues: TypeAlias = Literal["phe", "tyr", "trp", "met"]
+Sinks: TypeAlias = Literal["mongo", "jsonl", "sqlite", "npz"]
+TopKPer: TypeAlias = Literal["met", "aromatic"]
 
 PdbCodes: TypeAlias = list[str]
 Chunks: TypeAlias = list[PdbCodes]
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from datetime import datetime
+from json import dumps, loads
+from pathlib import Path
+from platform import platform, python_version
+from statistics import mean, median
+from time import perf_counter
+from typing import Any, Callable
+from .algorithm import MetAromatic
+from .errors import SearchError
+from .get_bridge import isolate_bridges
+from .load_resources import load_local_pdb_file
+from .models import MetAromaticParams
+from .profiling import COMPUTE_STAGES, PARSE_STAGES, sum_stages
+from .printing import print_separator
+
+# Differences below this many seconds are considered noise and never flagged
+ABS_TOLERANCE = 50e-6
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else float("inf")
+
+
+def _summarize(samples: list[float]) -> dict[str, float]:
+    return {
+        "max": round(max(samples), 9),
+        "mean": round(mean(samples), 9),
+        "median": round(median(samples), 9),
+        "min": round(min(samples), 9),
+    }
+
+
+def _time(func: Callable[[], Any]) -> tuple[float, Any]:
+    start = perf_counter()
+    result = func()
+    return perf_counter() - start, result
+
+
+def _benchmark_structure(
+    path: Path, params: MetAromaticParams, vertices: int
+) -> dict[str, float]:
+    # One pass over a structure, returning seconds spent in each stage
+    elapsed: dict[str, float] = {}
+
+    elapsed["load"], raw_data = _time(lambda: load_local_pdb_file(path))
+
+    ma = MetAromatic(params=params, raw_data=raw_data)
+
+    try:
+        ma.parse()
+        fs = ma.compute()
+    except SearchError:
+        fs = None
+
+    elapsed["parse"] = sum_stages(ma.f.timings, PARSE_STAGES)
+
+    for timing in ma.f.timings:
+        if timing.stage in COMPUTE_STAGES:
+            elapsed[timing.stage] = timing.wall_time
+
+    if fs is not None:
+        elapsed["bridges"], _ = _time(lambda: isolate_bridges(fs, vertices))
+        elapsed["serialization"], _ = _time(lambda: dumps(fs.serialize_interactions()))
+
+    elapsed["end_to_end"] = sum(elapsed.values())
+    return elapsed
+
+
+def run_benchmarks(
+    paths: list[Path],
+    params: MetAromaticParams,
+    repeats: int = 5,
+    warmup: int = 1,
+    vertices: int = 3,
+) -> dict[str, Any]:
+    samples: dict[str, list[float]] = {}
+    totals: list[float] = []
+
+    for i in range(warmup + repeats):
+        total = 0.0
+
+        for path in paths:
+            for stage, seconds in _benchmark_structure(path, params, vertices).items():
+                if i >= warmup:
+                    samples.setdefault(f"{path.name}/{stage}", []).append(seconds)
+
+                if stage == "end_to_end":
+                    total += seconds
+
+        if i >= warmup:
+            totals.append(total)
+
+    throughput = len(paths) / median(totals) if median(totals) > 0 else 0.0
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "params": params.model_dump(),
+        "platform": platform(),
+        "python": python_version(),
+        "repeats": repeats,
+        "results": {name: _summarize(values) for name, values in samples.items()},
+        "structures": [path.name for path in paths],
+        "throughput": {"entries_per_second": round(throughput, 3)},
+    }
+
+
+def load_baseline(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        raise SearchError(f"Baseline {path} does not exist")
+
+    baseline: dict[str, Any] = loads(path.read_text())
+    return baseline
+
+
+def save_results(results: dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(dumps(results, indent=4) + "\n")
+
+
+def find_regressions(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[Regression]:
+    # Medians are compared as they are far less sensitive to outliers than means
+    regressions = []
+
+    for name, summary in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        previous = baseline["results"][name]["median"]
+        current = summary["median"]
+
+        if current - previous < ABS_TOLERANCE:
+            continue
+
+        if current > previous * (1 + threshold):
+            regressions.append(
+                Regression(name=name, baseline=previous, current=current)
+            )
+
+    return regressions
+
+
+def print_results(results: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    print_separator()
+    print("BENCHMARK                                MEDIAN (ms)  MIN (ms)     CHANGE")
+    print_separator()
+
+    for name, summary in results["results"].items():
+        change = ""
+
+        if baseline is not None and name in baseline["results"]:
+            previous = baseline["results"][name]["median"]
+
+            if previous > 0:
+                change = f"{100 * (summary['median'] / previous - 1):+.1f}%"
+
+        print(
+            f"{name:<40} "
+            f"{1000 * summary['median']:<12.3f} "
+            f"{1000 * summary['min']:<12.3f} "
+            f"{change}"
+        )
+
+    print_separator()
+    print(f"Throughput: {results['throughput']['entries_per_second']} entries/s")
+    print_separator()
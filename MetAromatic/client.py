@@ -0,0 +1,82 @@
+# Kept free of NumPy and pydantic so that forwarding a query to a server starts quickly
+from http.client import HTTPConnection, HTTPException, RemoteDisconnected
+from json import dumps, loads
+from socket import AF_UNIX, SOCK_STREAM, socket
+from typing import Any
+from urllib.parse import urlsplit
+from .errors import DownloadError, SearchError
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket(AF_UNIX, SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class ServerClient:
+    """
+    Forward queries to a server started with `runner serve`. The address is
+    either http://host:port or unix:/path/to/socket. A single keep-alive
+    connection is reused across requests.
+    """
+
+    def __init__(self, address: str, timeout: float = 300.0) -> None:
+        self.address = address
+        self.timeout = timeout
+        self.conn: HTTPConnection | None = None
+
+    def _connect(self) -> HTTPConnection:
+        if self.address.startswith("unix:"):
+            return _UnixHTTPConnection(self.address[5:], self.timeout)
+
+        url = urlsplit(self.address if "//" in self.address else f"//{self.address}")
+        return HTTPConnection(url.hostname or "127.0.0.1", url.port, self.timeout)
+
+    def _send(
+        self, method: str, endpoint: str, body: bytes | None
+    ) -> tuple[int, bytes]:
+        if self.conn is None:
+            self.conn = self._connect()
+
+        headers = {"Content-Type": "application/json"}
+        self.conn.request(method, f"/{endpoint}", body=body, headers=headers)
+
+        response = self.conn.getresponse()
+        return response.status, response.read()
+
+    def request(self, endpoint: str, payload: dict[str, Any] | None = None) -> Any:
+        method = "GET" if payload is None else "POST"
+        body = None if payload is None else dumps(payload).encode()
+
+        try:
+            try:
+                status, data = self._send(method, endpoint, body)
+            except (RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The server closed an idle keep-alive connection. Reconnect once
+                self.close()
+                status, data = self._send(method, endpoint, body)
+        except (OSError, HTTPException) as error:
+            self.close()
+            raise SearchError(
+                f"Could not connect to server at {self.address}"
+            ) from error
+
+        response = loads(data)
+
+        if status == 502:
+            raise DownloadError(response["error"])
+
+        if status != 200:
+            raise SearchError(response.get("error", f"Server returned status {status}"))
+
+        return response
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,127 @@
+from io import TextIOBase
+from pathlib import Path
+from re import compile as compile_regex
+from typing import Iterable, Iterator, TextIO
+import sys
+from .errors import SearchError
+
+SEPARATORS = compile_regex(r"[;,\s]+")
+BLOCK_SIZE = 1 << 16
+NUM_ALPHANUMERIC_CODES = 36**4
+
+CodeInput = Path | str | TextIO | Iterable[str]
+
+
+class CodeSet:
+    """
+    Exact membership test for PDB codes in constant memory. Every alphanumeric
+    four character code maps onto one bit of a 36**4 bit array (about 210 KB),
+    so deduplicating millions of codes does not grow a hash set. Anything else
+    falls back to a regular set.
+    """
+
+    def __init__(self) -> None:
+        self.bits = bytearray(NUM_ALPHANUMERIC_CODES // 8 + 1)
+        self.others: set[str] = set()
+
+    @staticmethod
+    def _get_bit(code: str) -> tuple[int, int] | None:
+        # int() would also accept underscores and surrounding whitespace
+        if len(code) != 4 or not (code.isascii() and code.isalnum()):
+            return None
+
+        index, bit = divmod(int(code, 36), 8)
+        return index, 1 << bit
+
+    def __contains__(self, code: object) -> bool:
+        if not isinstance(code, str):
+            return False
+
+        if (position := self._get_bit(code)) is None:
+            return code in self.others
+
+        index, mask = position
+        return self.bits[index] & mask != 0
+
+    def add(self, code: str) -> bool:
+        # Returns whether the code was added, i.e. whether it was not seen before
+        if code in self:
+            return False
+
+        if (position := self._get_bit(code)) is None:
+            self.others.add(code)
+        else:
+            index, mask = position
+            self.bits[index] |= mask
+
+        return True
+
+
+def _split_stream(stream: TextIO | TextIOBase) -> Iterator[str]:
+    # Read lines so that codes piped in are read as they arrive, but no more than a
+    # block at a time so that a batch file on a single line also streams
+    tail = ""
+
+    while len(block := stream.readline(BLOCK_SIZE)) > 0:
+        *tokens, tail = SEPARATORS.split(tail + block)
+        yield from tokens
+
+    yield tail
+
+
+class CodeSource:
+    """
+    Stream PDB codes from a batch file, stdin (a path of "-"), an open text
+    stream or any iterable of strings. Codes are lowercased and duplicates are
+    dropped as they are read, and nothing is read ahead, so memory use does
+    not depend on the size of the input and work can start on the first code.
+    """
+
+    def __init__(self, source: CodeInput) -> None:
+        if isinstance(source, str):
+            source = Path(source)
+
+        if isinstance(source, Path) and str(source) != "-" and not source.exists():
+            raise SearchError(f"Path {source} does not exist")
+
+        self.source = source
+        self.seen = CodeSet()
+        self.num_codes = 0
+        self.num_duplicates = 0
+        self.codes = self._get_codes()
+
+    def __str__(self) -> str:
+        if isinstance(self.source, Path):
+            return "stdin" if str(self.source) == "-" else str(self.source)
+
+        return repr(self.source)
+
+    def _get_tokens(self) -> Iterator[str]:
+        if isinstance(self.source, Path):
+            if str(self.source) == "-":
+                yield from _split_stream(sys.stdin)
+            else:
+                with self.source.open(encoding="utf-8") as f:
+                    yield from _split_stream(f)
+        elif isinstance(self.source, TextIOBase):
+            yield from _split_stream(self.source)
+        else:
+            for text in self.source:
+                yield from SEPARATORS.split(text)
+
+    def _get_codes(self) -> Iterator[str]:
+        for token in self._get_tokens():
+            if len(token) != 4:
+                continue
+
+            if self.seen.add(code := token.lower()):
+                self.num_codes += 1
+                yield code
+            else:
+                self.num_duplicates += 1
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        return next(self.codes)
@@ -1,29 +1,103 @@
 from enum import Enum
-from numpy import sin, cos, pi
+from math import sin, cos, pi
 
 
 # CLI
 class Help(Enum):
 
     CMD_BATCH = "Run a Met-aromatic query batch job."
+    CMD_BATCH_LOCAL = "Run a Met-aromatic query batch job over local PDB files."
+    CMD_BATCH_HARNESS = "Measure batch throughput against a local stand-in mirror."
+    CMD_BATCH_STATUS = "Show the progress of a distributed batch job."
+    CMD_BATCH_SUBMIT = "Submit a batch job to a queue shared by batch workers."
+    CMD_BATCH_WORKER = "Process chunks of a distributed batch job from a shared queue."
+    CMD_BENCHMARK = "Benchmark each stage of the algorithm over local PDB files."
     CMD_BRIDGE = "Run a bridging interaction query on a single PDB entry."
+    CMD_GENERATE = "Generate a synthetic PDB file for benchmarking."
+    CMD_MOTIFS = "Find connected motifs or paths of interactions in a PDB entry."
     CMD_PAIR = "Run a Met-aromatic query against a single PDB entry."
     CMD_READ_LOCAL = "Run a Met-aromatic query against a local PDB file."
+    CMD_SCREEN = "Check whether PDB entries have any, or at least k, interactions."
+    CMD_SERVE = "Serve pair, bridge and read-local queries over HTTP."
 
     ANGLE = "Specify a cutoff angle in degrees."
     CHAIN = "Specify a chain ID."
+    CONNECT = "Forward the query to a server started with serve, at a URL or unix:PATH."
     DIST = "Specify a cutoff distance in Angstroms."
-    MODEL = "Specify a lone pair interpolation model."
+    MIRROR = "Specify a mirror base URL. Repeat to list mirrors in order of preference."
+    MODEL = "Specify a lone pair interpolation model, or both to compare them."
+    NEAREST = "Only keep the nearest interaction of each residue. Same as --top-k 1."
+    PROFILE = "Write a pstats profile, or collapsed stacks for a .folded file."
+    TOP_K = "Only keep the k shortest interactions of each residue."
+    TOP_K_PER = "Specify whether --top-k applies per MET or per aromatic residue."
 
+    BACKOFF = "Specify base delay in seconds for exponential backoff between retries."
+    BATCH_SCREEN = "Only count interactions per entry, stopping at the given number."
+    BATCH_BRIDGES = "Also store bridges with the given number of vertices per entry."
+    BATCH_CONFIG = "Specify a TOML file of named parameter sets to evaluate per entry."
+    CHUNK_SIZE = "Specify number of PDB codes per queued chunk."
+    COMPUTE_PROCESSES = "Search entries in this many processes while threads download."
     COLL = "Specify MongoDB collection to use."
     DB = "Specify MongoDB database to use."
     HOST = "Specify host name."
-    OVERWRITE = "Specify whether to overwrite collection."
+    MEMORY_BUDGET = "Limit the estimated memory of entries in flight to this many MiB."
+    METRICS_FILE = "Specify a file to periodically write batch metrics snapshots to."
+    METRICS_INTERVAL = "Specify seconds between batch metrics snapshots."
+    METRICS_PORT = "Specify a localhost port serving batch metrics for Prometheus."
+    GROUP_SIZE = "Specify number of files to compute together in one vectorized call."
+    MMAP = "Memory-map input files instead of reading them into memory."
+    LEASE = "Specify how long in seconds a claimed chunk is leased before it expires."
+    OUTPUT = "Specify output file for the jsonl, sqlite and npz sinks."
+    OVERWRITE = "Specify whether to overwrite collection or output file."
     PASSWORD = "Specify MongoDB password if authentication is enabled."
     PORT = "Specify MongoDB TCP connection port."
+    PROCESSES = "Specify number of worker processes to use."
+    QUEUE = "Specify a SQLite job queue file. Defaults to a MongoDB queue collection."
+    REMOVE_INVERSE = "Discard inverse bridges, with more MET than aromatic vertices."
+    RETRIES = "Specify number of retries for transient network failures."
+    RETRY_FAILED = "Reprocess only the retryable failures in an existing collection."
+    SINK = "Specify where to store batch results."
     THREADS = "Specify number of workers to use."
     USERNAME = "Specify MongoDB username if authentication is enabled."
+    MIN_HITS = "Specify number of interactions to stop at."
+    LIMIT = "Stop after this many motifs."
+    PATHS = "Only find paths rather than any connected motif."
+    PATTERN = "Specify residue types, e.g. ARO-MET-ARO. ARO matches PHE, TYR or TRP."
     VERTICES = "Specify number of vertices."
+    WORKER_ID = "Specify a unique name for this worker. Defaults to host-pid."
+
+    BASELINE = "Specify a baseline results file to check for regressions against."
+    BENCHMARK_OUTPUT = "Specify a file to save benchmark results to, as a baseline."
+    REPEATS = "Specify number of timed passes over the PDB files."
+    THRESHOLD = "Specify the relative slowdown in median time counted as a regression."
+    WARMUP = "Specify number of untimed passes before timing."
+
+    CHAINS = "Specify number of chains."
+    DENSITY = "Specify number of residues per cubic nanometer."
+    MODELS = "Specify number of models."
+    NUM_FILLER = "Specify number of filler alanine residues per chain."
+    NUM_MET = "Specify number of methionine residues per chain."
+    NUM_PHE = "Specify number of phenylalanine residues per chain."
+    NUM_TRP = "Specify number of tryptophan residues per chain."
+    NUM_TYR = "Specify number of tyrosine residues per chain."
+    NUM_WATERS = "Specify number of water molecules per chain."
+    SEED = "Specify a seed for the random number generator."
+
+    BANDWIDTH = "Override the stand-in bandwidth per response in bytes per second."
+    ERROR_RATE = "Override the fraction of stand-in requests answered with a 503 error."
+    JITTER = "Override the stand-in latency jitter in seconds."
+    LATENCY = "Override the stand-in latency in seconds."
+    MAX_CONCURRENCY = "Override the stand-in limit on concurrent requests before a 429."
+    MAX_RATE = "Override the stand-in limit on requests per second before a 429."
+    REPORT = "Specify a file to save the harness report to as JSON."
+    SERVER_PROFILE = "Specify the latency, bandwidth, error and throttling profile."
+
+    CACHE_SIZE = "Specify number of downloaded structures to keep in memory."
+    DATA_DIR = "Only serve read-local queries for files under this directory."
+    SERVE_HOST = "Specify the address to listen on."
+    SERVE_PORT = "Specify the TCP port to listen on."
+    SOCKET = "Specify a Unix socket to listen on instead of a TCP port."
+    WORKERS = "Specify number of queries to run in parallel."
 
 
 # Linear algebra
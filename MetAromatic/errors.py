@@ -1,2 +1,6 @@
 class SearchError(Exception):
     pass
+
+
+class DownloadError(Exception):
+    pass
@@ -1,28 +1,62 @@
-from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
 from datetime import datetime
+from glob import iglob
+from itertools import chain
+from http.server import ThreadingHTTPServer
 from json import dumps
 from logging import getLogger, config
+from multiprocessing import get_context
 from pathlib import Path
-from re import split
-from signal import signal, SIGINT, SIG_DFL
-from threading import Lock
-from time import time
-from typing import Any
-from pymongo import MongoClient, errors, database
+from signal import signal, SIGINT, SIG_DFL, SIG_IGN
+from threading import Event, Lock, Thread
+from time import time, sleep
+from typing import Any, Iterable, Iterator, Sequence
+from .admission import MemoryBudget, estimate_entry_memory, measure_entry_memory
 from .algorithm import MetAromatic
-from .aliases import RawData, PdbCodes, Chunks
+from .aliases import RawData, PdbCodes, ErrorClass
+from .code_source import CodeSet, CodeSource
 from .errors import SearchError
-from .load_resources import load_pdb_file_from_rscb
+from .get_bridge import isolate_bridges
+from .job_queue import JobQueue, Lease, QueueProgress, get_job_queue
+from .load_resources import fetch_pdb_file, decompress_pdb_file, load_local_pdb_file
+from .metrics import (
+    BatchMetrics,
+    SnapshotWriter,
+    StageMetrics,
+    StageRecorder,
+    start_metrics_server,
+)
 from .models import (
     MetAromaticParams,
     FeatureSpace,
     BatchParams,
     BatchResult,
+    ConfigResult,
     DictInteractions,
+    DictModelDifferences,
+    QueueParams,
+    StageTiming,
+    load_param_sets,
 )
+from .profiling import COMPUTE_STAGES, PARSE_STAGES, record_stage, sum_stages
+from .retries import classify_error, get_backoff_delay, RETRYABLE
+from .shared_buffers import BufferDescriptor, SharedBuffers, attach_buffer
+from .sinks import Sink, get_sink
 
 Logger = getLogger("met-aromatic")
 
+STRUCTURE_SUFFIXES = (".pdb", ".ent", ".pdb.gz", ".ent.gz")
+
 
 def _configure_logger() -> None:
     config.dictConfig(
@@ -51,73 +85,241 @@ def _configure_logger() -> None:
     )
 
 
-def _load_pdb_codes(batch_file: Path) -> PdbCodes:
-    Logger.info("Importing pdb codes from file %s", batch_file)
+def _load_pdb_codes(batch_file: Path) -> CodeSource:
+    pdb_codes = CodeSource(batch_file)
+    Logger.info("Streaming pdb codes from %s", pdb_codes)
+
+    return pdb_codes
 
-    if not batch_file.exists():
-        raise SearchError(f"Path {batch_file} does not exist")
 
-    pdb_codes = []
+def _chunk_pdb_codes(chunk_size: int, pdb_codes: Iterable[str]) -> Iterator[PdbCodes]:
+    chunk = []
 
-    for line in batch_file.read_text().splitlines():
-        for code in split(r"(;|,|\s)\s*", line):
-            if len(code) == 4:
-                pdb_codes.append(code)
+    for code in pdb_codes:
+        chunk.append(code)
 
-    return pdb_codes
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
 
+    if len(chunk) > 0:
+        yield chunk
 
-def _chunk_pdb_codes(num_chunks: int, pdb_codes: PdbCodes) -> Chunks:
-    Logger.info("Splitting list of PDB codes into %i chunks", num_chunks)
 
-    chunks = []
+@dataclass
+class EntryFindings:
+    # What a search found in one entry. Fields that do not apply stay None
+    interactions: list[DictInteractions] | None = None
+    interactions_rm: list[DictInteractions] | None = None
+    model_differences: DictModelDifferences | None = None
+    bridges: list[list[str]] | None = None
+    hits: int | None = None
+    configs: dict[str, ConfigResult] | None = None
+    peak_memory: int | None = None
 
-    for i in range(num_chunks):
-        chunks.append(pdb_codes[i::num_chunks])
 
-    return chunks
+@dataclass
+class EntrySearch:
+    """
+    The search run on every downloaded entry of a batch job. It holds no
+    threads, locks or sinks, so it can be sent to compute processes as is.
+    """
 
+    params: MetAromaticParams
+    bp: BatchParams
+    configs: dict[str, MetAromaticParams] | None = None
 
-def _get_database_handle(bp: BatchParams) -> database.Database:
-    client: MongoClient = MongoClient(
-        host=bp.host,
-        password=bp.password,
-        port=bp.port,
-        serverSelectionTimeoutMS=1000,
-        username=bp.username,
-    )
+    def _get_bridges(
+        self, fs: FeatureSpace, timings: list[StageTiming]
+    ) -> list[list[str]]:
+        assert self.bp.bridges is not None
 
-    try:
-        client[bp.database].list_collection_names()
-    except errors.ServerSelectionTimeoutError as error:
-        raise SearchError("Failed to connect to MongoDB") from error
-    except errors.OperationFailure as error:
-        if error.details is None:
-            errmsg = "Unknown error occurred when connecting to MongoDB"
+        with record_stage("bridges", timings):
+            bs = isolate_bridges(fs, self.bp.bridges, self.bp.remove_inverse)
+
+        return [sorted(bridge) for bridge in bs.bridges]
+
+    def _measure_memory(
+        self, raw_data: RawData, parsed: Iterable[MetAromatic]
+    ) -> int | None:
+        # Only measured when a memory budget is enforced
+        if self.bp.memory_budget is None:
+            return None
+
+        return measure_entry_memory(raw_data, [ma.f for ma in parsed])
+
+    def _evaluate_config(
+        self,
+        parsed: MetAromatic | SearchError,
+        params: MetAromaticParams,
+        metrics: StageMetrics,
+    ) -> ConfigResult:
+        timings: list[StageTiming] = []
+        error_class: ErrorClass | None = None
+        errmsg: str | None = None
+        fs: FeatureSpace | None = None
+        bridges: list[list[str]] | None = None
+        hits: int | None = None
+
+        if isinstance(parsed, SearchError):
+            error_class = classify_error(parsed)
+            errmsg = str(parsed)
         else:
-            errmsg = error.details["errmsg"]
-        raise SearchError(errmsg) from error
+            ma = parsed.with_params(params, hook=timings.append)
+
+            try:
+                if self.bp.screen is not None:
+                    with (
+                        metrics.time_stage("compute"),
+                        record_stage("screen", timings) as timing,
+                    ):
+                        hits = timing.count = ma.count_interactions(self.bp.screen)
+                else:
+                    with metrics.time_stage("compute"):
+                        fs = ma.compute()
+
+                        if self.bp.bridges is not None:
+                            bridges = self._get_bridges(fs, timings)
+            except SearchError as error:
+                fs = None
+                error_class = classify_error(error)
+                errmsg = str(error)
+
+        result = ConfigResult(
+            error_class=error_class,
+            errmsg=errmsg,
+            interactions=None if fs is None else fs.serialize_interactions(),
+            timings=[t.to_dict() for t in timings],
+        )
+
+        if params.model == "both" and self.bp.screen is None:
+            _add_model_comparison(result, fs)
+
+        if self.bp.bridges is not None:
+            result["bridges"] = bridges
+
+        if self.bp.screen is not None:
+            result["hits"] = 0 if error_class == "no_interaction" else hits
+
+        return result
+
+    def _get_config_results(
+        self, raw_data: RawData, timings: list[StageTiming], metrics: StageMetrics
+    ) -> EntryFindings:
+        # Each chain is parsed once and shared by every parameter set that searches it
+        assert self.configs is not None
+
+        parsed: dict[str, MetAromatic | SearchError] = {}
+        results = {}
+
+        for name, params in self.configs.items():
+            if params.chain not in parsed:
+                ma = MetAromatic(params=params, raw_data=raw_data, hook=timings.append)
+
+                try:
+                    with metrics.time_stage("parse"):
+                        ma.parse()
+                except SearchError as error:
+                    parsed[params.chain] = error
+                else:
+                    parsed[params.chain] = ma
+
+            results[name] = self._evaluate_config(parsed[params.chain], params, metrics)
+
+        structures = [ma for ma in parsed.values() if isinstance(ma, MetAromatic)]
+        return EntryFindings(
+            configs=results, peak_memory=self._measure_memory(raw_data, structures)
+        )
 
-    return client[bp.database]
+    def search(
+        self, raw_data: RawData, timings: list[StageTiming], metrics: StageMetrics
+    ) -> EntryFindings:
+        if self.configs is not None:
+            return self._get_config_results(raw_data, timings, metrics)
 
+        ma = MetAromatic(params=self.params, raw_data=raw_data, hook=timings.append)
 
-def _get_info_collection(base_collection: str) -> str:
-    return f"{base_collection}_info"
+        with metrics.time_stage("parse"):
+            ma.parse()
 
+        # Lines and parsed rows are all alive by now
+        peak_memory = self._measure_memory(raw_data, [ma])
 
-def _overwrite_collection_if_enabled(db: database.Database, coll: str) -> None:
-    Logger.info('Will overwrite collection "%s" if exists', coll)
-    db.drop_collection(coll)
+        if self.bp.screen is not None:
+            with (
+                metrics.time_stage("compute"),
+                record_stage("screen", timings) as timing,
+            ):
+                timing.count = ma.count_interactions(self.bp.screen)
 
-    info_collection = _get_info_collection(coll)
-    Logger.info('Will overwrite collection "%s" if exists', info_collection)
+            return EntryFindings(hits=timing.count, peak_memory=peak_memory)
 
-    db.drop_collection(info_collection)
+        findings = EntryFindings(peak_memory=peak_memory)
 
+        with metrics.time_stage("compute"):
+            fs: FeatureSpace = ma.compute()
 
-def _ensure_collection_does_not_exist(db: database.Database, coll: str) -> None:
-    if coll in db.list_collection_names():
-        raise SearchError(f'Collection "{coll}" exists! Cannot proceed')
+            if self.bp.bridges is not None:
+                findings.bridges = self._get_bridges(fs, timings)
+
+        findings.interactions = fs.serialize_interactions()
+
+        if self.params.model == "both":
+            findings.interactions_rm = fs.serialize_interactions_rm()
+            findings.model_differences = fs.get_model_differences()
+
+        return findings
+
+    def add_findings(self, result: BatchResult, findings: EntryFindings) -> None:
+        if self.configs is not None:
+            # Results of each parameter set are stored under its name
+            result["configs"] = findings.configs
+            return
+
+        if self.params.model == "both" and self.bp.screen is None:
+            result["interactions_rm"] = findings.interactions_rm
+            result["model_differences"] = findings.model_differences
+
+        if self.bp.bridges is not None:
+            result["bridges"] = findings.bridges
+
+        if self.bp.screen is not None:
+            # Structures without MET or aromatic residues have no interactions
+            no_interaction = result["error_class"] == "no_interaction"
+            result["hits"] = 0 if no_interaction else findings.hits
+
+
+@dataclass
+class SharedSearch:
+    # Returned by a compute process. Errors are returned rather than raised so
+    # that the timings of a failed search are kept
+    findings: EntryFindings | None
+    error: Exception | None
+    timings: list[StageTiming]
+    recorder: StageRecorder
+
+
+def _search_shared_entry(
+    search: EntrySearch, descriptor: BufferDescriptor, code: str
+) -> SharedSearch:
+    # Runs in a compute process, reading the download straight from shared memory
+    timings: list[StageTiming] = []
+    recorder = StageRecorder()
+
+    try:
+        with attach_buffer(descriptor) as data:
+            with recorder.time_stage("decompress"), record_stage("decompress", timings):
+                raw_data: RawData = decompress_pdb_file(data, code)
+
+        findings = search.search(raw_data, timings, recorder)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return SharedSearch(
+            findings=None, error=error, timings=timings, recorder=recorder
+        )
+
+    return SharedSearch(
+        findings=findings, error=None, timings=timings, recorder=recorder
+    )
 
 
 class ParallelProcessing:
@@ -127,16 +329,36 @@ class ParallelProcessing:
         self,
         params: MetAromaticParams,
         bp: BatchParams,
-        db: database.Database,
-        chunks: Chunks,
+        sink: Sink,
+        codes: Iterable[str],
+        replace: bool = False,
+        configs: dict[str, MetAromaticParams] | None = None,
     ) -> None:
         self.params = params
         self.bp = bp
-        self.db = db
-        self.chunks = chunks
+        self.sink = sink
+        self.codes = codes
+        self.replace = replace
+        self.configs = configs
+        self.search = EntrySearch(params=params, bp=bp, configs=configs)
 
         self.count = 0
         self.disable_workers = False
+        self.feed_lock = Lock()
+
+        self.metrics = BatchMetrics()
+        self.metrics_server: ThreadingHTTPServer | None = None
+        self.snapshot_writer: SnapshotWriter | None = None
+
+        self.pool: ProcessPoolExecutor | None = None
+        self.buffers = SharedBuffers()
+
+        self.budget: MemoryBudget | None = None
+
+        if bp.memory_budget is not None:
+            # Entries above an even share of the budget per thread take the large lane
+            budget = bp.memory_budget * 2**20
+            self.budget = MemoryBudget(budget, large_entry=budget // bp.threads)
 
     def _disable_all_workers(self, *args: Any) -> None:
         Logger.info("Detected SIGINT!")
@@ -155,94 +377,768 @@ class ParallelProcessing:
         Logger.info("Unregistering SIGINT from thread terminator")
         signal(SIGINT, SIG_DFL)
 
+    def _start_metrics_exporters(self) -> None:
+        if self.bp.metrics_port is not None:
+            self.metrics_server = start_metrics_server(
+                self.metrics, self.bp.metrics_port
+            )
+
+            # Port 0 binds any free port, so log the one actually bound
+            Logger.info(
+                "Serving metrics on http://127.0.0.1:%i/metrics",
+                self.metrics_server.server_address[1],
+            )
+
+        if self.bp.metrics_file is not None:
+            Logger.info("Writing metrics snapshots to %s", self.bp.metrics_file)
+            self.snapshot_writer = SnapshotWriter(
+                self.metrics, self.bp.metrics_file, self.bp.metrics_interval
+            )
+            self.snapshot_writer.start()
+
+    def _stop_metrics_exporters(self) -> None:
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.stop()
+
+    def _start_compute_processes(self) -> None:
+        # Downloads stay in threads, the CPU bound search moves to processes
+        if self.bp.compute_processes is None:
+            return
+
+        Logger.info("Starting %i compute processes", self.bp.compute_processes)
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.bp.compute_processes,
+            mp_context=get_context("spawn"),
+            initializer=_ignore_sigint,
+        )
+
+    def _stop_compute_processes(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+        # Segments are normally released by the threads that shared them
+        if len(self.buffers) > 0:
+            Logger.warning("Releasing %i leftover shared buffers", len(self.buffers))
+
+        self.buffers.close()
+
+    def _search_in_process(
+        self, code: str, data: bytes, timings: list[StageTiming]
+    ) -> EntryFindings:
+        # Only a descriptor of the shared download and the findings are pickled
+        assert self.pool is not None
+
+        with self.buffers.share(data) as descriptor:
+            future = self.pool.submit(
+                _search_shared_entry, self.search, descriptor, code
+            )
+
+            try:
+                searched = future.result()
+            except BrokenProcessPool:
+                if not self.disable_workers:
+                    Logger.error("A compute process died. Stopping all workers!")
+
+                self.disable_workers = True
+                raise
+
+        timings.extend(searched.timings)
+        searched.recorder.replay(self.metrics)
+
+        if searched.error is not None:
+            raise searched.error
+
+        assert searched.findings is not None
+        return searched.findings
+
+    @contextmanager
+    def _admit(self, cost: int, timings: list[StageTiming]) -> Iterator[None]:
+        # Holds the entry back until its estimated cost fits in the memory budget
+        if self.budget is None:
+            yield
+            return
+
+        with ExitStack() as stack:
+            with self.metrics.time_stage("admit"), record_stage("admit", timings):
+                stack.enter_context(self.budget.admit(cost))
+
+            yield
+
     def _get_interaction(self, code: str) -> BatchResult:
+        attempts = 0
+        error_class: ErrorClass | None = None
         errmsg: str | None = None
-        interactions: list[DictInteractions] | None = None
+        findings = EntryFindings()
 
-        try:
-            raw_data: RawData = load_pdb_file_from_rscb(code)
-            fs: FeatureSpace = MetAromatic(
-                params=self.params, raw_data=raw_data
-            ).get_interactions()
-        except SearchError as error:
-            errmsg = str(error)
-        except Exception as error:  # pylint: disable=broad-exception-caught
-            errmsg = str(error)
-        else:
-            interactions = fs.serialize_interactions()
+        while True:
+            attempts += 1
+            memory_estimate: int | None = None
+
+            # Only the timings of the last attempt are reported
+            timings: list[StageTiming] = []
+
+            try:
+                with self.metrics.time_stage("fetch"), record_stage("fetch", timings):
+                    data: bytes = fetch_pdb_file(code)
+
+                memory_estimate = estimate_entry_memory(data)
+
+                with self._admit(memory_estimate, timings):
+                    if self.pool is not None:
+                        findings = self._search_in_process(code, data, timings)
+                    else:
+                        with (
+                            self.metrics.time_stage("decompress"),
+                            record_stage("decompress", timings),
+                        ):
+                            raw_data: RawData = decompress_pdb_file(data, code)
+
+                        findings = self.search.search(raw_data, timings, self.metrics)
+
+                        # Free the lines before their room in the budget is given back
+                        del raw_data
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                findings = EntryFindings()
+                error_class = classify_error(error)
+                errmsg = str(error)
+            else:
+                error_class = None
+                errmsg = None
+                break
+
+            if error_class not in RETRYABLE or attempts > self.bp.retries:
+                break
+
+            if self.disable_workers:
+                break
+
+            delay = get_backoff_delay(attempts - 1, self.bp.backoff)
+            Logger.warning(
+                "Attempt %i for %s failed (%s). Retrying in %.2f s",
+                attempts,
+                code,
+                errmsg,
+                delay,
+            )
+            sleep(delay)
+
+        result = BatchResult(
+            _id=code,
+            attempts=attempts,
+            error_class=error_class,
+            errmsg=errmsg,
+            interactions=findings.interactions,
+            retryable=error_class in RETRYABLE,
+            timings=[t.to_dict() for t in timings],
+        )
 
-        return BatchResult(_id=code, errmsg=errmsg, interactions=interactions)
+        self.search.add_findings(result, findings)
 
-    def _loop_over_chunk(self, chunk: PdbCodes) -> None:
-        collection = self.db[self.bp.collection]
+        if self.budget is not None:
+            result["memory_estimate"] = memory_estimate
+            result["peak_memory"] = findings.peak_memory
 
-        for code in chunk:
+        return result
+
+    def _count_codes(self, codes: Iterable[str]) -> Iterator[str]:
+        # The number of codes is not known up front when they are streamed
+        for code in codes:
+            self.metrics.add_total(1)
+            yield code
+
+    def _loop_over_codes(self, codes: Iterator[str]) -> None:
+        while True:
             if self.disable_workers:
                 Logger.info("Received interrupt signal - stopping worker thread...")
                 break
 
+            # Workers pull codes from a shared source, so a slow entry never holds up a whole chunk
+            with self.feed_lock:
+                code = next(codes, None)
+
+            if code is None:
+                break
+
             with self.mutex:
                 self.count += 1
 
             Logger.info("Processing %s. Count: %i", code, self.count)
+            self.metrics.start_entry()
 
             doc_interactions: BatchResult = self._get_interaction(code)
-            collection.insert_one(doc_interactions)
 
-    def _insert_summary_doc(self, exec_time: float) -> None:
+            with self.metrics.time_stage("write"):
+                self.sink.write(doc_interactions, replace=self.replace)
+
+            self.metrics.finish_entry(doc_interactions["error_class"])
+
+    def _insert_summary_doc(self, exec_time: float, **extras: Any) -> None:
         batch_job_metadata = {
             "batch_job_execution_time": exec_time,
             "data_acquisition_date": datetime.now(),
             "num_workers": self.bp.threads,
+            "compute_processes": self.bp.compute_processes,
+            "memory_budget": self.bp.memory_budget,
             "number_of_entries": self.count,
-            **self.params.dict(),
+            "bridges": self.bp.bridges,
+            "screen": self.bp.screen,
+            "remove_inverse": self.bp.remove_inverse,
+            "retry_failed": self.bp.retry_failed,
+            "sink": self.bp.sink,
+            "metrics": self.metrics.get_snapshot(),
+            **self.params.model_dump(),
+            **extras,
         }
 
-        info_collection = _get_info_collection(self.bp.collection)
+        if self.budget is not None:
+            batch_job_metadata["peak_reserved_memory"] = self.budget.peak_reserved
+            batch_job_metadata["large_entries"] = self.budget.num_large
+
+        if self.configs is not None:
+            batch_job_metadata["configs"] = {
+                name: params.model_dump() for name, params in self.configs.items()
+            }
 
         Logger.info(
-            "Loading:\n%s\nInto collection: %s",
+            "Loading:\n%s\nInto %s",
             dumps(batch_job_metadata, indent=4, default=str),
-            info_collection,
+            self.sink,
         )
 
-        self.db[info_collection].insert_one(batch_job_metadata)
+        self.sink.write_summary(batch_job_metadata)
 
     def deploy_jobs(self) -> None:
         Logger.info("Deploying %i workers!", self.bp.threads)
 
         self._register_sigint()
+        self._start_metrics_exporters()
+        self._start_compute_processes()
+        start_time = time()
+
+        try:
+            self._run_codes(self._count_codes(self.codes))
+        finally:
+            self._stop_compute_processes()
+            self._stop_metrics_exporters()
+
+        exec_time = round(time() - start_time, 3)
+
+        Logger.info("Batch job complete!")
+        Logger.info("Results loaded into %s", self.sink)
+        Logger.info("Batch job execution time: %f s", exec_time)
+
+        extras = {}
+
+        if isinstance(self.codes, CodeSource):
+            Logger.info("Skipped %i duplicate codes", self.codes.num_duplicates)
+            extras["number_duplicates"] = self.codes.num_duplicates
+
+        self._insert_summary_doc(exec_time, **extras)
 
-        with ThreadPoolExecutor(max_workers=15, thread_name_prefix="Batch") as executor:
-            start_time = time()
+        self._unregister_sigint()
+
+    def _run_codes(self, codes: Iterable[str]) -> None:
+        shared = iter(codes)
 
+        with ThreadPoolExecutor(
+            max_workers=self.bp.threads, thread_name_prefix="Batch"
+        ) as executor:
             workers = [
-                executor.submit(self._loop_over_chunk, chunk) for chunk in self.chunks
+                executor.submit(self._loop_over_codes, shared)
+                for _ in range(self.bp.threads)
             ]
+            done, _ = wait(workers, return_when=ALL_COMPLETED)
 
-            if wait(workers, return_when=ALL_COMPLETED):
-                exec_time = round(time() - start_time, 3)
+        # Surface exceptions raised by workers (e.g. sink errors) rather than dropping them
+        for worker in done:
+            worker.result()
 
-                Logger.info("Batch job complete!")
-                Logger.info("Results loaded into database: %s", self.bp.database)
-                Logger.info("Results loaded into collection: %s", self.bp.collection)
-                Logger.info("Batch job execution time: %f s", exec_time)
-                self._insert_summary_doc(exec_time)
+
+class QueueWorker(ParallelProcessing):
+    def __init__(
+        self,
+        params: MetAromaticParams,
+        bp: BatchParams,
+        sink: Sink,
+        queue: JobQueue,
+        qp: QueueParams,
+    ) -> None:
+        super().__init__(params=params, bp=bp, sink=sink, codes=[], replace=True)
+        self.queue = queue
+        self.qp = qp
+        self.lease: Lease | None = None
+        self.lease_lost = Event()
+        self.stop_heartbeat = Event()
+
+    def _send_heartbeats(self) -> None:
+        interval = self.qp.lease / 3
+
+        while not self.stop_heartbeat.wait(interval):
+            lease = self.lease
+
+            if lease is None:
+                continue
+
+            if self.queue.heartbeat(lease.chunk_id, self.qp.worker_id, self.qp.lease):
+                continue
+
+            # The chunk may have moved on to the next one in the meantime
+            if self.lease is lease:
+                Logger.warning("Lost lease on chunk %i", lease.chunk_id)
+                self.lease_lost.set()
+
+    def _while_leased(self, codes: Iterable[str]) -> Iterator[str]:
+        # Another worker may have claimed the chunk once the lease is lost
+        for code in codes:
+            if self.lease_lost.is_set():
+                break
+
+            yield code
+
+    def _claim_next(self) -> Lease | None:
+        while not self.disable_workers:
+            lease = self.queue.claim(self.qp.worker_id, self.qp.lease)
+
+            if lease is not None:
+                return lease
+
+            progress = self.queue.get_progress()
+
+            if progress.is_finished():
+                return None
+
+            # Other workers hold the remaining leases - wait in case one of them expires
+            Logger.info("Waiting on %i chunks leased by other workers", progress.leased)
+            sleep(self.qp.poll_interval)
+
+        return None
+
+    def deploy_jobs(self) -> None:
+        Logger.info("Starting worker %s against %s", self.qp.worker_id, self.queue)
+
+        self._register_sigint()
+        self._start_metrics_exporters()
+        self._start_compute_processes()
+        heartbeat = Thread(target=self._send_heartbeats, daemon=True)
+        heartbeat.start()
+
+        start_time = time()
+        num_chunks = 0
+
+        try:
+            while (lease := self._claim_next()) is not None:
+                self.lease_lost.clear()
+                self.lease = lease
+                self.metrics.add_total(len(lease.codes))
+                Logger.info(
+                    "Claimed chunk %i (%i codes)", lease.chunk_id, len(lease.codes)
+                )
+
+                self._run_codes(self._while_leased(lease.codes))
+
+                if self.disable_workers:
+                    self.queue.release(lease.chunk_id, self.qp.worker_id)
+                    break
+
+                self.lease = None
+
+                if self.lease_lost.is_set():
+                    Logger.warning(
+                        "Stopped chunk %i after losing its lease", lease.chunk_id
+                    )
+                    continue
+
+                if not self.queue.complete(lease.chunk_id, self.qp.worker_id):
+                    Logger.warning(
+                        "Chunk %i was claimed by another worker", lease.chunk_id
+                    )
+                    continue
+
+                num_chunks += 1
+        finally:
+            self.stop_heartbeat.set()
+            heartbeat.join()
+            self._stop_compute_processes()
+            self._stop_metrics_exporters()
+
+        exec_time = round(time() - start_time, 3)
+
+        Logger.info("Worker %s processed %i chunks", self.qp.worker_id, num_chunks)
+        self._insert_summary_doc(
+            exec_time, worker_id=self.qp.worker_id, number_of_chunks=num_chunks
+        )
+        self._unregister_sigint()
+
+
+def _find_local_files(source: str) -> Iterator[Path]:
+    # Directories are searched recursively for structure files, anything else is a glob pattern
+    if Path(source).is_dir():
+        for path in Path(source).rglob("*"):
+            if path.name.endswith(STRUCTURE_SUFFIXES) and path.is_file():
+                yield path.resolve()
+    else:
+        for name in iglob(source, recursive=True):
+            if (path := Path(name)).is_file():
+                yield path.resolve()
+
+
+def _ignore_sigint() -> None:
+    # Let the parent process decide how to wind down on SIGINT
+    signal(SIGINT, SIG_IGN)
+
+
+def _add_model_comparison(
+    result: BatchResult | ConfigResult, fs: FeatureSpace | None
+) -> None:
+    # With model "both", interactions holds the cp results
+    result["interactions_rm"] = None if fs is None else fs.serialize_interactions_rm()
+    result["model_differences"] = None if fs is None else fs.get_model_differences()
+
+
+def _get_local_result(
+    path: str,
+    params: MetAromaticParams,
+    timings: list[StageTiming],
+    outcome: FeatureSpace | Exception,
+) -> BatchResult:
+    fs: FeatureSpace | None = None
+
+    if isinstance(outcome, Exception):
+        error_class = classify_error(outcome)
+
+        result = BatchResult(
+            _id=path,
+            attempts=1,
+            error_class=error_class,
+            errmsg=str(outcome),
+            interactions=None,
+            retryable=error_class in RETRYABLE,
+            timings=[t.to_dict() for t in timings],
+        )
+    else:
+        fs = outcome
+        result = BatchResult(
+            _id=path,
+            attempts=1,
+            error_class=None,
+            errmsg=None,
+            interactions=fs.serialize_interactions(),
+            retryable=False,
+            timings=[t.to_dict() for t in timings],
+        )
+
+    if params.model == "both":
+        _add_model_comparison(result, fs)
+
+    return result
+
+
+def _compute_alone(
+    ma: MetAromatic, timings: list[StageTiming], num_parse_timings: int
+) -> FeatureSpace | Exception:
+    # A failed group may have left ma partly computed, so start over from the raw
+    # data and keep only the timings recorded while reading and parsing
+    del timings[num_parse_timings:]
+    fresh = MetAromatic(params=ma.params, raw_data=ma.raw_data)
+
+    try:
+        fresh.parse()
+        fresh.hook = timings.append
+        return fresh.compute()
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return error
+
+
+def _process_local_files(
+    paths: list[str], params: MetAromaticParams, use_mmap: bool
+) -> list[BatchResult]:
+    # Files are read and parsed one at a time, then computed together so that
+    # the criteria are evaluated in one vectorized call for the whole group
+    timings: list[list[StageTiming]] = [[] for _ in paths]
+    outcomes: dict[int, FeatureSpace | Exception] = {}
+    parsed: dict[int, MetAromatic] = {}
+    num_parse_timings: dict[int, int] = {}
+
+    for index, path in enumerate(paths):
+        try:
+            with record_stage("read", timings[index]):
+                raw_data: RawData = load_local_pdb_file(Path(path), use_mmap)
+
+            ma = MetAromatic(
+                params=params, raw_data=raw_data, hook=timings[index].append
+            )
+            ma.parse()
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            outcomes[index] = error
+        else:
+            parsed[index] = ma
+            num_parse_timings[index] = len(timings[index])
+
+    computed: Sequence[FeatureSpace | Exception]
+
+    try:
+        computed = MetAromatic.compute_batch(list(parsed.values()))
+    except Exception:  # pylint: disable=broad-exception-caught
+        # Compute each structure on its own so that only the bad one gets the error
+        computed = [
+            _compute_alone(ma, timings[index], num_parse_timings[index])
+            for index, ma in parsed.items()
+        ]
+
+    outcomes.update(zip(parsed, computed))
+
+    return [
+        _get_local_result(path, params, timings[index], outcomes[index])
+        for index, path in enumerate(paths)
+    ]
+
+
+class LocalBatchJob(ParallelProcessing):
+    """
+    Run a batch job over structure files on disk in a pool of processes. Files
+    are found lazily and submitted as they are found, in groups of group_size
+    files that are computed together, and files whose absolute path is already
+    in the sink are skipped, so an interrupted job can be picked up where it
+    left off by running it again.
+    """
+
+    def __init__(
+        self,
+        params: MetAromaticParams,
+        bp: BatchParams,
+        sink: Sink,
+        files: Iterator[Path],
+        processed: set[str],
+        use_mmap: bool = False,
+        group_size: int = 1,
+    ) -> None:
+        super().__init__(params=params, bp=bp, sink=sink, codes=[])
+        self.files = files
+        self.processed = processed
+        self.use_mmap = use_mmap
+        self.group_size = group_size
+        self.num_skipped = 0
+
+    def _get_pending_files(self) -> Iterator[str]:
+        for path in map(str, self.files):
+            if path in self.processed:
+                self.num_skipped += 1
+            else:
+                yield path
+
+    def _write_result(self, result: BatchResult) -> None:
+        with self.mutex:
+            self.count += 1
+
+        for timing in result["timings"]:
+            if timing["stage"] == "read":
+                self.metrics.observe_stage("read", timing["wall_time"])
+
+        timings = [StageTiming(**t) for t in result["timings"]]
+        self.metrics.observe_stage("parse", sum_stages(timings, PARSE_STAGES))
+        self.metrics.observe_stage("compute", sum_stages(timings, COMPUTE_STAGES))
+
+        with self.metrics.time_stage("write"):
+            self.sink.write(result)
+
+        self.metrics.finish_entry(result["error_class"])
+
+    def _run_files(self) -> None:
+        groups = _chunk_pdb_codes(self.group_size, self._get_pending_files())
+        pending: set[Future[list[BatchResult]]] = set()
+
+        with ProcessPoolExecutor(
+            max_workers=self.bp.threads,
+            mp_context=get_context("spawn"),
+            initializer=_ignore_sigint,
+        ) as executor:
+            # Keep every process busy without holding the full list of files in memory
+            while True:
+                while not self.disable_workers and len(pending) < 4 * self.bp.threads:
+                    if (group := next(groups, None)) is None:
+                        break
+
+                    self.metrics.add_total(len(group))
+
+                    for _ in group:
+                        self.metrics.start_entry()
+
+                    pending.add(
+                        executor.submit(
+                            _process_local_files, group, self.params, self.use_mmap
+                        )
+                    )
+
+                if len(pending) == 0:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    for result in future.result():
+                        self._write_result(result)
+
+                        if self.count % 1000 == 0:
+                            Logger.info("Processed %i files", self.count)
+
+    def deploy_jobs(self) -> None:
+        Logger.info("Deploying %i worker processes!", self.bp.threads)
+
+        self._register_sigint()
+        self._start_metrics_exporters()
+        start_time = time()
+
+        try:
+            self._run_files()
+        finally:
+            self._stop_metrics_exporters()
+
+        exec_time = round(time() - start_time, 3)
+
+        Logger.info("Processed %i files, skipped %i", self.count, self.num_skipped)
+        Logger.info("Results loaded into %s", self.sink)
+        Logger.info("Batch job execution time: %f s", exec_time)
+        self._insert_summary_doc(exec_time, number_skipped=self.num_skipped)
 
         self._unregister_sigint()
 
 
+def run_local_batch_job(
+    params: MetAromaticParams,
+    bp: BatchParams,
+    source: str,
+    use_mmap: bool = False,
+    group_size: int = 1,
+) -> None:
+    _configure_logger()
+
+    files = _find_local_files(source)
+
+    if (first := next(files, None)) is None:
+        raise SearchError(f"No structure files found in {source}")
+
+    sink = get_sink(bp)
+    sink.open()
+
+    try:
+        # The npz sink writes all of its output on close, so it cannot be resumed
+        if bp.overwrite or bp.sink == "npz":
+            sink.prepare(overwrite=bp.overwrite)
+            processed = set()
+        else:
+            sink.attach()
+            processed = sink.get_processed_codes()
+            Logger.info("Found %i processed files in %s", len(processed), sink)
+
+        LocalBatchJob(
+            params=params,
+            bp=bp,
+            sink=sink,
+            files=chain([first], files),
+            processed=processed,
+            use_mmap=use_mmap,
+            group_size=group_size,
+        ).deploy_jobs()
+    finally:
+        sink.close()
+
+
+def _run_batch_job(
+    params: MetAromaticParams,
+    bp: BatchParams,
+    sink: Sink,
+    configs: dict[str, MetAromaticParams] | None,
+) -> None:
+    if bp.retry_failed:
+        # A line cut short by an interrupted job cannot be parsed, so drop it first
+        sink.attach()
+        pdb_codes = sink.get_retryable_codes()
+
+        if bp.path_batch_file is not None:
+            requested = CodeSet()
+
+            for code in _load_pdb_codes(bp.path_batch_file):
+                requested.add(code)
+
+            pdb_codes = [code for code in pdb_codes if code in requested]
+
+        Logger.info("Found %i retryable failures", len(pdb_codes))
+
+        codes: Iterable[str] = pdb_codes
+    else:
+        if bp.path_batch_file is None:
+            raise SearchError("A batch file is required unless retrying failures")
+
+        codes = _load_pdb_codes(bp.path_batch_file)
+        sink.prepare(overwrite=bp.overwrite)
+
+    ParallelProcessing(
+        params=params,
+        bp=bp,
+        sink=sink,
+        codes=codes,
+        replace=bp.retry_failed,
+        configs=configs,
+    ).deploy_jobs()
+
+
 def run_batch_job(params: MetAromaticParams, bp: BatchParams) -> None:
     _configure_logger()
 
+    # Parameter sets are checked before anything is written
+    configs = None if bp.config is None else load_param_sets(bp.config, params)
+
+    sink = get_sink(bp)
+    sink.open()
+
+    try:
+        _run_batch_job(params=params, bp=bp, sink=sink, configs=configs)
+    finally:
+        sink.close()
+
+
+def submit_batch_job(bp: BatchParams, qp: QueueParams) -> None:
+    _configure_logger()
+
+    if bp.path_batch_file is None:
+        raise SearchError("A batch file is required to submit a batch job")
+
     pdb_codes = _load_pdb_codes(bp.path_batch_file)
-    chunks = _chunk_pdb_codes(num_chunks=bp.threads, pdb_codes=pdb_codes)
 
-    db = _get_database_handle(bp)
+    queue = get_job_queue(bp, qp.path)
+    queue.create(_chunk_pdb_codes(qp.chunk_size, pdb_codes), overwrite=bp.overwrite)
 
-    if bp.overwrite:
-        _overwrite_collection_if_enabled(db=db, coll=bp.collection)
+    Logger.info(
+        "Submitted %i codes in %i chunks to %s (skipped %i duplicates)",
+        pdb_codes.num_codes,
+        -(-pdb_codes.num_codes // qp.chunk_size),
+        queue,
+        pdb_codes.num_duplicates,
+    )
+
+
+def run_batch_worker(
+    params: MetAromaticParams, bp: BatchParams, qp: QueueParams
+) -> None:
+    _configure_logger()
+
+    queue = get_job_queue(bp, qp.path)
+    queue.get_progress()
+
+    sink = get_sink(bp)
+    sink.open()
+
+    try:
+        sink.attach()
+        QueueWorker(params=params, bp=bp, sink=sink, queue=queue, qp=qp).deploy_jobs()
+    finally:
+        sink.close()
 
-    _ensure_collection_does_not_exist(db=db, coll=bp.collection)
 
-    ParallelProcessing(params=params, bp=bp, db=db, chunks=chunks).deploy_jobs()
+def get_batch_progress(bp: BatchParams, qp: QueueParams) -> QueueProgress:
+    return get_job_queue(bp, qp.path).get_progress()
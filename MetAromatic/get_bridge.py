@@ -1,29 +1,88 @@
-from networkx import Graph, connected_components
+import asyncio
+from concurrent.futures import Executor
+from .aio_http import get_http_pool
 from .algorithm import MetAromatic
 from .aliases import RawData, Models
-from .load_resources import load_pdb_file_from_rscb
-from .models import FeatureSpace, BridgeSpace, get_params
-from .utils import print_separator
+from .load_resources import (
+    async_fetch_pdb_file,
+    decompress_pdb_file,
+    load_pdb_file_from_rscb,
+)
+from .models import FeatureSpace, BridgeSpace, MetAromaticParams, get_params
+from .printing import print_bridge_list
 
 
-def _isolate_bridges(fs: FeatureSpace, vertices: int) -> BridgeSpace:
-    bs = BridgeSpace()
+def _find_components(edges: list[tuple[int, int]], num_nodes: int) -> list[list[int]]:
+    # Union-find over integer node labels, with path halving and union by size
+    parents = list(range(num_nodes))
+    sizes = [1] * num_nodes
+
+    def find(node: int) -> int:
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+
+        return node
+
+    for u, v in edges:
+        root_u, root_v = find(u), find(v)
+
+        if root_u == root_v:
+            continue
+
+        if sizes[root_u] < sizes[root_v]:
+            root_u, root_v = root_v, root_u
+
+        parents[root_v] = root_u
+        sizes[root_u] += sizes[root_v]
+
+    components: dict[int, list[int]] = {}
+
+    for node in range(num_nodes):
+        components.setdefault(find(node), []).append(node)
+
+    return list(components.values())
+
+
+def get_graph(fs: FeatureSpace) -> tuple[list[str], list[tuple[int, int]]]:
+    # Residues are labelled with integers in order of first appearance. Edges run from ARO to MET
+    labels: dict[str, int] = {}
+    edges: dict[tuple[int, int], None] = {}
 
     for interaction in fs.interactions:
-        pair = (
-            f"{interaction.aromatic_residue}{interaction.aromatic_position}",
-            f"MET{interaction.methionine_position}",
+        aromatic = f"{interaction.aromatic_residue}{interaction.aromatic_position}"
+        methionine = f"MET{interaction.methionine_position}"
+
+        edge = (
+            labels.setdefault(aromatic, len(labels)),
+            labels.setdefault(methionine, len(labels)),
         )
-        bs.interactions.add(pair)
+        edges[edge] = None
+
+    return list(labels), list(edges)
 
-    graph: Graph = Graph()
-    graph.add_edges_from(bs.interactions)
 
-    for bridge in connected_components(graph):
-        if len(bridge) == vertices:
-            bs.bridges.append(bridge)
+def isolate_bridges(
+    fs: FeatureSpace, vertices: int, remove_inverse: bool = False
+) -> BridgeSpace:
+    bs = BridgeSpace()
+
+    names, edges = get_graph(fs)
+    bs.interactions = {(names[u], names[v]) for u, v in edges}
 
-    # Note that inverse bridges (MET-ARO-MET) not removed!
+    for component in _find_components(edges, len(names)):
+        if len(component) != vertices:
+            continue
+
+        bridge = {names[node] for node in component}
+
+        # Inverse bridges, such as MET-ARO-MET, have more MET than aromatic vertices
+        num_met = sum(1 for name in bridge if name.startswith("MET"))
+
+        if remove_inverse and num_met > vertices - num_met:
+            continue
+
+        bs.bridges.append(bridge)
 
     return bs
 
@@ -35,6 +94,7 @@ def get_bridges(
     cutoff_distance: float,
     model: Models,
     vertices: int,
+    remove_inverse: bool = False,
 ) -> BridgeSpace:
     params = get_params(
         chain=chain,
@@ -45,16 +105,53 @@ def get_bridges(
     raw_data: RawData = load_pdb_file_from_rscb(code)
 
     fs: FeatureSpace = MetAromatic(params=params, raw_data=raw_data).get_interactions()
-    return _isolate_bridges(fs, vertices)
+    return isolate_bridges(fs, vertices, remove_inverse)
 
 
-def print_bridges(bs: BridgeSpace) -> None:
-    print_separator()
+def _get_bridges_from_data(
+    data: bytes,
+    code: str,
+    params: MetAromaticParams,
+    vertices: int,
+    remove_inverse: bool = False,
+) -> BridgeSpace:
+    raw_data = decompress_pdb_file(data, code)
+    fs = MetAromatic(params=params, raw_data=raw_data).get_interactions()
+
+    return isolate_bridges(fs, vertices, remove_inverse)
+
+
+async def async_get_bridges(
+    chain: str,
+    code: str,
+    cutoff_angle: float,
+    cutoff_distance: float,
+    model: Models,
+    vertices: int,
+    remove_inverse: bool = False,
+    executor: Executor | None = None,
+    timeout: float | None = None,
+) -> BridgeSpace:
+    # The asyncio version of get_bridges. See async_get_pairs_from_pdb
+    params = get_params(
+        chain=chain,
+        cutoff_angle=cutoff_angle,
+        cutoff_distance=cutoff_distance,
+        model=model,
+    )
 
-    if len(bs.bridges) > 0:
-        for bridge in bs.bridges:
-            print("{" + "}-{".join(bridge) + "}")
-    else:
-        print("Found 0 bridges")
+    async with get_http_pool(), asyncio.timeout(timeout):
+        data = await async_fetch_pdb_file(code)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor,
+            _get_bridges_from_data,
+            data,
+            code,
+            params,
+            vertices,
+            remove_inverse,
+        )
 
-    print_separator()
+
+def print_bridges(bs: BridgeSpace) -> None:
+    print_bridge_list(bs.bridges)
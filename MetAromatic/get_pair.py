@@ -1,9 +1,28 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+    FIRST_COMPLETED,
+)
+from functools import partial
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, TypeVar
+from .aio_http import get_http_pool
 from .algorithm import MetAromatic
-from .aliases import RawData, Models
-from .load_resources import load_local_pdb_file, load_pdb_file_from_rscb
-from .models import FeatureSpace, get_params
-from .utils import print_separator
+from .aliases import RawData, Models, TopKPer
+from .errors import DownloadError, SearchError
+from .load_resources import (
+    async_fetch_pdb_file,
+    decompress_pdb_file,
+    load_local_pdb_file,
+    load_pdb_file_from_rscb,
+)
+from .models import FeatureSpace, MetAromaticParams, get_params
+from .printing import print_interaction_rows
+
+T = TypeVar("T")
 
 
 def get_pairs_from_file(
@@ -12,12 +31,16 @@ def get_pairs_from_file(
     cutoff_angle: float,
     cutoff_distance: float,
     model: Models,
+    top_k: int | None = None,
+    top_k_per: TopKPer = "met",
 ) -> FeatureSpace:
     params = get_params(
         chain=chain,
         cutoff_angle=cutoff_angle,
         cutoff_distance=cutoff_distance,
         model=model,
+        top_k=top_k,
+        top_k_per=top_k_per,
     )
 
     raw_data: RawData = load_local_pdb_file(filepath)
@@ -30,32 +53,195 @@ def get_pairs_from_pdb(
     cutoff_angle: float,
     cutoff_distance: float,
     model: Models,
+    top_k: int | None = None,
+    top_k_per: TopKPer = "met",
 ) -> FeatureSpace:
     params = get_params(
         chain=chain,
         cutoff_angle=cutoff_angle,
         cutoff_distance=cutoff_distance,
         model=model,
+        top_k=top_k,
+        top_k_per=top_k_per,
     )
 
     raw_data: RawData = load_pdb_file_from_rscb(pdb_code)
     return MetAromatic(params=params, raw_data=raw_data).get_interactions()
 
 
-def print_interactions(fs: FeatureSpace) -> None:
-    print_separator()
-
-    print("ARO        POS        MET POS    NORM       MET-THETA  MET-PHI")
-    print_separator()
-
-    for i in fs.interactions:
-        print(
-            f"{i.aromatic_residue:<10} "
-            f"{i.aromatic_position:<10} "
-            f"{i.methionine_position:<10} "
-            f"{i.norm:<10} "
-            f"{i.met_theta_angle:<10} "
-            f"{i.met_phi_angle:<10}"
+def _get_pairs_from_data(
+    data: bytes, pdb_code: str, params: MetAromaticParams
+) -> FeatureSpace:
+    raw_data = decompress_pdb_file(data, pdb_code)
+    return MetAromatic(params=params, raw_data=raw_data).get_interactions()
+
+
+async def async_get_pairs_from_pdb(
+    pdb_code: str,
+    chain: str,
+    cutoff_angle: float,
+    cutoff_distance: float,
+    model: Models,
+    top_k: int | None = None,
+    top_k_per: TopKPer = "met",
+    executor: Executor | None = None,
+    timeout: float | None = None,
+) -> FeatureSpace:
+    """
+    The asyncio version of get_pairs_from_pdb. The download does not block the
+    event loop, and decompression and the search itself run on the executor,
+    or the loop's default executor if none is given. Raises TimeoutError if the
+    query does not complete within timeout seconds.
+    """
+
+    params = get_params(
+        chain=chain,
+        cutoff_angle=cutoff_angle,
+        cutoff_distance=cutoff_distance,
+        model=model,
+        top_k=top_k,
+        top_k_per=top_k_per,
+    )
+
+    async with get_http_pool(), asyncio.timeout(timeout):
+        data = await async_fetch_pdb_file(pdb_code)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, _get_pairs_from_data, data, pdb_code, params
         )
 
-    print_separator()
+
+def _load_entry(code_or_path: str | Path) -> RawData:
+    if isinstance(code_or_path, Path):
+        return load_local_pdb_file(code_or_path)
+
+    return load_pdb_file_from_rscb(code_or_path)
+
+
+def _get_pairs(code_or_path: str | Path, params: MetAromaticParams) -> FeatureSpace:
+    raw_data = _load_entry(code_or_path)
+    return MetAromatic(params=params, raw_data=raw_data).get_interactions()
+
+
+def _screen(code_or_path: str | Path, params: MetAromaticParams, limit: int) -> int:
+    raw_data = _load_entry(code_or_path)
+    return MetAromatic(params=params, raw_data=raw_data).screen(limit)
+
+
+def _run_many(
+    query: Callable[[str | Path], T],
+    codes_or_paths: Iterable[str | Path],
+    workers: int,
+    executor: Executor | None,
+) -> Iterator[tuple[str, T | SearchError | DownloadError]]:
+    if executor is None and workers == 1:
+        # Run in the calling thread, where profilers and debuggers can see it
+        for entry in codes_or_paths:
+            try:
+                yield str(entry), query(entry)
+            except (SearchError, DownloadError) as error:
+                yield str(entry), error
+
+        return
+
+    pool = executor or ThreadPoolExecutor(workers, thread_name_prefix="MetAromatic")
+
+    entries = iter(codes_or_paths)
+    pending: dict[Future[T], str] = {}
+
+    def submit_next() -> bool:
+        entry = next(entries, None)
+
+        if entry is None:
+            return False
+
+        pending[pool.submit(query, entry)] = str(entry)
+        return True
+
+    try:
+        while len(pending) < 2 * workers and submit_next():
+            pass
+
+        while len(pending) > 0:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                entry = pending.pop(future)
+                result: T | SearchError | DownloadError
+
+                try:
+                    result = future.result()
+                except (SearchError, DownloadError) as error:
+                    result = error
+
+                submit_next()
+                yield entry, result
+    finally:
+        for future in pending:
+            future.cancel()
+
+        if executor is None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_pairs_many(
+    codes_or_paths: Iterable[str | Path],
+    params: MetAromaticParams | None = None,
+    workers: int = 5,
+    executor: Executor | None = None,
+) -> Iterator[tuple[str, FeatureSpace | SearchError | DownloadError]]:
+    """
+    Run a Met-aromatic query against many entries concurrently and yield
+    (entry, result) pairs in order of completion. Paths are read from disk and
+    strings are treated as PDB codes. A query that fails yields its SearchError
+    or DownloadError instead of a FeatureSpace. Entries are submitted lazily,
+    with at most 2 * workers queries in flight, so codes_or_paths may be a
+    generator. An executor, for example a ProcessPoolExecutor, can be passed
+    in place of the default thread pool and is left open afterwards. With a
+    single worker and no executor, queries run in the calling thread.
+    """
+
+    params = params or get_params()
+    return _run_many(
+        partial(_get_pairs, params=params), codes_or_paths, workers, executor
+    )
+
+
+def screen_many(
+    codes_or_paths: Iterable[str | Path],
+    params: MetAromaticParams | None = None,
+    limit: int = 1,
+    workers: int = 5,
+    executor: Executor | None = None,
+) -> Iterator[tuple[str, int | SearchError | DownloadError]]:
+    """
+    Like get_pairs_many, but only count interactions and stop at limit of
+    them. Each entry yields its count, which is 0 for structures without MET
+    or aromatic residues, or its error.
+    """
+
+    params = params or get_params()
+    query = partial(_screen, params=params, limit=limit)
+
+    return _run_many(query, codes_or_paths, workers, executor)
+
+
+def screen_pdb(
+    pdb_code: str,
+    chain: str,
+    cutoff_angle: float,
+    cutoff_distance: float,
+    model: Models,
+    limit: int = 1,
+) -> int:
+    params = get_params(
+        chain=chain,
+        cutoff_angle=cutoff_angle,
+        cutoff_distance=cutoff_distance,
+        model=model,
+    )
+
+    return _screen(pdb_code, params, limit)
+
+
+def print_interactions(fs: FeatureSpace) -> None:
+    print_interaction_rows(fs.serialize_interactions())
@@ -0,0 +1,185 @@
+from dataclasses import asdict
+from json import loads
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from os import cpu_count
+from pathlib import Path
+from re import fullmatch
+from resource import getrusage, RUSAGE_SELF
+from sqlite3 import connect
+from statistics import mean, quantiles
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+from .aliases import PdbCodes
+from .errors import SearchError
+from .get_batch import run_batch_job
+from .mirrors import DEFAULT_MIRRORS, configure_mirrors
+from .models import BatchParams, MetAromaticParams
+from .stand_in import ServerProfile, StandInServer
+from .printing import print_separator
+
+
+def find_pdb_codes(directory: Path) -> PdbCodes:
+    codes = []
+
+    for path in sorted(directory.rglob("pdb*.ent.gz")):
+        if (match := fullmatch(r"pdb(\w{4})\.ent\.gz", path.name)) is not None:
+            codes.append(match.group(1))
+
+    return codes
+
+
+def _serve(
+    directory: Path, profile: ServerProfile, seed: int | None, conn: Connection
+) -> None:
+    server = StandInServer(directory, profile, seed)
+    conn.send(server.start())
+
+    # Block until the harness asks for the server to stop, then report its stats
+    conn.recv()
+    conn.send(server.stop())
+
+
+def _load_results(bp: BatchParams) -> list[dict[str, Any]]:
+    assert bp.output is not None
+
+    if bp.sink == "jsonl":
+        return [loads(line) for line in bp.output.read_text().splitlines()]
+
+    conn = connect(bp.output)
+
+    try:
+        rows = conn.execute("SELECT document FROM results").fetchall()
+    finally:
+        conn.close()
+
+    return [loads(row[0]) for row in rows]
+
+
+def _get_latency_stats(latencies: list[float]) -> dict[str, float]:
+    if len(latencies) == 0:
+        return {"mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+
+    if len(latencies) == 1:
+        p50 = p99 = latencies[0]
+    else:
+        percentiles = quantiles(latencies, n=100, method="inclusive")
+        p50, p99 = percentiles[49], percentiles[98]
+
+    return {
+        "mean": round(mean(latencies), 6),
+        "p50": round(p50, 6),
+        "p99": round(p99, 6),
+        "max": round(max(latencies), 6),
+    }
+
+
+def _summarize(
+    results: list[dict[str, Any]], elapsed: float, cpu_time: float
+) -> dict[str, Any]:
+    # Per entry latency is the time spent in the stages of the final attempt
+    latencies = [sum(t["wall_time"] for t in r["timings"]) for r in results]
+    errors: dict[str, int] = {}
+
+    for result in results:
+        if result["error_class"] is not None:
+            errors[result["error_class"]] = errors.get(result["error_class"], 0) + 1
+
+    return {
+        "attempts": sum(r["attempts"] for r in results),
+        "cpu": {
+            "seconds": round(cpu_time, 3),
+            "cores_used": round(cpu_time / elapsed, 3),
+            "utilization": round(cpu_time / elapsed / (cpu_count() or 1), 3),
+        },
+        "elapsed": round(elapsed, 3),
+        "entries": len(results),
+        "entries_per_second": round(len(results) / elapsed, 3),
+        "errors": errors,
+        "latency": _get_latency_stats(latencies),
+    }
+
+
+def run_throughput_harness(
+    params: MetAromaticParams,
+    bp: BatchParams,
+    directory: Path,
+    profile: ServerProfile,
+    seed: int | None = None,
+) -> dict[str, Any]:
+    """
+    Run a batch job end to end against a stand-in mirror serving the entries
+    in a directory. The stand-in runs in its own process so that the CPU time
+    reported is that of the batch job alone.
+    """
+
+    if bp.sink not in ("jsonl", "sqlite"):
+        raise SearchError("The harness supports the jsonl and sqlite sinks only")
+
+    with TemporaryDirectory() as tmp:
+        if bp.path_batch_file is None:
+            codes = find_pdb_codes(directory)
+
+            if len(codes) == 0:
+                raise SearchError(f"No .ent.gz files found in {directory}")
+
+            bp = bp.model_copy(update={"path_batch_file": Path(tmp) / "codes.txt"})
+            assert bp.path_batch_file is not None
+            bp.path_batch_file.write_text("\n".join(codes) + "\n")
+
+        context = get_context("spawn")
+        conn, child_conn = context.Pipe()
+        server = context.Process(
+            target=_serve, args=(directory, profile, seed, child_conn), daemon=True
+        )
+        server.start()
+
+        try:
+            configure_mirrors([conn.recv()])
+
+            usage = getrusage(RUSAGE_SELF)
+            start = perf_counter()
+
+            run_batch_job(params=params, bp=bp)
+
+            elapsed = perf_counter() - start
+            end_usage = getrusage(RUSAGE_SELF)
+        finally:
+            conn.send("stop")
+            server_stats = conn.recv() if conn.poll(10) else {}
+            server.join(10)
+            configure_mirrors(DEFAULT_MIRRORS)
+
+    cpu_time = (end_usage.ru_utime - usage.ru_utime) + (
+        end_usage.ru_stime - usage.ru_stime
+    )
+
+    report = _summarize(_load_results(bp), elapsed, cpu_time)
+    report["profile"] = asdict(profile)
+    report["server"] = server_stats
+    report["threads"] = bp.threads
+
+    return report
+
+
+def print_report(report: dict[str, Any]) -> None:
+    latency = report["latency"]
+    cpu = report["cpu"]
+
+    print_separator()
+    print(f"Entries:            {report['entries']} ({report['attempts']} attempts)")
+    print(f"Threads:            {report['threads']}")
+    print(f"Elapsed:            {report['elapsed']} s")
+    print(f"Throughput:         {report['entries_per_second']} entries/s")
+    print(
+        f"Latency:            p50 {1000 * latency['p50']:.3f} ms, "
+        f"p99 {1000 * latency['p99']:.3f} ms, max {1000 * latency['max']:.3f} ms"
+    )
+    print(
+        f"CPU:                {cpu['seconds']} s, {cpu['cores_used']} cores "
+        f"({100 * cpu['utilization']:.1f}% of available)"
+    )
+    print(f"Errors:             {report['errors'] or 'none'}")
+    print(f"Server:             {report['server']}")
+    print_separator()
@@ -0,0 +1,298 @@
+# pylint: disable=C0415   # Disable "Import outside toplevel" - we need this for lazy imports
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from json import dumps, loads
+from pathlib import Path
+from sqlite3 import connect, Connection, OperationalError
+from time import time
+from typing import Any, Iterable, TYPE_CHECKING
+from .aliases import PdbCodes
+from .errors import SearchError
+from .models import BatchParams
+
+if TYPE_CHECKING:
+    from pymongo import collection
+
+
+@dataclass
+class Lease:
+    chunk_id: int
+    codes: PdbCodes
+
+
+@dataclass
+class QueueProgress:
+    pending: int = 0
+    leased: int = 0
+    done: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.leased + self.done
+
+    def is_finished(self) -> bool:
+        return self.pending == 0 and self.leased == 0
+
+
+class JobQueue(ABC):
+    """
+    A queue of PDB code chunks shared between any number of batch workers. A
+    worker claims a chunk by taking a lease on it and must keep renewing the lease
+    with heartbeats while processing the chunk. Chunks whose lease has expired,
+    for example because the worker holding the lease died, can be claimed again
+    by any other worker. Heartbeats, releases and completions only apply to
+    a chunk that the worker still holds the lease on.
+    """
+
+    @abstractmethod
+    def create(self, chunks: Iterable[PdbCodes], overwrite: bool) -> None:
+        pass
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease: float) -> Lease | None:
+        pass
+
+    @abstractmethod
+    def heartbeat(self, chunk_id: int, worker_id: str, lease: float) -> bool:
+        pass
+
+    @abstractmethod
+    def release(self, chunk_id: int, worker_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def complete(self, chunk_id: int, worker_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_progress(self) -> QueueProgress:
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def __str__(self) -> str:
+        return f"SQLite queue {self.path}"
+
+    def _connect(self) -> Connection:
+        # A new connection per operation keeps the queue safe to share between threads and processes
+        return connect(self.path, timeout=30.0, isolation_level=None)
+
+    def create(self, chunks: Iterable[PdbCodes], overwrite: bool) -> None:
+        conn = self._connect()
+
+        try:
+            if overwrite:
+                conn.execute("DROP TABLE IF EXISTS chunks")
+
+            try:
+                conn.execute(
+                    "CREATE TABLE chunks (id INTEGER PRIMARY KEY, codes TEXT, state TEXT, "
+                    "owner TEXT, lease_expires REAL, attempts INTEGER DEFAULT 0)"
+                )
+            except OperationalError as error:
+                raise SearchError(f"{self} exists! Cannot proceed") from error
+
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO chunks (id, codes, state) VALUES (?, ?, 'pending')",
+                ((i, dumps(chunk)) for i, chunk in enumerate(chunks)),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, lease: float) -> Lease | None:
+        conn = self._connect()
+        now = time()
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, codes FROM chunks WHERE state = 'pending' "
+                "OR (state = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE chunks SET state = 'leased', owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + lease, row[0]),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        return Lease(chunk_id=row[0], codes=loads(row[1]))
+
+    def _update_owned(self, sql: str, params: tuple[object, ...]) -> bool:
+        conn = self._connect()
+
+        try:
+            updated: bool = conn.execute(sql, params).rowcount == 1
+        finally:
+            conn.close()
+
+        return updated
+
+    def heartbeat(self, chunk_id: int, worker_id: str, lease: float) -> bool:
+        return self._update_owned(
+            "UPDATE chunks SET lease_expires = ? "
+            "WHERE id = ? AND owner = ? AND state = 'leased'",
+            (time() + lease, chunk_id, worker_id),
+        )
+
+    def release(self, chunk_id: int, worker_id: str) -> None:
+        self._update_owned(
+            "UPDATE chunks SET state = 'pending', owner = NULL, lease_expires = NULL "
+            "WHERE id = ? AND owner = ? AND state = 'leased'",
+            (chunk_id, worker_id),
+        )
+
+    def complete(self, chunk_id: int, worker_id: str) -> bool:
+        return self._update_owned(
+            "UPDATE chunks SET state = 'done' "
+            "WHERE id = ? AND owner = ? AND state = 'leased'",
+            (chunk_id, worker_id),
+        )
+
+    def get_progress(self) -> QueueProgress:
+        conn = self._connect()
+
+        try:
+            rows = conn.execute(
+                "SELECT state, lease_expires < ?, COUNT(*) FROM chunks GROUP BY 1, 2",
+                (time(),),
+            ).fetchall()
+        except OperationalError as error:
+            raise SearchError(f"{self} does not exist") from error
+        finally:
+            conn.close()
+
+        return _tally(rows)
+
+
+def _tally(rows: list[tuple[str, bool | None, int]]) -> QueueProgress:
+    progress = QueueProgress()
+
+    for state, expired, count in rows:
+        if state == "done":
+            progress.done += count
+        elif state == "leased" and not expired:
+            progress.leased += count
+        else:
+            progress.pending += count
+
+    return progress
+
+
+class MongoJobQueue(JobQueue):
+    def __init__(self, bp: BatchParams) -> None:
+        from pymongo import MongoClient
+
+        client: MongoClient[dict[str, Any]] = MongoClient(
+            host=bp.host,
+            password=bp.password,
+            port=bp.port,
+            serverSelectionTimeoutMS=1000,
+            username=bp.username,
+        )
+        self.name = f"{bp.collection}_queue"
+
+        db = client[bp.database]
+        self.coll: "collection.Collection[dict[str, Any]]" = db[self.name]
+
+    def __str__(self) -> str:
+        return f"MongoDB queue collection {self.name}"
+
+    def create(self, chunks: Iterable[PdbCodes], overwrite: bool) -> None:
+        from pymongo import errors
+
+        try:
+            if overwrite:
+                self.coll.drop()
+
+            if self.coll.estimated_document_count() > 0:
+                raise SearchError(f"{self} exists! Cannot proceed")
+
+            self.coll.insert_many(
+                {"_id": i, "codes": chunk, "state": "pending", "attempts": 0}
+                for i, chunk in enumerate(chunks)
+            )
+            self.coll.create_index([("state", 1), ("lease_expires", 1)])
+        except errors.ServerSelectionTimeoutError as error:
+            raise SearchError("Failed to connect to MongoDB") from error
+
+    def claim(self, worker_id: str, lease: float) -> Lease | None:
+        from pymongo import ReturnDocument
+
+        now = time()
+
+        doc = self.coll.find_one_and_update(
+            {
+                "$or": [
+                    {"state": "pending"},
+                    {"state": "leased", "lease_expires": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "state": "leased",
+                    "owner": worker_id,
+                    "lease_expires": now + lease,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("_id", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if doc is None:
+            return None
+
+        return Lease(chunk_id=doc["_id"], codes=doc["codes"])
+
+    def heartbeat(self, chunk_id: int, worker_id: str, lease: float) -> bool:
+        result = self.coll.update_one(
+            {"_id": chunk_id, "owner": worker_id, "state": "leased"},
+            {"$set": {"lease_expires": time() + lease}},
+        )
+        return result.modified_count == 1
+
+    def release(self, chunk_id: int, worker_id: str) -> None:
+        self.coll.update_one(
+            {"_id": chunk_id, "owner": worker_id, "state": "leased"},
+            {"$set": {"state": "pending", "owner": None, "lease_expires": None}},
+        )
+
+    def complete(self, chunk_id: int, worker_id: str) -> bool:
+        result = self.coll.update_one(
+            {"_id": chunk_id, "owner": worker_id, "state": "leased"},
+            {"$set": {"state": "done"}},
+        )
+        return result.modified_count == 1
+
+    def get_progress(self) -> QueueProgress:
+        expired = self.coll.count_documents(
+            {"state": "leased", "lease_expires": {"$lt": time()}}
+        )
+
+        return QueueProgress(
+            pending=self.coll.count_documents({"state": "pending"}) + expired,
+            leased=self.coll.count_documents({"state": "leased"}) - expired,
+            done=self.coll.count_documents({"state": "done"}),
+        )
+
+
+def get_job_queue(bp: BatchParams, queue: Path | None) -> JobQueue:
+    if queue is None:
+        return MongoJobQueue(bp)
+
+    return SQLiteJobQueue(queue)
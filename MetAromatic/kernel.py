@@ -0,0 +1,121 @@
+from typing import NamedTuple
+from numpy import (
+    arange,
+    arccos,
+    concatenate,
+    cumsum,
+    degrees,
+    diff,
+    repeat,
+    sqrt,
+    zeros,
+)
+from .aliases import BoolArray, FloatArray, IntArray
+
+
+class RaggedArray(NamedTuple):
+    # Rows of every entry stacked together. Entry i owns rows offsets[i]:offsets[i + 1]
+    values: FloatArray
+    offsets: IntArray
+
+
+class Matches(NamedTuple):
+    # Every array has one element per match, ordered by entry, then MET, then midpoint
+    entry: IntArray
+    met: IntArray
+    midpoint: IntArray
+    norm: FloatArray
+    theta: FloatArray
+    phi: FloatArray
+
+
+def stack_ragged(blocks: list[FloatArray]) -> RaggedArray:
+    offsets = zeros(len(blocks) + 1, dtype=int)
+    offsets[1:] = cumsum([len(block) for block in blocks])
+
+    return RaggedArray(
+        values=concatenate([block.reshape(-1, 3) for block in blocks]).reshape(-1, 3),
+        offsets=offsets,
+    )
+
+
+def _dot_rows(u: FloatArray, v: FloatArray) -> FloatArray:
+    # Unlike sum() or einsum(), a stacked matmul matches numpy.dot bit for bit, so
+    # results agree exactly with the per pair computation
+    dot_products: FloatArray = (u[:, None, :] @ v[:, :, None]).ravel()
+    return dot_products
+
+
+def _get_angles(
+    vector_v: FloatArray, norm_v: FloatArray, lone_pairs: FloatArray
+) -> FloatArray:
+    norm_lone_pairs = sqrt(_dot_rows(lone_pairs, lone_pairs))
+    angles: FloatArray = degrees(
+        arccos(_dot_rows(vector_v, lone_pairs) / (norm_lone_pairs * norm_v))
+    )
+    return angles
+
+
+def get_pairs(
+    met_offsets: IntArray, midpoint_offsets: IntArray
+) -> tuple[IntArray, IntArray, IntArray]:
+    # Returns the entry, MET row and midpoint row of every MET/midpoint pair within
+    # an entry, without looping over entries in Python
+    num_midpoints = diff(midpoint_offsets)
+    counts = diff(met_offsets) * num_midpoints
+
+    entry = repeat(arange(len(counts)), counts)
+    local = arange(counts.sum()) - repeat(cumsum(counts) - counts, counts)
+    width = num_midpoints[entry]
+
+    met: IntArray = met_offsets[entry] + local // width
+    midpoint: IntArray = midpoint_offsets[entry] + local % width
+
+    return entry, met, midpoint
+
+
+def apply_criteria(
+    coords_sd: RaggedArray,
+    lone_pairs: list[tuple[FloatArray, FloatArray]],
+    midpoints: RaggedArray,
+    cutoff_distance: float,
+    cutoff_angle: float,
+) -> list[Matches]:
+    """
+    Apply the distance and angular conditions to many structures in one go.
+    coords_sd and midpoints hold the SD atoms and ring midpoints of every
+    structure as ragged arrays, and lone_pairs holds vectors a and g for the
+    rows of coords_sd, once for each lone pair model. Pairs are only formed
+    within a structure. Returns the matches of each model.
+    """
+
+    entry, met, midpoint = get_pairs(coords_sd.offsets, midpoints.offsets)
+
+    vector_v = midpoints.values[midpoint] - coords_sd.values[met]
+    norm_v = sqrt(_dot_rows(vector_v, vector_v))
+
+    near: BoolArray = norm_v <= cutoff_distance
+    entry, met, midpoint = entry[near], met[near], midpoint[near]
+    vector_v, norm_v = vector_v[near], norm_v[near]
+
+    matches = []
+
+    for vector_a, vector_g in lone_pairs:
+        theta = _get_angles(vector_v, norm_v, vector_a[met])
+        phi = _get_angles(vector_v, norm_v, vector_g[met])
+
+        # Written as in the per pair test so that NaN angles are treated alike
+        hit: BoolArray = ~((theta > cutoff_angle) & (phi > cutoff_angle))
+
+        matches.append(
+            Matches(
+                entry=entry[hit],
+                met=met[hit],
+                midpoint=midpoint[hit],
+                norm=norm_v[hit],
+                theta=theta[hit],
+                phi=phi[hit],
+            )
+        )
+
+    return matches
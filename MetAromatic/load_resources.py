@@ -1,12 +1,10 @@
-from gzip import open as gz_open
+from gzip import decompress, BadGzipFile
+from mmap import mmap, ACCESS_READ
+from os import fstat
 from pathlib import Path
-from tempfile import NamedTemporaryFile, gettempdir
-from urllib.error import URLError
-from urllib.request import urlretrieve, urlcleanup
 from .aliases import RawData
-from .errors import SearchError
-
-TMPDIR = Path(gettempdir())
+from .errors import DownloadError, SearchError
+from .mirrors import get_mirror_pool
 
 
 def _is_valid_pdb_file(file_content: list[str]) -> bool:
@@ -31,8 +29,25 @@ def _is_valid_pdb_file(file_content: list[str]) -> bool:
     return False
 
 
-def load_local_pdb_file(pdb_file: Path) -> RawData:
-    contents = pdb_file.read_text().splitlines()
+def _read_local_file(pdb_file: Path, use_mmap: bool) -> str:
+    with pdb_file.open("rb") as f:
+        # Mapping a file lets the OS page it in on demand and avoids copying it into a buffer first
+        if use_mmap and fstat(f.fileno()).st_size > 0:
+            with mmap(f.fileno(), 0, access=ACCESS_READ) as buffer:
+                data = decompress(buffer) if pdb_file.suffix == ".gz" else buffer
+                return str(data, "utf-8")
+
+        data = f.read()
+
+    return str(decompress(data) if pdb_file.suffix == ".gz" else data, "utf-8")
+
+
+def load_local_pdb_file(pdb_file: Path, use_mmap: bool = False) -> RawData:
+    # Files ending in .gz, like those from the wwPDB archive, are decompressed transparently
+    try:
+        contents = _read_local_file(pdb_file, use_mmap).splitlines()
+    except (BadGzipFile, EOFError, UnicodeDecodeError) as error:
+        raise SearchError("Not a valid PDB file") from error
 
     if not _is_valid_pdb_file(contents):
         raise SearchError("Not a valid PDB file")
@@ -40,25 +55,24 @@ def load_local_pdb_file(pdb_file: Path) -> RawData:
     return contents
 
 
-def _get_ftp_url(pdb_code: str) -> str:
-    ent_gz = f"pdb{pdb_code}.ent.gz"
+def fetch_pdb_file(pdb_code: str) -> bytes:
+    return get_mirror_pool().fetch(pdb_code.lower())
 
-    return f"ftp://ftp.wwpdb.org/pub/pdb/data/structures/divided/pdb/{pdb_code[1:3]}/{ent_gz}"
 
+async def async_fetch_pdb_file(pdb_code: str) -> bytes:
+    return await get_mirror_pool().fetch_async(pdb_code.lower())
 
-def load_pdb_file_from_rscb(pdb_code: str) -> RawData:
-    ftp_url = _get_ftp_url(pdb_code.lower())
 
-    raw_data: RawData = []
-    with NamedTemporaryFile(dir=TMPDIR) as f:
-        try:
-            urlcleanup()
-            urlretrieve(ftp_url, f.name)
-        except URLError as error:
-            raise SearchError(f"Invalid PDB entry '{pdb_code}'") from error
+def decompress_pdb_file(data: bytes | memoryview, pdb_code: str) -> RawData:
+    try:
+        contents = decompress(data).decode()
+    except (BadGzipFile, EOFError) as error:
+        raise DownloadError(
+            f"Truncated or corrupt download for '{pdb_code}'"
+        ) from error
 
-        with gz_open(f.name, "rt") as gz:
-            for line in gz:
-                raw_data.append(line)
+    return contents.splitlines(keepends=True)
 
-    return raw_data
+
+def load_pdb_file_from_rscb(pdb_code: str) -> RawData:
+    return decompress_pdb_file(fetch_pdb_file(pdb_code), pdb_code)
@@ -0,0 +1,279 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Any, Iterator, TypeAlias
+from .aliases import ErrorClass
+
+STAGES = ("fetch", "admit", "read", "decompress", "parse", "compute", "write")
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(BUCKETS)
+
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                index = i
+                break
+
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def get_quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th observation, as Prometheus would estimate it
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+
+            if cumulative >= rank:
+                return bound
+
+        return self.max
+
+    def get_cumulative_counts(self) -> list[tuple[str, int]]:
+        cumulative = 0
+        counts = []
+
+        for bound, count in zip([*map(str, BUCKETS), "+Inf"], self.counts):
+            cumulative += count
+            counts.append((bound, cumulative))
+
+        return counts
+
+
+class BatchMetrics:
+    """
+    Live throughput and latency statistics for a running batch job. All methods
+    are safe to call from worker threads.
+    """
+
+    def __init__(self, total: int = 0) -> None:
+        self.lock = Lock()
+        self.start_time = monotonic()
+
+        self.total = total
+        self.processed = 0
+        self.in_flight = 0
+        self.errors: dict[ErrorClass, int] = {}
+        self.stages = {stage: Histogram() for stage in STAGES}
+
+    def add_total(self, num_entries: int) -> None:
+        with self.lock:
+            self.total += num_entries
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        start = monotonic()
+
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, monotonic() - start)
+
+    def observe_stage(self, stage: str, elapsed: float) -> None:
+        with self.lock:
+            self.stages[stage].observe(elapsed)
+
+    def start_entry(self) -> None:
+        with self.lock:
+            self.in_flight += 1
+
+    def finish_entry(self, error_class: ErrorClass | None) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            self.processed += 1
+
+            if error_class is not None:
+                self.errors[error_class] = self.errors.get(error_class, 0) + 1
+
+    def get_snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            elapsed = monotonic() - self.start_time
+            rate = self.processed / elapsed if elapsed > 0 else 0.0
+            queue_depth = max(0, self.total - self.processed - self.in_flight)
+            remaining = queue_depth + self.in_flight
+
+            return {
+                "elapsed": round(elapsed, 3),
+                "entries_per_second": round(rate, 3),
+                "errors": dict(self.errors),
+                "eta": round(remaining / rate, 3) if rate > 0 else None,
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "queue_depth": queue_depth,
+                "stages": {
+                    stage: {
+                        "count": h.count,
+                        "mean": round(h.sum / h.count, 6) if h.count > 0 else 0.0,
+                        "p50": h.get_quantile(0.5),
+                        "p99": h.get_quantile(0.99),
+                        "sum": round(h.sum, 6),
+                    }
+                    for stage, h in self.stages.items()
+                },
+                "total": self.total,
+            }
+
+    def to_prometheus(self) -> str:
+        snapshot = self.get_snapshot()
+        lines = []
+
+        def add(name: str, kind: str, doc: str, samples: list[tuple[str, Any]]) -> None:
+            lines.append(f"# HELP metaromatic_{name} {doc}")
+            lines.append(f"# TYPE metaromatic_{name} {kind}")
+
+            for labels, value in samples:
+                lines.append(f"metaromatic_{name}{labels} {value}")
+
+        add(
+            "entries_total",
+            "gauge",
+            "Number of entries scheduled.",
+            [("", snapshot["total"])],
+        )
+        add(
+            "entries_processed_total",
+            "counter",
+            "Number of entries processed.",
+            [("", snapshot["processed"])],
+        )
+        add(
+            "entries_per_second",
+            "gauge",
+            "Mean throughput since the batch started.",
+            [("", snapshot["entries_per_second"])],
+        )
+        add(
+            "in_flight",
+            "gauge",
+            "Entries currently being processed.",
+            [("", snapshot["in_flight"])],
+        )
+        add(
+            "queue_depth",
+            "gauge",
+            "Entries waiting to be processed.",
+            [("", snapshot["queue_depth"])],
+        )
+        add(
+            "eta_seconds",
+            "gauge",
+            "Estimated time until the batch completes.",
+            [("", "NaN" if snapshot["eta"] is None else snapshot["eta"])],
+        )
+        add(
+            "errors_total",
+            "counter",
+            "Number of failed entries by error class.",
+            [
+                (f'{{error_class="{k}"}}', v)
+                for k, v in sorted(snapshot["errors"].items())
+            ],
+        )
+
+        samples: list[tuple[str, Any]] = []
+
+        with self.lock:
+            for stage, h in self.stages.items():
+                for bound, count in h.get_cumulative_counts():
+                    samples.append((f'_bucket{{stage="{stage}",le="{bound}"}}', count))
+
+                samples.append((f'_sum{{stage="{stage}"}}', round(h.sum, 6)))
+                samples.append((f'_count{{stage="{stage}"}}', h.count))
+
+        add("stage_seconds", "histogram", "Latency of each pipeline stage.", samples)
+
+        return "\n".join(lines) + "\n"
+
+
+class StageRecorder:
+    """
+    Records stage latencies where the metrics of a job are out of reach, such
+    as in a compute process, so that the job can observe them afterwards.
+    """
+
+    def __init__(self) -> None:
+        self.observations: list[tuple[str, float]] = []
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        start = monotonic()
+
+        try:
+            yield
+        finally:
+            self.observations.append((stage, monotonic() - start))
+
+    def replay(self, metrics: BatchMetrics) -> None:
+        for stage, elapsed in self.observations:
+            metrics.observe_stage(stage, elapsed)
+
+
+StageMetrics: TypeAlias = BatchMetrics | StageRecorder
+
+
+def start_metrics_server(metrics: BatchMetrics, port: int) -> ThreadingHTTPServer:
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+
+            body = metrics.to_prometheus().encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    Thread(target=server.serve_forever, daemon=True, name="Metrics").start()
+    return server
+
+
+class SnapshotWriter:
+    def __init__(self, metrics: BatchMetrics, path: Path, interval: float) -> None:
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = Event()
+        self.thread = Thread(target=self._run, daemon=True, name="Metrics")
+
+    def _write(self) -> None:
+        # Write then rename so that readers never see a partially written snapshot
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(dumps(self.metrics.get_snapshot(), indent=4))
+        tmp.replace(self.path)
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self._write()
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+        self._write()
@@ -0,0 +1,373 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from ftplib import error_perm
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, NoReturn
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+from .aio_http import get_http_pool
+from .errors import DownloadError, SearchError
+
+# HTTPS comes first so that async downloads share connections. FTP is a fallback
+DEFAULT_MIRRORS = (
+    "https://files.wwpdb.org/pub/pdb/data/structures/divided/pdb",
+    "ftp://ftp.wwpdb.org/pub/pdb/data/structures/divided/pdb",
+)
+
+
+class _MissingEntry(Exception):
+    pass
+
+
+def get_entry_url(base_url: str, pdb_code: str) -> str:
+    ent_gz = f"pdb{pdb_code}.ent.gz"
+
+    return f"{base_url.rstrip('/')}/{pdb_code[1:3]}/{ent_gz}"
+
+
+def _is_missing_entry(error: URLError) -> bool:
+    if isinstance(error, HTTPError):
+        return error.code in (404, 410)
+
+    # urllib wraps ftplib errors, sometimes twice, so the FTP reply is only a cause.
+    # Other permanent replies, such as a 530 login failure, say nothing of the entry
+    cause = error.__cause__
+
+    while cause is not None and not isinstance(cause, error_perm):
+        cause = cause.__cause__
+
+    if cause is None:
+        return False
+
+    reply = str(cause)
+    return reply.startswith("550") and "no such file" in reply.lower()
+
+
+def _raise_fetch_error(
+    pdb_code: str, errors: list[Exception], missing: list[_MissingEntry]
+) -> NoReturn:
+    # Only an entry that every mirror tried reports as missing is invalid
+    if len(errors) == 0 and len(missing) > 0:
+        raise SearchError(f"Invalid PDB entry '{pdb_code}'") from missing[-1]
+
+    raise DownloadError(
+        f"All mirrors failed for '{pdb_code}': " + "; ".join(str(e) for e in errors)
+    )
+
+
+def _get_percentile(samples: list[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    index = round((percentile / 100) * (len(ordered) - 1))
+
+    return ordered[index]
+
+
+@dataclass
+class MirrorHealth:
+    base_url: str
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    num_requests: int = 0
+    num_failures: int = 0
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self, now: float, threshold: int, cooldown: float) -> None:
+        self.num_failures += 1
+        self.consecutive_failures += 1
+
+        if self.consecutive_failures >= threshold:
+            self.open_until = now + cooldown
+
+
+class MirrorPool:
+    """
+    Download PDB entries from an ordered list of mirrors. A request that is still
+    running once the primary mirror's latency percentile has elapsed is hedged by
+    issuing the same request to the next available mirror, and whichever response
+    arrives first wins. Mirrors that fail repeatedly are taken out of rotation
+    (circuit broken) for a cooldown period.
+    """
+
+    def __init__(
+        self,
+        base_urls: tuple[str, ...] | list[str] = DEFAULT_MIRRORS,
+        hedge_percentile: float = 95.0,
+        hedge_delay: float = 2.0,
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        timeout: float = 30.0,
+        min_samples: int = 10,
+    ) -> None:
+        if len(base_urls) == 0:
+            raise SearchError("At least one mirror must be provided")
+
+        self.mirrors = [MirrorHealth(base_url=url) for url in base_urls]
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.min_samples = min_samples
+
+        self.lock = Lock()
+
+    def get_hedge_delay(self, mirror: MirrorHealth) -> float:
+        with self.lock:
+            samples = list(mirror.latencies)
+
+        if len(samples) < self.min_samples:
+            return self.hedge_delay
+
+        return _get_percentile(samples, self.hedge_percentile)
+
+    def _get_candidates(self) -> list[MirrorHealth]:
+        now = monotonic()
+
+        with self.lock:
+            candidates = [m for m in self.mirrors if m.is_available(now)]
+
+        # Every mirror is circuit broken - probe all of them rather than fail outright
+        if len(candidates) == 0:
+            return list(self.mirrors)
+
+        return candidates
+
+    def _fetch_from_mirror(self, mirror: MirrorHealth, pdb_code: str) -> bytes:
+        url = get_entry_url(mirror.base_url, pdb_code)
+        start = monotonic()
+
+        with self.lock:
+            mirror.num_requests += 1
+
+        try:
+            with urlopen(url, timeout=self.timeout) as response:
+                data: bytes = response.read()
+        except URLError as error:
+            if _is_missing_entry(error):
+                with self.lock:
+                    mirror.record_success(monotonic() - start)
+                raise _MissingEntry(url) from error
+
+            with self.lock:
+                mirror.record_failure(
+                    monotonic(), self.failure_threshold, self.cooldown
+                )
+            raise DownloadError(f"Failed to download {url}: {error.reason}") from error
+        except OSError as error:
+            with self.lock:
+                mirror.record_failure(
+                    monotonic(), self.failure_threshold, self.cooldown
+                )
+            raise DownloadError(f"Failed to download {url}: {error}") from error
+
+        with self.lock:
+            mirror.record_success(monotonic() - start)
+
+        return data
+
+    def _start_attempt(self, mirror: MirrorHealth, pdb_code: str) -> Future[bytes]:
+        # Each attempt gets its own thread rather than a slot in a shared pool, so
+        # attempts never queue behind other callers' downloads. Thread.start returns
+        # once the thread runs, so the request has started when this returns
+        future: Future[bytes] = Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+
+            try:
+                future.set_result(self._fetch_from_mirror(mirror, pdb_code))
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                future.set_exception(error)
+
+        Thread(target=run, name="Mirror", daemon=True).start()
+        return future
+
+    def fetch(self, pdb_code: str) -> bytes:
+        candidates = self._get_candidates()
+        pending: set[Future[bytes]] = set()
+        errors: list[Exception] = []
+        missing: list[_MissingEntry] = []
+
+        def submit_next() -> MirrorHealth | None:
+            if len(candidates) == 0:
+                return None
+
+            mirror = candidates.pop(0)
+            pending.add(self._start_attempt(mirror, pdb_code))
+            return mirror
+
+        primary = submit_next()
+        assert primary is not None
+
+        # The hedge clock starts with the primary request, which is already running
+        delay = self.get_hedge_delay(primary)
+
+        while len(pending) > 0:
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+
+            if len(done) == 0:
+                # Tail latency exceeded - hedge the request on the next mirror
+                submit_next()
+                continue
+
+            for future in done:
+                pending.discard(future)
+
+                try:
+                    return future.result()
+                except _MissingEntry as error:
+                    # A stale or partial mirror may lack an entry that the others have
+                    missing.append(error)
+                except DownloadError as error:
+                    errors.append(error)
+
+            if len(pending) == 0:
+                submit_next()
+
+        _raise_fetch_error(pdb_code, errors, missing)
+
+    async def _fetch_from_mirror_async(
+        self, mirror: MirrorHealth, pdb_code: str
+    ) -> bytes:
+        url = get_entry_url(mirror.base_url, pdb_code)
+
+        # There is no asyncio FTP client, so other schemes block a thread of their own
+        if not url.startswith(("http://", "https://")):
+            return await asyncio.wrap_future(self._start_attempt(mirror, pdb_code))
+
+        start = monotonic()
+
+        with self.lock:
+            mirror.num_requests += 1
+
+        try:
+            status, data = await get_http_pool().get(url, self.timeout)
+        except (OSError, EOFError, ValueError) as error:
+            with self.lock:
+                mirror.record_failure(
+                    monotonic(), self.failure_threshold, self.cooldown
+                )
+            raise DownloadError(
+                f"Failed to download {url}: {error or type(error).__name__}"
+            ) from error
+
+        with self.lock:
+            if status in (200, 404, 410):
+                mirror.record_success(monotonic() - start)
+            else:
+                mirror.record_failure(
+                    monotonic(), self.failure_threshold, self.cooldown
+                )
+
+        if status in (404, 410):
+            raise _MissingEntry(url)
+
+        if status != 200:
+            raise DownloadError(f"Failed to download {url}: HTTP Error {status}")
+
+        return data
+
+    async def fetch_async(self, pdb_code: str) -> bytes:
+        """
+        Like fetch, but without blocking the event loop. HTTP mirrors are read
+        over connections shared by all downloads on the loop, and hedged
+        requests that lose the race are cancelled.
+        """
+
+        candidates = self._get_candidates()
+        pending: set[asyncio.Task[bytes]] = set()
+        errors: list[Exception] = []
+        missing: list[_MissingEntry] = []
+
+        def submit_next() -> MirrorHealth | None:
+            if len(candidates) == 0:
+                return None
+
+            mirror = candidates.pop(0)
+            pending.add(
+                asyncio.create_task(self._fetch_from_mirror_async(mirror, pdb_code))
+            )
+            return mirror
+
+        primary = submit_next()
+        assert primary is not None
+        delay = self.get_hedge_delay(primary)
+
+        try:
+            while len(pending) > 0:
+                done, _ = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if len(done) == 0:
+                    submit_next()
+                    continue
+
+                for task in done:
+                    pending.discard(task)
+
+                    try:
+                        return task.result()
+                    except _MissingEntry as error:
+                        missing.append(error)
+                    except DownloadError as error:
+                        errors.append(error)
+
+                if len(pending) == 0:
+                    submit_next()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        _raise_fetch_error(pdb_code, errors, missing)
+
+    def get_health(self) -> list[dict[str, float | int | str]]:
+        now = monotonic()
+        health: list[dict[str, float | int | str]] = []
+
+        with self.lock:
+            for mirror in self.mirrors:
+                health.append(
+                    {
+                        "base_url": mirror.base_url,
+                        "available": int(mirror.is_available(now)),
+                        "consecutive_failures": mirror.consecutive_failures,
+                        "num_failures": mirror.num_failures,
+                        "num_requests": mirror.num_requests,
+                    }
+                )
+
+        return health
+
+
+_POOL: MirrorPool | None = None
+_POOL_LOCK = Lock()
+
+
+def configure_mirrors(base_urls: tuple[str, ...] | list[str], **kwargs: Any) -> None:
+    global _POOL  # pylint: disable=global-statement
+
+    with _POOL_LOCK:
+        _POOL = MirrorPool(base_urls, **kwargs)
+
+
+def get_mirror_pool() -> MirrorPool:
+    global _POOL  # pylint: disable=global-statement
+
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = MirrorPool()
+
+        return _POOL
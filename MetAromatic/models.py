@@ -1,10 +1,19 @@
 from dataclasses import dataclass, field
 from pathlib import Path
 from sys import stderr
-from typing import TypedDict
+from tomllib import TOMLDecodeError, load as load_toml
+from typing import NotRequired, TypedDict
 from typing_extensions import Annotated
 from pydantic import BaseModel, Field, ValidationError
-from .aliases import Midpoints, Coordinates, Models, FloatArray
+from .aliases import (
+    Midpoints,
+    Coordinates,
+    Models,
+    FloatArray,
+    ErrorClass,
+    Sinks,
+    TopKPer,
+)
 from .errors import SearchError
 
 
@@ -17,11 +26,25 @@ class DictInteractions(TypedDict):
     norm: float
 
 
+class DictModelDifferences(TypedDict):
+    cp_only: list[DictInteractions]
+    rm_only: list[DictInteractions]
+
+
+class DictStageTiming(TypedDict):
+    count: int
+    cpu_time: float
+    stage: str
+    wall_time: float
+
+
 class MetAromaticParams(BaseModel):
     chain: str
     cutoff_angle: Annotated[float, Field(strict=True, gt=0, le=360)]
     cutoff_distance: Annotated[float, Field(strict=True, gt=0)]
     model: Models
+    top_k: Annotated[int, Field(strict=True, gt=0)] | None = None
+    top_k_per: TopKPer = "met"
 
 
 def _unpack_validation_errors(exception: ValidationError) -> str:
@@ -40,6 +63,8 @@ def get_params(
     cutoff_angle: float = 109.5,
     cutoff_distance: float = 4.9,
     model: Models = "cp",
+    top_k: int | None = None,
+    top_k_per: TopKPer = "met",
 ) -> MetAromaticParams:
     try:
         params = MetAromaticParams(
@@ -47,6 +72,8 @@ def get_params(
             cutoff_angle=cutoff_angle,
             cutoff_distance=cutoff_distance,
             model=model,
+            top_k=top_k,
+            top_k_per=top_k_per,
         )
     except ValidationError as error:
         raise SearchError(_unpack_validation_errors(error)) from error
@@ -54,16 +81,97 @@ def get_params(
     return params
 
 
+def load_param_sets(
+    path: Path, defaults: MetAromaticParams
+) -> dict[str, MetAromaticParams]:
+    """
+    Load named parameter sets from the tables of a TOML file, for example:
+
+        [strict]
+        cutoff_distance = 4.9
+        cutoff_angle = 109.5
+
+        [loose]
+        cutoff_distance = 6.0
+        cutoff_angle = 360.0
+
+    Parameters missing from a table are taken from defaults.
+    """
+
+    try:
+        with path.open("rb") as f:
+            tables = load_toml(f)
+    except (OSError, TOMLDecodeError) as error:
+        raise SearchError(f"Could not load {path}: {error}") from error
+
+    if len(tables) == 0:
+        raise SearchError(f"No parameter sets in {path}")
+
+    param_sets = {}
+
+    for name, table in tables.items():
+        if not isinstance(table, dict):
+            raise SearchError(f"Parameter set '{name}' is not a table")
+
+        for key in table:
+            if key not in MetAromaticParams.model_fields:
+                raise SearchError(
+                    f"Unknown parameter '{key}' in parameter set '{name}'"
+                )
+
+        try:
+            param_sets[name] = MetAromaticParams(**{**defaults.model_dump(), **table})
+        except ValidationError as error:
+            raise SearchError(f"{name}: {_unpack_validation_errors(error)}") from error
+
+    return param_sets
+
+
 class BatchParams(BaseModel):
+    backoff: float = 1.0
+    bridges: int | None = None
     collection: str
+    compute_processes: int | None = None
+    config: Path | None = None
     database: str
     host: str
+    memory_budget: int | None = None
+    metrics_file: Path | None = None
+    metrics_interval: float = 10.0
+    metrics_port: int | None = None
+    output: Path | None = None
     overwrite: bool
-    password: str
-    path_batch_file: Path
+    password: str | None
+    path_batch_file: Path | None
     port: int
+    remove_inverse: bool = False
+    retries: int = 3
+    retry_failed: bool = False
+    screen: int | None = None
+    sink: Sinks = "mongo"
     threads: int
-    username: str
+    username: str | None
+
+
+class QueueParams(BaseModel):
+    chunk_size: int = 100
+    lease: float = 300.0
+    path: Path | None
+    poll_interval: float = 5.0
+    worker_id: str
+
+
+class SyntheticParams(BaseModel):
+    chains: Annotated[int, Field(ge=1, le=62)] = 1
+    density: Annotated[float, Field(gt=0)] = 7.5
+    filler: Annotated[int, Field(ge=0)] = 0
+    met: Annotated[int, Field(ge=1)] = 10
+    models: Annotated[int, Field(ge=1)] = 1
+    phe: Annotated[int, Field(ge=0)] = 10
+    seed: int = 0
+    trp: Annotated[int, Field(ge=0)] = 5
+    tyr: Annotated[int, Field(ge=0)] = 5
+    waters: Annotated[int, Field(ge=1)] = 10
 
 
 @dataclass
@@ -95,6 +203,22 @@ class Interactions:
         )
 
 
+@dataclass
+class StageTiming:
+    stage: str
+    count: int = 0
+    cpu_time: float = 0.0
+    wall_time: float = 0.0
+
+    def to_dict(self) -> DictStageTiming:
+        return DictStageTiming(
+            count=self.count,
+            cpu_time=round(self.cpu_time, 6),
+            stage=self.stage,
+            wall_time=round(self.wall_time, 6),
+        )
+
+
 @dataclass
 class FeatureSpace:
     first_model: list[str] = field(default_factory=list)
@@ -102,15 +226,50 @@ class FeatureSpace:
     coords_phe: Coordinates = field(default_factory=list)
     coords_tyr: Coordinates = field(default_factory=list)
     coords_trp: Coordinates = field(default_factory=list)
+    nearby_met: Coordinates = field(default_factory=list)
+    nearby_phe: Coordinates = field(default_factory=list)
+    nearby_tyr: Coordinates = field(default_factory=list)
+    nearby_trp: Coordinates = field(default_factory=list)
     lone_pairs_met: list[LonePairs] = field(default_factory=list)
+    lone_pairs_met_rm: list[LonePairs] = field(default_factory=list)
     midpoints_phe: Midpoints = field(default_factory=list)
     midpoints_tyr: Midpoints = field(default_factory=list)
     midpoints_trp: Midpoints = field(default_factory=list)
     interactions: list[Interactions] = field(default_factory=list)
+    interactions_rm: list[Interactions] = field(default_factory=list)
+    timings: list[StageTiming] = field(default_factory=list)
 
     def serialize_interactions(self) -> list[DictInteractions]:
         return [i.to_dict() for i in self.interactions]
 
+    def serialize_interactions_rm(self) -> list[DictInteractions]:
+        return [i.to_dict() for i in self.interactions_rm]
+
+    def get_model_differences(self) -> DictModelDifferences:
+        # With model "both", interactions holds the cp results. Both models share
+        # midpoints and distances, so interactions are matched on residues and norm
+        def get_key(row: DictInteractions) -> tuple[str, int, int, float]:
+            return (
+                row["aromatic_residue"],
+                row["aromatic_position"],
+                row["methionine_position"],
+                row["norm"],
+            )
+
+        rows_cp = self.serialize_interactions()
+        rows_rm = self.serialize_interactions_rm()
+
+        keys_cp = set(map(get_key, rows_cp))
+        keys_rm = set(map(get_key, rows_rm))
+
+        return DictModelDifferences(
+            cp_only=[row for row in rows_cp if get_key(row) not in keys_rm],
+            rm_only=[row for row in rows_rm if get_key(row) not in keys_cp],
+        )
+
+    def serialize_timings(self) -> list[DictStageTiming]:
+        return [t.to_dict() for t in self.timings]
+
 
 @dataclass
 class BridgeSpace:
@@ -118,7 +277,29 @@ class BridgeSpace:
     bridges: list[set[str]] = field(default_factory=list)
 
 
+class ConfigResult(TypedDict):
+    bridges: NotRequired[list[list[str]] | None]
+    error_class: ErrorClass | None
+    errmsg: str | None
+    hits: NotRequired[int | None]
+    interactions: list[DictInteractions] | None
+    interactions_rm: NotRequired[list[DictInteractions] | None]
+    model_differences: NotRequired[DictModelDifferences | None]
+    timings: list[DictStageTiming]
+
+
 class BatchResult(TypedDict):
     _id: str
+    attempts: int
+    bridges: NotRequired[list[list[str]] | None]
+    configs: NotRequired[dict[str, ConfigResult] | None]
+    error_class: ErrorClass | None
     errmsg: str | None
+    hits: NotRequired[int | None]
     interactions: list[DictInteractions] | None
+    interactions_rm: NotRequired[list[DictInteractions] | None]
+    memory_estimate: NotRequired[int | None]
+    model_differences: NotRequired[DictModelDifferences | None]
+    peak_memory: NotRequired[int | None]
+    retryable: bool
+    timings: list[DictStageTiming]
@@ -0,0 +1,217 @@
+from typing import Iterator
+from .algorithm import MetAromatic
+from .aliases import RawData, Models
+from .errors import SearchError
+from .get_bridge import get_graph
+from .load_resources import load_pdb_file_from_rscb
+from .models import FeatureSpace, get_params
+
+AROMATICS = ("PHE", "TYR", "TRP")
+RESIDUE_TYPES = ("MET", "ARO", *AROMATICS)
+
+
+def _parse_pattern(pattern: str | None, vertices: int) -> tuple[str, ...] | None:
+    if vertices < 2:
+        raise SearchError("vertices: Input should be greater than or equal to 2")
+
+    if pattern is None:
+        return None
+
+    types = tuple(t.strip().upper() for t in pattern.split("-"))
+
+    for residue_type in types:
+        if residue_type not in RESIDUE_TYPES:
+            raise SearchError(
+                f"Invalid residue type '{residue_type}' in pattern. "
+                f"Expected one of {', '.join(RESIDUE_TYPES)}"
+            )
+
+    if len(types) != vertices:
+        raise SearchError(
+            f"Pattern {pattern} has {len(types)} residues, not {vertices} vertices"
+        )
+
+    return types
+
+
+def _matches(residue_type: str, pattern_type: str) -> bool:
+    if pattern_type == "ARO":
+        return residue_type in AROMATICS
+
+    return residue_type == pattern_type
+
+
+def _is_feasible(counts: dict[str, int], budget: dict[str, int]) -> bool:
+    # Aromatic residues beyond those named in the pattern must fit into its ARO wildcards
+    if counts.get("MET", 0) > budget.get("MET", 0):
+        return False
+
+    excess = sum(max(0, counts.get(t, 0) - budget.get(t, 0)) for t in AROMATICS)
+    return excess <= budget.get("ARO", 0)
+
+
+class _MotifGraph:
+    """
+    The Met-aromatic graph of a feature space with integer labelled vertices.
+    MET vertices only ever neighbour aromatic vertices and vice versa.
+    """
+
+    def __init__(self, fs: FeatureSpace) -> None:
+        self.names, edges = get_graph(fs)
+        self.types = [name[:3] for name in self.names]
+        self.neighbours: list[set[int]] = [set() for _ in self.names]
+
+        for u, v in edges:
+            self.neighbours[u].add(v)
+            self.neighbours[v].add(u)
+
+    def iter_subgraphs(
+        self, vertices: int, pattern: tuple[str, ...] | None
+    ) -> Iterator[list[int]]:
+        # ESU (Wernicke, 2006): every connected vertex set is reached from its lowest vertex only,
+        # by extending with exclusive neighbours, so each one is produced exactly once
+        budget: dict[str, int] = {}
+
+        for residue_type in pattern or ():
+            budget[residue_type] = budget.get(residue_type, 0) + 1
+
+        def extend(
+            subgraph: list[int],
+            extension: set[int],
+            reached: set[int],
+            counts: dict[str, int],
+            root: int,
+        ) -> Iterator[list[int]]:
+            if len(subgraph) == vertices:
+                yield sorted(subgraph)
+                return
+
+            extension = set(extension)
+
+            while len(extension) > 0:
+                w = extension.pop()
+                counts[self.types[w]] = counts.get(self.types[w], 0) + 1
+
+                if pattern is None or _is_feasible(counts, budget):
+                    exclusive = {
+                        u for u in self.neighbours[w] if u > root and u not in reached
+                    }
+                    subgraph.append(w)
+
+                    yield from extend(
+                        subgraph,
+                        extension | exclusive,
+                        reached | exclusive,
+                        counts,
+                        root,
+                    )
+                    subgraph.pop()
+
+                counts[self.types[w]] -= 1
+
+        for root in range(len(self.names)):
+            counts = {self.types[root]: 1}
+
+            if pattern is not None and not _is_feasible(counts, budget):
+                continue
+
+            extension = {u for u in self.neighbours[root] if u > root}
+            yield from extend(
+                [root],
+                extension,
+                extension | {root} | self.neighbours[root],
+                counts,
+                root,
+            )
+
+    def iter_paths(
+        self, vertices: int, pattern: tuple[str, ...] | None
+    ) -> Iterator[list[int]]:
+        # A path is produced once, from whichever end has the lower label. Partial paths
+        # are dropped as soon as they match the pattern in neither direction
+        def matches(path: list[int], types: tuple[str, ...] | None) -> bool:
+            return types is None or _matches(self.types[path[-1]], types[len(path) - 1])
+
+        reverse = None if pattern is None else pattern[::-1]
+
+        def extend(
+            path: list[int], forward: bool, backward: bool
+        ) -> Iterator[list[int]]:
+            if len(path) == vertices:
+                if path[0] < path[-1]:
+                    yield list(path) if forward else path[::-1]
+
+                return
+
+            for u in sorted(self.neighbours[path[-1]]):
+                if u in path:
+                    continue
+
+                path.append(u)
+                is_forward = forward and matches(path, pattern)
+                is_backward = backward and matches(path, reverse)
+
+                if is_forward or is_backward:
+                    yield from extend(path, is_forward, is_backward)
+
+                path.pop()
+
+        for start in range(len(self.names)):
+            path = [start]
+            forward, backward = matches(path, pattern), matches(path, reverse)
+
+            if forward or backward:
+                yield from extend(path, forward, backward)
+
+
+def iter_motifs(
+    fs: FeatureSpace,
+    vertices: int,
+    pattern: str | None = None,
+    paths: bool = False,
+) -> Iterator[list[str]]:
+    """
+    Lazily enumerate the connected motifs of the Met-aromatic graph with a
+    given number of vertices. Unlike bridges, motifs need not be a whole
+    connected component, so every motif inside a larger cluster is found.
+    With paths=True only simple paths are enumerated, in path order. A
+    pattern such as "ARO-MET-ARO-MET" restricts the residue types of the
+    motif (in order for paths) and prunes the search early. ARO matches
+    any of PHE, TYR and TRP.
+    """
+
+    types = _parse_pattern(pattern, vertices)
+    graph = _MotifGraph(fs)
+
+    if paths:
+        motifs = graph.iter_paths(vertices, types)
+    else:
+        motifs = graph.iter_subgraphs(vertices, types)
+
+    return ([graph.names[node] for node in motif] for motif in motifs)
+
+
+def get_motifs(
+    chain: str,
+    code: str,
+    cutoff_angle: float,
+    cutoff_distance: float,
+    model: Models,
+    vertices: int,
+    pattern: str | None = None,
+    paths: bool = False,
+) -> Iterator[list[str]]:
+    params = get_params(
+        chain=chain,
+        cutoff_angle=cutoff_angle,
+        cutoff_distance=cutoff_distance,
+        model=model,
+    )
+
+    # Validate the pattern before downloading anything
+    _parse_pattern(pattern, vertices)
+
+    raw_data: RawData = load_pdb_file_from_rscb(code)
+    fs: FeatureSpace = MetAromatic(params=params, raw_data=raw_data).get_interactions()
+
+    return iter_motifs(fs, vertices, pattern, paths)
@@ -0,0 +1,85 @@
+# Kept free of NumPy and pydantic so that the thin client can print server responses quickly
+from __future__ import annotations
+from functools import cache
+from os import get_terminal_size
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .models import DictInteractions, DictModelDifferences
+
+
+@cache
+def _get_separator() -> str:
+    try:
+        separator = get_terminal_size()[0] * "-"
+    except OSError:
+        separator = 25 * "-"
+
+    return separator
+
+
+def print_separator() -> None:
+    print(_get_separator())
+
+
+def print_interaction_rows(rows: Iterable[DictInteractions]) -> None:
+    print_separator()
+
+    print("ARO        POS        MET POS    NORM       MET-THETA  MET-PHI")
+    print_separator()
+
+    for row in rows:
+        print(
+            f"{row['aromatic_residue']:<10} "
+            f"{row['aromatic_position']:<10} "
+            f"{row['methionine_position']:<10} "
+            f"{row['norm']:<10} "
+            f"{row['met_theta_angle']:<10} "
+            f"{row['met_phi_angle']:<10}"
+        )
+
+    print_separator()
+
+
+def print_model_comparison(
+    rows_cp: Iterable[DictInteractions],
+    rows_rm: Iterable[DictInteractions],
+    differences: DictModelDifferences,
+) -> None:
+    for label, rows in (
+        ("Found by cp", rows_cp),
+        ("Found by rm", rows_rm),
+        ("Only found by cp", differences["cp_only"]),
+        ("Only found by rm", differences["rm_only"]),
+    ):
+        print(label)
+        print_interaction_rows(rows)
+
+
+def print_bridge_list(bridges: Iterable[Iterable[str]]) -> None:
+    print_separator()
+
+    bridges = list(bridges)
+
+    if len(bridges) > 0:
+        for bridge in bridges:
+            print("{" + "}-{".join(bridge) + "}")
+    else:
+        print("Found 0 bridges")
+
+    print_separator()
+
+
+def print_motifs(motifs: Iterable[Iterable[str]]) -> None:
+    # Motifs are printed as they are found rather than collected first
+    print_separator()
+
+    num_motifs = 0
+
+    for num_motifs, motif in enumerate(motifs, start=1):
+        print("{" + "}-{".join(motif) + "}")
+
+    if num_motifs == 0:
+        print("Found 0 motifs")
+
+    print_separator()
@@ -0,0 +1,153 @@
+import sys
+from cProfile import Profile
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from pstats import Stats
+from threading import Lock, local, setprofile
+from time import perf_counter, thread_time
+from types import FrameType
+from typing import Any, Callable, Iterator, TypeAlias
+from .models import StageTiming
+
+StageHook: TypeAlias = Callable[[StageTiming], None]
+
+PARSE_STAGES = (
+    "first_model",
+    "met_coordinates",
+    "phe_coordinates",
+    "tyr_coordinates",
+    "trp_coordinates",
+)
+COMPUTE_STAGES = ("prefilter", "lone_pairs", "midpoints", "criteria")
+
+
+@contextmanager
+def record_stage(
+    stage: str, timings: list[StageTiming], hook: StageHook | None = None
+) -> Iterator[StageTiming]:
+    # CPU time is per thread so that timings remain meaningful inside threaded batch jobs
+    timing = StageTiming(stage=stage)
+
+    start_wall = perf_counter()
+    start_cpu = thread_time()
+
+    try:
+        yield timing
+    finally:
+        timing.wall_time = perf_counter() - start_wall
+        timing.cpu_time = thread_time() - start_cpu
+        timings.append(timing)
+
+        if hook is not None:
+            hook(timing)
+
+
+def sum_stages(timings: list[StageTiming], stages: tuple[str, ...]) -> float:
+    return sum(t.wall_time for t in timings if t.stage in stages)
+
+
+class CollapsedStackProfiler:
+    """
+    A tracing profiler that attributes time to complete call stacks, across all
+    threads, and writes them in the collapsed ("folded") format consumed by
+    flamegraph tools. Each line is a semicolon delimited stack followed by the
+    time spent in the innermost frame in microseconds.
+    """
+
+    def __init__(self) -> None:
+        self.stacks: dict[tuple[str, ...], float] = defaultdict(float)
+        self.state = local()
+
+    @staticmethod
+    def _get_label(frame: FrameType, event: str, arg: Any) -> str:
+        if event == "c_call":
+            return f"{getattr(arg, '__qualname__', repr(arg))} (builtin)"
+
+        code = frame.f_code
+        return (
+            f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+        )
+
+    def _callback(self, frame: FrameType, event: str, arg: Any) -> None:
+        now = perf_counter()
+
+        if not hasattr(self.state, "stack"):
+            self.state.stack = []
+            self.state.last = now
+
+        stack: list[str] = self.state.stack
+
+        if len(stack) > 0:
+            self.stacks[tuple(stack)] += now - self.state.last
+
+        if event in ("call", "c_call"):
+            stack.append(self._get_label(frame, event, arg).replace(";", ":"))
+        elif len(stack) > 0:
+            stack.pop()
+
+        self.state.last = perf_counter()
+
+    def enable(self) -> None:
+        setprofile(self._callback)
+        sys.setprofile(self._callback)
+
+    def disable(self) -> None:
+        sys.setprofile(None)
+        setprofile(None)
+
+    def dump_stats(self, path: Path) -> None:
+        with path.open("w") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                f.write(f"{';'.join(stack)} {round(seconds * 1e6)}\n")
+
+
+class ThreadedProfile:
+    """
+    cProfile only traces the thread that enabled it. This also starts a
+    profiler in every thread started while enabled, such as the workers of a
+    batch job, and merges them all into one pstats file.
+    """
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.profiles = [Profile()]
+
+    def _start_thread_profile(self, _frame: FrameType, _event: str, _arg: Any) -> None:
+        # Called once per new thread. The profiler replaces this hook in that thread
+        profile = Profile()
+
+        with self.lock:
+            self.profiles.append(profile)
+
+        profile.enable()
+
+    def enable(self) -> None:
+        setprofile(self._start_thread_profile)
+        self.profiles[0].enable()
+
+    def disable(self) -> None:
+        self.profiles[0].disable()
+        setprofile(None)
+
+    def dump_stats(self, path: Path) -> None:
+        with self.lock:
+            Stats(*self.profiles).dump_stats(path)
+
+
+def start_profiler(path: Path) -> Callable[[], None]:
+    # Write collapsed stacks for flamegraphs if asked to, otherwise pstats output
+    profiler: ThreadedProfile | CollapsedStackProfiler
+
+    if path.suffix in (".folded", ".collapsed"):
+        profiler = CollapsedStackProfiler()
+    else:
+        profiler = ThreadedProfile()
+
+    profiler.enable()
+
+    def stop() -> None:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+    return stop
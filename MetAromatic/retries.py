@@ -0,0 +1,25 @@
+from random import uniform
+from urllib.error import URLError
+from .aliases import ErrorClass
+from .errors import DownloadError, SearchError
+
+RETRYABLE: set[ErrorClass] = {"network"}
+
+
+def classify_error(error: Exception) -> ErrorClass:
+    if isinstance(error, SearchError):
+        return "no_interaction"
+
+    if isinstance(error, (DownloadError, URLError, TimeoutError, ConnectionError)):
+        return "network"
+
+    return "parse"
+
+
+def is_retryable(error: Exception) -> bool:
+    return classify_error(error) in RETRYABLE
+
+
+def get_backoff_delay(attempt: int, backoff: float, max_backoff: float = 60.0) -> float:
+    # Exponential backoff with "full jitter" so that workers failing together do not retry together
+    return uniform(0, min(max_backoff, backoff * 2**attempt))
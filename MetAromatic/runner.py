@@ -1,12 +1,22 @@
 # pylint: disable=C0415   # Disable "Import outside toplevel" - we need this for lazy imports
 
+# Annotations are not evaluated at runtime so that the models below need not be imported on startup
+from __future__ import annotations
+from os import cpu_count, getpid
 from pathlib import Path
+from socket import gethostname
+from typing import Any, Callable, Iterable, Iterator, TYPE_CHECKING
 import sys
 import click
-from .aliases import Models
 from .consts import Help
-from .errors import SearchError
-from .models import MetAromaticParams, BatchParams
+from .errors import SearchError, DownloadError
+
+if TYPE_CHECKING:
+    from .aliases import Models, TopKPer
+    from .models import MetAromaticParams, BatchParams
+
+CONNECT_KEY = "metaromatic.connect"
+FORWARDED_COMMANDS = ("pair", "read-local", "bridge")
 
 
 @click.group()
@@ -21,64 +31,217 @@ from .models import MetAromaticParams, BatchParams
 )
 @click.option("--chain", default="A", help=Help.CHAIN.value)
 @click.option(
-    "--model", default="cp", help=Help.MODEL.value, type=click.Choice(["cp", "rm"])
+    "--model",
+    default="cp",
+    help=Help.MODEL.value,
+    type=click.Choice(["cp", "rm", "both"]),
+)
+@click.option("--top-k", type=click.IntRange(min=1), help=Help.TOP_K.value)
+@click.option(
+    "--top-k-per",
+    default="met",
+    help=Help.TOP_K_PER.value,
+    type=click.Choice(["met", "aromatic"]),
+)
+@click.option("--nearest", is_flag=True, default=False, help=Help.NEAREST.value)
+@click.option("--mirror", multiple=True, help=Help.MIRROR.value)
+@click.option(
+    "--profile",
+    help=Help.PROFILE.value,
+    type=click.Path(dir_okay=False, path_type=Path),
 )
+@click.option("--connect", metavar="ADDRESS", help=Help.CONNECT.value)
 @click.pass_context
 def cli(
     context: click.core.Context,
     chain: str,
+    connect: str | None,
     cutoff_angle: float,
     cutoff_distance: float,
+    mirror: tuple[str, ...],
     model: Models,
+    nearest: bool,
+    profile: Path | None,
+    top_k: int | None,
+    top_k_per: TopKPer,
 ) -> None:
+    if nearest:
+        if top_k is not None:
+            raise click.UsageError("--nearest cannot be combined with --top-k")
+
+        top_k = 1
+
+    if len(mirror) > 0:
+        from .mirrors import configure_mirrors
+
+        configure_mirrors(mirror)
+
+    if profile is not None:
+        from .profiling import start_profiler
+
+        context.call_on_close(start_profiler(profile))
+
+    if connect is not None:
+        if context.invoked_subcommand not in FORWARDED_COMMANDS:
+            raise click.UsageError(
+                f"--connect only supports the {', '.join(FORWARDED_COMMANDS)} commands"
+            )
+
+        if model == "both":
+            raise click.UsageError("--connect does not support --model both")
+
+        # Parameters are validated by the server, so the client need not load pydantic
+        context.meta[CONNECT_KEY] = (
+            connect,
+            {
+                "chain": chain,
+                "cutoff_angle": cutoff_angle,
+                "cutoff_distance": cutoff_distance,
+                "model": model,
+                "top_k": top_k,
+                "top_k_per": top_k_per,
+            },
+        )
+        return
+
+    from .models import MetAromaticParams
+
     context.obj = MetAromaticParams(
         chain=chain,
         cutoff_angle=cutoff_angle,
         cutoff_distance=cutoff_distance,
         model=model,
+        top_k=top_k,
+        top_k_per=top_k_per,
     )
 
 
-@cli.command(help=Help.CMD_PAIR.value)
-@click.argument("pdb_code")
-@click.pass_obj
-def pair(obj: MetAromaticParams, pdb_code: str) -> None:
-    from .get_pair import get_pairs_from_pdb, print_interactions
+def _is_forwarded() -> bool:
+    return CONNECT_KEY in click.get_current_context().meta
+
+
+def _query_server(
+    endpoint: str, key: str, entries: list[tuple[str, dict[str, Any]]]
+) -> Iterator[tuple[str, Any]]:
+    # Yields the key of each response from a server given with --connect, or the error
+    from .client import ServerClient
+
+    address, params = click.get_current_context().meta[CONNECT_KEY]
+    client = ServerClient(address)
 
     try:
-        print_interactions(
-            get_pairs_from_pdb(
-                chain=obj.chain,
-                cutoff_angle=obj.cutoff_angle,
-                cutoff_distance=obj.cutoff_distance,
-                model=obj.model,
-                pdb_code=pdb_code,
+        for entry, payload in entries:
+            try:
+                yield entry, client.request(endpoint, {**params, **payload})[key]
+            except (SearchError, DownloadError) as error:
+                yield entry, error
+    finally:
+        client.close()
+
+
+def _print_results(
+    results: Iterable[tuple[str, Any]], labelled: bool, compare: bool = False
+) -> None:
+    # Results are interactions, as a FeatureSpace or a list of rows, or an error
+    from .printing import print_interaction_rows, print_model_comparison
+
+    errors = []
+
+    for entry, result in results:
+        if isinstance(result, Exception):
+            errors.append(f"{entry}: {result}" if labelled else str(result))
+            continue
+
+        if labelled:
+            print(entry)
+
+        if compare:
+            print_model_comparison(
+                result.serialize_interactions(),
+                result.serialize_interactions_rm(),
+                result.get_model_differences(),
             )
-        )
-    except SearchError as error:
-        sys.exit(str(error))
+        else:
+            print_interaction_rows(
+                result if isinstance(result, list) else result.serialize_interactions()
+            )
+
+    if len(errors) > 0:
+        sys.exit("\n".join(errors))
+
+
+@cli.command(help=Help.CMD_PAIR.value)
+@click.argument("pdb_codes", nargs=-1, required=True)
+@click.option(
+    "--workers", default=5, type=click.IntRange(min=1), help=Help.WORKERS.value
+)
+@click.pass_obj
+def pair(obj: MetAromaticParams, pdb_codes: tuple[str, ...], workers: int) -> None:
+    if _is_forwarded():
+        entries = [(code, {"code": code}) for code in pdb_codes]
+        _print_results(_query_server("pair", "interactions", entries), len(entries) > 1)
+        return
+
+    from .get_pair import get_pairs_many
+
+    results = get_pairs_many(pdb_codes, obj, min(workers, len(pdb_codes)))
+    _print_results(results, len(pdb_codes) > 1, obj.model == "both")
 
 
 @cli.command(help=Help.CMD_READ_LOCAL.value)
 @click.argument(
-    "pdb_file", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+    "pdb_files",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--workers", default=5, type=click.IntRange(min=1), help=Help.WORKERS.value
 )
 @click.pass_obj
-def read_local(obj: MetAromaticParams, pdb_file: Path) -> None:
-    from .get_pair import get_pairs_from_file, print_interactions
-
-    try:
-        print_interactions(
-            get_pairs_from_file(
-                chain=obj.chain,
-                cutoff_angle=obj.cutoff_angle,
-                cutoff_distance=obj.cutoff_distance,
-                filepath=pdb_file,
-                model=obj.model,
-            )
+def read_local(
+    obj: MetAromaticParams, pdb_files: tuple[Path, ...], workers: int
+) -> None:
+    if _is_forwarded():
+        entries = [(str(f), {"path": str(f.resolve())}) for f in pdb_files]
+        _print_results(
+            _query_server("read-local", "interactions", entries), len(entries) > 1
         )
-    except SearchError as error:
-        sys.exit(str(error))
+        return
+
+    from .get_pair import get_pairs_many
+
+    results = get_pairs_many(pdb_files, obj, min(workers, len(pdb_files)))
+    _print_results(results, len(pdb_files) > 1, obj.model == "both")
+
+
+@cli.command(help=Help.CMD_SCREEN.value)
+@click.argument("pdb_codes", nargs=-1, required=True)
+@click.option(
+    "-k", "--min-hits", default=1, type=click.IntRange(min=1), help=Help.MIN_HITS.value
+)
+@click.option(
+    "--workers", default=5, type=click.IntRange(min=1), help=Help.WORKERS.value
+)
+@click.pass_obj
+def screen(
+    obj: MetAromaticParams, pdb_codes: tuple[str, ...], min_hits: int, workers: int
+) -> None:
+    from .get_pair import screen_many
+
+    errors = []
+
+    # One line per entry, with the number of interactions found up to --min-hits
+    for entry, result in screen_many(
+        pdb_codes, obj, min_hits, min(workers, len(pdb_codes))
+    ):
+        if isinstance(result, Exception):
+            errors.append(f"{entry}: {result}")
+        else:
+            print(f"{entry}\t{result}")
+
+    if len(errors) > 0:
+        sys.exit("\n".join(errors))
 
 
 @cli.command(help=Help.CMD_BRIDGE.value)
@@ -86,8 +249,27 @@ def read_local(obj: MetAromaticParams, pdb_file: Path) -> None:
 @click.option(
     "--vertices", default=3, type=click.IntRange(min=3), help=Help.VERTICES.value
 )
+@click.option(
+    "--remove-inverse", is_flag=True, default=False, help=Help.REMOVE_INVERSE.value
+)
 @click.pass_obj
-def bridge(obj: MetAromaticParams, code: str, vertices: int) -> None:
+def bridge(
+    obj: MetAromaticParams, code: str, vertices: int, remove_inverse: bool
+) -> None:
+    if _is_forwarded():
+        from .printing import print_bridge_list
+
+        payload = {"code": code, "vertices": vertices, "remove_inverse": remove_inverse}
+        entries = [(code, payload)]
+
+        for _, result in _query_server("bridge", "bridges", entries):
+            if isinstance(result, Exception):
+                sys.exit(str(result))
+
+            print_bridge_list(result)
+
+        return
+
     from .get_bridge import get_bridges, print_bridges
 
     try:
@@ -99,61 +281,631 @@ def bridge(obj: MetAromaticParams, code: str, vertices: int) -> None:
                 cutoff_distance=obj.cutoff_distance,
                 model=obj.model,
                 vertices=vertices,
+                remove_inverse=remove_inverse,
+            )
+        )
+    except (SearchError, DownloadError) as error:
+        sys.exit(str(error))
+
+
+@cli.command(help=Help.CMD_MOTIFS.value)
+@click.argument("code")
+@click.option(
+    "--vertices", default=3, type=click.IntRange(min=2), help=Help.VERTICES.value
+)
+@click.option("--pattern", metavar="TYPE-TYPE-...", help=Help.PATTERN.value)
+@click.option("--paths", is_flag=True, default=False, help=Help.PATHS.value)
+@click.option("--limit", type=click.IntRange(min=1), help=Help.LIMIT.value)
+@click.pass_obj
+def motifs(
+    obj: MetAromaticParams,
+    code: str,
+    vertices: int,
+    pattern: str | None,
+    paths: bool,
+    limit: int | None,
+) -> None:
+    from itertools import islice
+    from .motifs import get_motifs
+    from .printing import print_motifs
+
+    try:
+        results = get_motifs(
+            chain=obj.chain,
+            code=code,
+            cutoff_angle=obj.cutoff_angle,
+            cutoff_distance=obj.cutoff_distance,
+            model=obj.model,
+            vertices=vertices,
+            pattern=pattern,
+            paths=paths,
+        )
+    except (SearchError, DownloadError) as error:
+        sys.exit(str(error))
+
+    print_motifs(islice(results, limit))
+
+
+@cli.command(help=Help.CMD_BENCHMARK.value)
+@click.argument(
+    "pdb_files",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--repeats", default=5, type=click.IntRange(min=1), help=Help.REPEATS.value
+)
+@click.option("--warmup", default=1, type=click.IntRange(min=0), help=Help.WARMUP.value)
+@click.option(
+    "--vertices", default=3, type=click.IntRange(min=3), help=Help.VERTICES.value
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=Help.BASELINE.value,
+)
+@click.option(
+    "--threshold",
+    default=0.25,
+    type=click.FloatRange(min=0),
+    help=Help.THRESHOLD.value,
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=Help.BENCHMARK_OUTPUT.value,
+)
+@click.pass_obj
+def benchmark(
+    obj: MetAromaticParams,
+    baseline: Path | None,
+    output: Path | None,
+    pdb_files: tuple[Path, ...],
+    repeats: int,
+    threshold: float,
+    vertices: int,
+    warmup: int,
+) -> None:
+    from .benchmark import (
+        find_regressions,
+        load_baseline,
+        print_results,
+        run_benchmarks,
+        save_results,
+    )
+
+    try:
+        previous = None if baseline is None else load_baseline(baseline)
+    except SearchError as error:
+        sys.exit(str(error))
+
+    results = run_benchmarks(list(pdb_files), obj, repeats, warmup, vertices)
+    print_results(results, previous)
+
+    if output is not None:
+        save_results(results, output)
+
+    if previous is None:
+        return
+
+    regressions = find_regressions(results, previous, threshold)
+
+    if len(regressions) > 0:
+        sys.exit(
+            "\n".join(
+                f"Regression in {r.name}: {1000 * r.baseline:.3f} ms -> "
+                f"{1000 * r.current:.3f} ms ({r.ratio:.2f}x)"
+                for r in regressions
             )
         )
+
+
+@cli.command(help=Help.CMD_GENERATE.value)
+@click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--chains", default=1, type=click.IntRange(1, 62), help=Help.CHAINS.value)
+@click.option("--met", default=10, type=click.IntRange(min=1), help=Help.NUM_MET.value)
+@click.option("--phe", default=10, type=click.IntRange(min=0), help=Help.NUM_PHE.value)
+@click.option("--tyr", default=5, type=click.IntRange(min=0), help=Help.NUM_TYR.value)
+@click.option("--trp", default=5, type=click.IntRange(min=0), help=Help.NUM_TRP.value)
+@click.option(
+    "--filler", default=0, type=click.IntRange(min=0), help=Help.NUM_FILLER.value
+)
+@click.option(
+    "--waters", default=10, type=click.IntRange(min=1), help=Help.NUM_WATERS.value
+)
+@click.option("--models", default=1, type=click.IntRange(min=1), help=Help.MODELS.value)
+@click.option(
+    "--density",
+    default=7.5,
+    type=click.FloatRange(min=0, min_open=True),
+    help=Help.DENSITY.value,
+)
+@click.option("--seed", default=0, type=int, help=Help.SEED.value)
+def generate(output: Path, **options: Any) -> None:
+    from .models import SyntheticParams
+    from .synthetic import write_structure
+
+    try:
+        num_atoms = write_structure(SyntheticParams(**options), output)
     except SearchError as error:
         sys.exit(str(error))
 
+    click.echo(f"Wrote {num_atoms} atoms to {output}")
+
+
+@cli.command(help=Help.CMD_SERVE.value)
+@click.option("--host", default="127.0.0.1", help=Help.SERVE_HOST.value)
+@click.option(
+    "--port",
+    default=8000,
+    type=click.IntRange(min=0, max=65535),
+    help=Help.SERVE_PORT.value,
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=Help.SOCKET.value,
+)
+@click.option(
+    "--workers", default=4, type=click.IntRange(min=1), help=Help.WORKERS.value
+)
+@click.option(
+    "--cache-size", default=128, type=click.IntRange(min=1), help=Help.CACHE_SIZE.value
+)
+@click.option(
+    "--data-dir",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help=Help.DATA_DIR.value,
+)
+def serve(
+    cache_size: int,
+    data_dir: Path | None,
+    host: str,
+    port: int,
+    socket_path: Path | None,
+    workers: int,
+) -> None:
+    from .server import run_server
+
+    run_server(
+        host=host,
+        port=port,
+        socket_path=socket_path,
+        workers=workers,
+        cache_size=cache_size,
+        data_dir=data_dir,
+    )
+
+
+def _mongo_options(func: Callable[..., None]) -> Callable[..., None]:
+    options = [
+        click.option("--host", default="localhost", help=Help.HOST.value),
+        click.option("--port", type=int, default=27017, help=Help.PORT.value),
+        click.option("-d", "--database", default="default_ma", help=Help.DB.value),
+        click.option("-c", "--collection", default="default_ma", help=Help.COLL.value),
+        click.option("-u", "--username", help=Help.USERNAME.value),
+        click.option("-p", "--password", help=Help.PASSWORD.value),
+    ]
+
+    for option in reversed(options):
+        func = option(func)
+
+    return func
+
+
+def _sink_options(func: Callable[..., None]) -> Callable[..., None]:
+    options = [
+        click.option(
+            "--sink",
+            default="mongo",
+            type=click.Choice(["mongo", "jsonl", "sqlite", "npz"]),
+            help=Help.SINK.value,
+        ),
+        click.option(
+            "-o",
+            "--output",
+            type=click.Path(dir_okay=False, path_type=Path),
+            help=Help.OUTPUT.value,
+        ),
+        click.option(
+            "--metrics-port",
+            type=click.IntRange(min=0, max=65535),
+            help=Help.METRICS_PORT.value,
+        ),
+        click.option(
+            "--metrics-file",
+            type=click.Path(dir_okay=False, path_type=Path),
+            help=Help.METRICS_FILE.value,
+        ),
+        click.option(
+            "--metrics-interval",
+            default=10.0,
+            type=click.FloatRange(min=0.1),
+            help=Help.METRICS_INTERVAL.value,
+        ),
+    ]
+
+    for option in reversed(options):
+        func = option(func)
+
+    return func
+
+
+def _worker_options(func: Callable[..., None]) -> Callable[..., None]:
+    options = [
+        click.option(
+            "--threads",
+            default=5,
+            type=click.IntRange(min=1, max=15),
+            help=Help.THREADS.value,
+        ),
+        click.option(
+            "--retries", default=3, type=click.IntRange(min=0), help=Help.RETRIES.value
+        ),
+        click.option(
+            "--backoff",
+            default=1.0,
+            type=click.FloatRange(min=0),
+            help=Help.BACKOFF.value,
+        ),
+        click.option(
+            "--compute-processes",
+            type=click.IntRange(min=1),
+            help=Help.COMPUTE_PROCESSES.value,
+        ),
+        click.option(
+            "--memory-budget",
+            type=click.IntRange(min=1),
+            help=Help.MEMORY_BUDGET.value,
+        ),
+    ]
+
+    for option in reversed(options):
+        func = option(func)
+
+    return _sink_options(func)
+
+
+def _get_batch_params(uses_mongo: bool, **options: Any) -> BatchParams:
+    from .models import BatchParams
+
+    # Only prompt for credentials when MongoDB is actually used
+    if uses_mongo:
+        if options["username"] is None:
+            options["username"] = click.prompt("Username")
+
+        if options["password"] is None:
+            options["password"] = click.prompt("Password", hide_input=True)
+
+    options.setdefault("overwrite", False)
+    options.setdefault("path_batch_file", None)
+    options.setdefault("threads", 1)
+
+    return BatchParams(**options)
+
 
 @cli.command(help=Help.CMD_BATCH.value)
 @click.argument(
-    "batch_file", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+    "batch_file",
+    required=False,
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True, path_type=Path),
 )
+@_worker_options
+@_mongo_options
 @click.option(
-    "--threads", default=5, type=click.IntRange(min=1, max=15), help=Help.THREADS.value
+    "-x", "--overwrite", is_flag=True, default=False, help=Help.OVERWRITE.value
 )
-@click.option("--host", default="localhost", help=Help.HOST.value)
-@click.option("--port", type=int, default=27017, help=Help.PORT.value)
-@click.option("-d", "--database", default="default_ma", help=Help.DB.value)
-@click.option("-c", "--collection", default="default_ma", help=Help.COLL.value)
 @click.option(
-    "-x", "--overwrite", is_flag=True, default=False, help=Help.OVERWRITE.value
+    "--retry-failed", is_flag=True, default=False, help=Help.RETRY_FAILED.value
+)
+@click.option(
+    "--screen",
+    type=click.IntRange(min=1),
+    metavar="K",
+    help=Help.BATCH_SCREEN.value,
+)
+@click.option(
+    "--bridges",
+    type=click.IntRange(min=3),
+    metavar="VERTICES",
+    help=Help.BATCH_BRIDGES.value,
+)
+@click.option(
+    "--remove-inverse", is_flag=True, default=False, help=Help.REMOVE_INVERSE.value
 )
-@click.option("-u", "--username", prompt=True, help=Help.USERNAME.value)
 @click.option(
-    "-p", "--password", prompt=True, hide_input=True, help=Help.PASSWORD.value
+    "--config",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help=Help.BATCH_CONFIG.value,
 )
 @click.pass_obj
 def batch(
     obj: MetAromaticParams,
-    batch_file: Path,
-    collection: str,
-    database: str,
-    host: str,
+    /,
+    batch_file: Path | None,
     overwrite: bool,
-    password: str,
-    port: int,
-    threads: int,
-    username: str,
+    retry_failed: bool,
+    **options: Any,
 ) -> None:
     from .get_batch import run_batch_job
 
-    bp = BatchParams(
-        collection=collection,
-        database=database,
-        host=host,
+    bp = _get_batch_params(
+        uses_mongo=options["sink"] == "mongo",
         overwrite=overwrite,
-        password=password,
         path_batch_file=batch_file,
-        port=port,
-        threads=threads,
-        username=username,
+        retry_failed=retry_failed,
+        **options,
     )
     try:
         run_batch_job(params=obj, bp=bp)
-    except SearchError as error:
+    except (SearchError, DownloadError) as error:
+        sys.exit(str(error))
+
+
+@cli.command(help=Help.CMD_BATCH_LOCAL.value)
+@click.argument("source", metavar="DIR|GLOB")
+@click.option(
+    "--workers",
+    default=cpu_count() or 1,
+    show_default="number of CPUs",
+    type=click.IntRange(min=1),
+    help=Help.PROCESSES.value,
+)
+@click.option("--mmap", is_flag=True, default=False, help=Help.MMAP.value)
+@click.option(
+    "--group-size", default=1, type=click.IntRange(min=1), help=Help.GROUP_SIZE.value
+)
+@_sink_options
+@_mongo_options
+@click.option(
+    "-x", "--overwrite", is_flag=True, default=False, help=Help.OVERWRITE.value
+)
+@click.pass_obj
+def batch_local(
+    obj: MetAromaticParams,
+    /,
+    group_size: int,
+    mmap: bool,
+    overwrite: bool,
+    source: str,
+    workers: int,
+    **options: Any,
+) -> None:
+    from .get_batch import run_local_batch_job
+
+    bp = _get_batch_params(
+        uses_mongo=options["sink"] == "mongo",
+        overwrite=overwrite,
+        threads=workers,
+        **options,
+    )
+    try:
+        run_local_batch_job(
+            params=obj, bp=bp, source=source, use_mmap=mmap, group_size=group_size
+        )
+    except (SearchError, DownloadError) as error:
+        sys.exit(str(error))
+
+
+@cli.command(help=Help.CMD_BATCH_HARNESS.value)
+@click.argument(
+    "directory", type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.argument(
+    "batch_file",
+    required=False,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--server-profile",
+    default="local",
+    type=click.Choice(["local", "lan", "wan", "flaky", "throttled"]),
+    help=Help.SERVER_PROFILE.value,
+)
+@click.option("--latency", type=click.FloatRange(min=0), help=Help.LATENCY.value)
+@click.option("--jitter", type=click.FloatRange(min=0), help=Help.JITTER.value)
+@click.option(
+    "--bandwidth",
+    type=click.FloatRange(min=0, min_open=True),
+    help=Help.BANDWIDTH.value,
+)
+@click.option("--error-rate", type=click.FloatRange(0, 1), help=Help.ERROR_RATE.value)
+@click.option(
+    "--max-concurrency", type=click.IntRange(min=1), help=Help.MAX_CONCURRENCY.value
+)
+@click.option(
+    "--max-rate", type=click.FloatRange(min=0, min_open=True), help=Help.MAX_RATE.value
+)
+@click.option("--seed", type=int, help=Help.SEED.value)
+@click.option(
+    "--threads", default=5, type=click.IntRange(min=1, max=15), help=Help.THREADS.value
+)
+@click.option(
+    "--retries", default=3, type=click.IntRange(min=0), help=Help.RETRIES.value
+)
+@click.option(
+    "--backoff", default=1.0, type=click.FloatRange(min=0), help=Help.BACKOFF.value
+)
+@click.option(
+    "--sink",
+    default="jsonl",
+    type=click.Choice(["jsonl", "sqlite"]),
+    help=Help.SINK.value,
+)
+@click.option(
+    "-o",
+    "--output",
+    required=True,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=Help.OUTPUT.value,
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=Help.REPORT.value,
+)
+@click.option(
+    "-x", "--overwrite", is_flag=True, default=False, help=Help.OVERWRITE.value
+)
+@click.pass_obj
+def batch_harness(
+    obj: MetAromaticParams,
+    /,
+    directory: Path,
+    batch_file: Path | None,
+    report: Path | None,
+    seed: int | None,
+    server_profile: str,
+    **options: Any,
+) -> None:
+    from json import dumps
+    from .harness import print_report, run_throughput_harness
+    from .stand_in import get_profile
+
+    profile_fields = (
+        "latency",
+        "jitter",
+        "bandwidth",
+        "error_rate",
+        "max_concurrency",
+        "max_rate",
+    )
+    overrides = {k: options.pop(k) for k in profile_fields}
+
+    bp = _get_batch_params(
+        uses_mongo=False,
+        collection="harness",
+        database="harness",
+        host="localhost",
+        password=None,
+        path_batch_file=batch_file,
+        port=27017,
+        username=None,
+        **options,
+    )
+
+    try:
+        results = run_throughput_harness(
+            params=obj,
+            bp=bp,
+            directory=directory,
+            profile=get_profile(server_profile, **overrides),
+            seed=seed,
+        )
+    except (SearchError, DownloadError) as error:
+        sys.exit(str(error))
+
+    print_report(results)
+
+    if report is not None:
+        report.write_text(dumps(results, indent=4) + "\n")
+
+
+@cli.command(help=Help.CMD_BATCH_SUBMIT.value)
+@click.argument(
+    "batch_file",
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True, path_type=Path),
+)
+@_mongo_options
+@click.option(
+    "--queue", type=click.Path(dir_okay=False, path_type=Path), help=Help.QUEUE.value
+)
+@click.option(
+    "--chunk-size",
+    default=100,
+    type=click.IntRange(min=1),
+    help=Help.CHUNK_SIZE.value,
+)
+@click.option(
+    "-x", "--overwrite", is_flag=True, default=False, help=Help.OVERWRITE.value
+)
+def batch_submit(
+    batch_file: Path,
+    chunk_size: int,
+    overwrite: bool,
+    queue: Path | None,
+    **options: Any,
+) -> None:
+    from .get_batch import submit_batch_job
+    from .models import QueueParams
+
+    bp = _get_batch_params(
+        uses_mongo=queue is None,
+        overwrite=overwrite,
+        path_batch_file=batch_file,
+        **options,
+    )
+    qp = QueueParams(chunk_size=chunk_size, path=queue, worker_id=gethostname())
+
+    try:
+        submit_batch_job(bp=bp, qp=qp)
+    except (SearchError, DownloadError) as error:
         sys.exit(str(error))
 
 
+@cli.command(help=Help.CMD_BATCH_WORKER.value)
+@_worker_options
+@_mongo_options
+@click.option(
+    "--queue", type=click.Path(dir_okay=False, path_type=Path), help=Help.QUEUE.value
+)
+@click.option(
+    "--lease", default=300.0, type=click.FloatRange(min=1), help=Help.LEASE.value
+)
+@click.option("--worker-id", help=Help.WORKER_ID.value)
+@click.pass_obj
+def batch_worker(
+    obj: MetAromaticParams,
+    /,
+    lease: float,
+    queue: Path | None,
+    worker_id: str | None,
+    **options: Any,
+) -> None:
+    from .get_batch import run_batch_worker
+    from .models import QueueParams
+
+    bp = _get_batch_params(
+        uses_mongo=queue is None or options["sink"] == "mongo", **options
+    )
+    qp = QueueParams(
+        lease=lease,
+        path=queue,
+        poll_interval=min(5.0, lease / 3),
+        worker_id=worker_id or f"{gethostname()}-{getpid()}",
+    )
+
+    try:
+        run_batch_worker(params=obj, bp=bp, qp=qp)
+    except (SearchError, DownloadError) as error:
+        sys.exit(str(error))
+
+
+@cli.command(help=Help.CMD_BATCH_STATUS.value)
+@_mongo_options
+@click.option(
+    "--queue", type=click.Path(dir_okay=False, path_type=Path), help=Help.QUEUE.value
+)
+def batch_status(queue: Path | None, **options: Any) -> None:
+    from .get_batch import get_batch_progress
+    from .models import QueueParams
+
+    bp = _get_batch_params(uses_mongo=queue is None, **options)
+    qp = QueueParams(path=queue, worker_id=gethostname())
+
+    try:
+        progress = get_batch_progress(bp=bp, qp=qp)
+    except (SearchError, DownloadError) as error:
+        sys.exit(str(error))
+
+    print(
+        f"Pending: {progress.pending} Leased: {progress.leased} "
+        f"Done: {progress.done} Total: {progress.total}"
+    )
+
+
 if __name__ == "__main__":
     cli()
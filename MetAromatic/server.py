@@ -0,0 +1,389 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from http import HTTPStatus
+from ipaddress import ip_address
+from json import dumps, loads
+from logging import getLogger
+from pathlib import Path
+from signal import SIGINT, SIGTERM
+from typing import Any, Awaitable, Callable, TypeVar
+from .aio_http import get_http_pool
+from .algorithm import MetAromatic
+from .aliases import RawData
+from .errors import DownloadError, SearchError
+from .get_bridge import isolate_bridges
+from .load_resources import (
+    async_fetch_pdb_file,
+    decompress_pdb_file,
+    load_local_pdb_file,
+)
+from .models import FeatureSpace, MetAromaticParams, get_params
+
+MAX_BODY_SIZE = 65536
+
+Logger = getLogger("met-aromatic")
+
+T = TypeVar("T")
+Payload = dict[str, Any]
+
+
+def _get_string(payload: Payload, key: str) -> str:
+    value = payload.get(key)
+
+    if not isinstance(value, str):
+        raise SearchError(f"{key}: Input should be a valid string")
+
+    return value
+
+
+def _get_params(payload: Payload) -> MetAromaticParams:
+    keys = ("chain", "cutoff_angle", "cutoff_distance", "model", "top_k", "top_k_per")
+    params = get_params(**{k: payload[k] for k in keys if k in payload})
+
+    # Responses only hold a single table of interactions
+    if params.model == "both":
+        raise SearchError("model: The server does not support model 'both'")
+
+    return params
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+
+    try:
+        return ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _get_interactions(params: MetAromaticParams, raw_data: RawData) -> FeatureSpace:
+    return MetAromatic(params=params, raw_data=raw_data).get_interactions()
+
+
+class AnalysisServer:
+    """
+    Answer pair, bridge and read-local queries over HTTP/1.1, on a TCP port or a
+    Unix socket. Downloaded structures are kept in an LRU cache, concurrent
+    requests for the same entry share a single download, and at most `workers`
+    queries run at once on a pool of long lived threads. read-local queries are
+    limited to files under data_dir, or refused without one unless the server
+    only listens on a Unix socket or a loopback address.
+    """
+
+    def __init__(
+        self, workers: int = 4, cache_size: int = 128, data_dir: Path | None = None
+    ) -> None:
+        self.workers = workers
+        self.cache_size = cache_size
+        self.data_dir = None if data_dir is None else data_dir.resolve()
+        self.is_local = True
+
+        self.cache: OrderedDict[str, RawData] = OrderedDict()
+        self.downloads: dict[str, asyncio.Future[RawData]] = {}
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="MetAromatic")
+        self.slots = asyncio.Semaphore(workers)
+
+        self.server: asyncio.AbstractServer | None = None
+        self.socket_path: Path | None = None
+        self.connections: set[asyncio.StreamWriter] = set()
+
+        self.routes: dict[str, Callable[[Payload], Awaitable[Payload]]] = {
+            "/pair": self._pair,
+            "/bridge": self._bridge,
+            "/read-local": self._read_local,
+        }
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args
+        )
+
+    async def _download(self, code: str) -> RawData:
+        data = await async_fetch_pdb_file(code)
+        return await self._run(decompress_pdb_file, data, code)
+
+    async def _get_raw_data(self, code: str) -> RawData:
+        code = code.lower()
+
+        if code in self.cache:
+            self.stats["cache_hits"] += 1
+            self.cache.move_to_end(code)
+            return self.cache[code]
+
+        if code in self.downloads:
+            self.stats["cache_hits"] += 1
+            return await asyncio.shield(self.downloads[code])
+
+        self.stats["cache_misses"] += 1
+        download = asyncio.ensure_future(self._download(code))
+        self.downloads[code] = download
+
+        try:
+            raw_data = await asyncio.shield(download)
+        finally:
+            del self.downloads[code]
+
+        self.cache[code] = raw_data
+
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return raw_data
+
+    async def _pair(self, payload: Payload) -> Payload:
+        params = _get_params(payload)
+        raw_data = await self._get_raw_data(_get_string(payload, "code"))
+        fs = await self._run(_get_interactions, params, raw_data)
+
+        return {"interactions": fs.serialize_interactions()}
+
+    async def _bridge(self, payload: Payload) -> Payload:
+        # Bridges are always found among all interactions, as with get_bridges
+        params = _get_params({**payload, "top_k": None})
+        vertices = payload.get("vertices", 3)
+
+        if not isinstance(vertices, int) or vertices < 3:
+            raise SearchError("vertices: Input should be an integer of at least 3")
+
+        remove_inverse = payload.get("remove_inverse", False)
+
+        if not isinstance(remove_inverse, bool):
+            raise SearchError("remove_inverse: Input should be a valid boolean")
+
+        raw_data = await self._get_raw_data(_get_string(payload, "code"))
+        fs = await self._run(_get_interactions, params, raw_data)
+        bs = await self._run(isolate_bridges, fs, vertices, remove_inverse)
+
+        return {"bridges": [sorted(bridge) for bridge in bs.bridges]}
+
+    def _resolve_local_path(self, path: str) -> Path:
+        if self.data_dir is None:
+            # Anyone who can reach the server could otherwise read any of its files
+            if not self.is_local:
+                raise PermissionError(
+                    "read-local requires --data-dir on a non-loopback address"
+                )
+
+            return Path(path)
+
+        resolved = (self.data_dir / path).resolve()
+
+        if not resolved.is_relative_to(self.data_dir):
+            raise PermissionError(f"File '{path}' is outside of the data directory")
+
+        return resolved
+
+    async def _read_local(self, payload: Payload) -> Payload:
+        params = _get_params(payload)
+        path = self._resolve_local_path(_get_string(payload, "path"))
+
+        if not path.is_file():
+            raise SearchError(f"File '{path}' does not exist")
+
+        raw_data = await self._run(load_local_pdb_file, path)
+        fs = await self._run(_get_interactions, params, raw_data)
+
+        return {"interactions": fs.serialize_interactions()}
+
+    def get_health(self) -> Payload:
+        return {
+            **self.stats,
+            "cached_entries": len(self.cache),
+            "workers": self.workers,
+        }
+
+    async def _dispatch(
+        self, method: str, target: str, body: bytes
+    ) -> tuple[int, Payload]:
+        path = target.split("?", 1)[0]
+
+        if path == "/health":
+            return (200, self.get_health()) if method == "GET" else (405, {})
+
+        if path not in self.routes:
+            return 404, {"error": f"Unknown endpoint '{path}'"}
+
+        if method != "POST":
+            return 405, {"error": f"Endpoint '{path}' only accepts POST requests"}
+
+        try:
+            payload = loads(body)
+        except ValueError:
+            payload = None
+
+        if not isinstance(payload, dict):
+            return 400, {"error": "Request body must be a JSON object"}
+
+        self.stats["requests"] += 1
+
+        async with self.slots:
+            self.stats["in_flight"] += 1
+
+            try:
+                return 200, await self.routes[path](payload)
+            except SearchError as error:
+                self.stats["errors"] += 1
+                return 422, {"error": str(error)}
+            except PermissionError as error:
+                self.stats["errors"] += 1
+                return 403, {"error": str(error)}
+            except DownloadError as error:
+                self.stats["errors"] += 1
+                return 502, {"error": str(error)}
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                # Answer rather than drop the connection, which clients would retry
+                Logger.exception("Request to '%s' failed", path)
+                self.stats["errors"] += 1
+                return 500, {"error": f"Internal server error: {error}"}
+            finally:
+                self.stats["in_flight"] -= 1
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections.add(writer)
+
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _handle_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        # Returns whether the connection should be kept open for further requests
+        request_line = await reader.readline()
+
+        if len(request_line) == 0:
+            return False
+
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            self._respond(writer, 400, {"error": "Malformed request line"}, False)
+            return False
+
+        headers = {}
+
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = (
+            version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        )
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            length = -1
+
+        if not 0 <= length <= MAX_BODY_SIZE:
+            self._respond(writer, 413, {"error": "Invalid request body size"}, False)
+            return False
+
+        body = await reader.readexactly(length)
+        status, response = await self._dispatch(method, target, body)
+
+        self._respond(writer, status, response, keep_alive)
+        await writer.drain()
+
+        return keep_alive
+
+    @staticmethod
+    def _respond(
+        writer: asyncio.StreamWriter, status: int, response: Payload, keep_alive: bool
+    ) -> None:
+        body = dumps(response).encode()
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 8000, socket_path: Path | None = None
+    ) -> str:
+        # Returns the address clients should connect to
+        if socket_path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, socket_path)
+            self.socket_path = socket_path
+            self.is_local = True
+            return f"unix:{socket_path}"
+
+        self.server = await asyncio.start_server(self._handle, host, port)
+        self.is_local = _is_loopback(host)
+        port = self.server.sockets[0].getsockname()[1]
+
+        return f"http://{host}:{port}"
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+
+            # Idle keep-alive connections would otherwise hold up the shutdown
+            for writer in list(self.connections):
+                writer.close()
+
+            await self.server.wait_closed()
+
+        if self.socket_path is not None:
+            self.socket_path.unlink(missing_ok=True)
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+        # Close the connections kept alive to the mirrors
+        await get_http_pool().close()
+
+
+async def _serve_forever(
+    server: AnalysisServer, host: str, port: int, socket_path: Path | None
+) -> None:
+    address = await server.start(host, port, socket_path)
+    print(f"Serving on {address}", flush=True)
+
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+
+    def request_stop() -> None:
+        if not stop.done():
+            stop.set_result(None)
+
+    for signal in (SIGINT, SIGTERM):
+        loop.add_signal_handler(signal, request_stop)
+
+    try:
+        await stop
+    finally:
+        await server.close()
+
+
+def run_server(
+    host: str,
+    port: int,
+    socket_path: Path | None,
+    workers: int,
+    cache_size: int,
+    data_dir: Path | None = None,
+) -> None:
+    server = AnalysisServer(workers=workers, cache_size=cache_size, data_dir=data_dir)
+    asyncio.run(_serve_forever(server, host, port, socket_path))
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock
+from typing import Iterator
+
+
+@dataclass(frozen=True)
+class BufferDescriptor:
+    # All that is pickled when a buffer is handed to another process
+    name: str
+    size: int
+
+
+class SharedBuffers:
+    """
+    Hand byte buffers to other processes through shared memory, so that only
+    a small descriptor goes through the pipe to a process pool. Segments are
+    created and unlinked by the owning process only. Other processes attach by
+    name and never own a segment, so a process that crashes cannot leak one.
+    Every segment still held is unlinked by close(). If the owner is killed
+    outright, the resource tracker of multiprocessing unlinks what is left.
+    """
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.segments: dict[str, SharedMemory] = {}
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def put(self, data: bytes) -> BufferDescriptor:
+        # Segments cannot be empty
+        segment = SharedMemory(create=True, size=max(len(data), 1))
+
+        # buf is only None once the segment is closed
+        assert segment.buf is not None
+        segment.buf[: len(data)] = data
+
+        with self.lock:
+            self.segments[segment.name] = segment
+
+        return BufferDescriptor(name=segment.name, size=len(data))
+
+    def release(self, descriptor: BufferDescriptor) -> None:
+        with self.lock:
+            segment = self.segments.pop(descriptor.name, None)
+
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+    @contextmanager
+    def share(self, data: bytes) -> Iterator[BufferDescriptor]:
+        descriptor = self.put(data)
+
+        try:
+            yield descriptor
+        finally:
+            self.release(descriptor)
+
+    def close(self) -> None:
+        with self.lock:
+            descriptors = [BufferDescriptor(name, 0) for name in self.segments]
+
+        for descriptor in descriptors:
+            self.release(descriptor)
+
+
+@contextmanager
+def attach_buffer(descriptor: BufferDescriptor) -> Iterator[memoryview]:
+    # The view is only valid inside the with block, and must not be kept
+    segment = SharedMemory(name=descriptor.name)
+    assert segment.buf is not None
+
+    try:
+        with segment.buf[: descriptor.size] as view:
+            yield view
+    finally:
+        segment.close()
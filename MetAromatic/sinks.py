@@ -0,0 +1,434 @@
+# pylint: disable=C0415   # Disable "Import outside toplevel" - we need this for lazy imports
+
+from abc import ABC, abstractmethod
+from json import dumps, loads
+from logging import getLogger
+from os import SEEK_END
+from pathlib import Path
+from sqlite3 import Connection, connect
+from threading import Lock
+from typing import Any, Mapping, TextIO, TYPE_CHECKING
+from .aliases import PdbCodes
+from .errors import SearchError
+from .models import BatchParams, BatchResult
+
+if TYPE_CHECKING:
+    from pymongo import database
+
+Logger = getLogger("met-aromatic")
+
+
+class Sink(ABC):
+    def open(self) -> None:
+        pass
+
+    @abstractmethod
+    def prepare(self, overwrite: bool) -> None:
+        pass
+
+    def attach(self) -> None:
+        # Join output that is shared with other batch workers
+        pass
+
+    def get_retryable_codes(self) -> PdbCodes:
+        raise SearchError(f"Retrying failures is not supported by the {self} sink")
+
+    def get_processed_codes(self) -> set[str]:
+        raise SearchError(f"Resuming a batch job is not supported by the {self} sink")
+
+    @abstractmethod
+    def write(self, result: BatchResult, replace: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    def write_summary(self, summary: dict[str, Any]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _get_info_collection(base_collection: str) -> str:
+    return f"{base_collection}_info"
+
+
+class MongoSink(Sink):
+    def __init__(self, bp: BatchParams) -> None:
+        self.bp = bp
+        self.db: "database.Database[Mapping[str, Any]]"
+
+    def __str__(self) -> str:
+        return f"MongoDB collection {self.bp.database}.{self.bp.collection}"
+
+    def open(self) -> None:
+        from pymongo import MongoClient, errors
+
+        client: MongoClient[Mapping[str, Any]] = MongoClient(
+            host=self.bp.host,
+            password=self.bp.password,
+            port=self.bp.port,
+            serverSelectionTimeoutMS=1000,
+            username=self.bp.username,
+        )
+
+        try:
+            client[self.bp.database].list_collection_names()
+        except errors.ServerSelectionTimeoutError as error:
+            raise SearchError("Failed to connect to MongoDB") from error
+        except errors.OperationFailure as error:
+            if error.details is None:
+                errmsg = "Unknown error occurred when connecting to MongoDB"
+            else:
+                errmsg = error.details["errmsg"]
+            raise SearchError(errmsg) from error
+
+        self.db = client[self.bp.database]
+
+    def prepare(self, overwrite: bool) -> None:
+        coll = self.bp.collection
+
+        if overwrite:
+            Logger.info('Will overwrite collection "%s" if exists', coll)
+            self.db.drop_collection(coll)
+
+            info_collection = _get_info_collection(coll)
+            Logger.info('Will overwrite collection "%s" if exists', info_collection)
+
+            self.db.drop_collection(info_collection)
+
+        if coll in self.db.list_collection_names():
+            raise SearchError(f'Collection "{coll}" exists! Cannot proceed')
+
+    def get_retryable_codes(self) -> PdbCodes:
+        coll = self.bp.collection
+        Logger.info('Importing retryable failures from collection "%s"', coll)
+
+        if coll not in self.db.list_collection_names():
+            raise SearchError(f'Collection "{coll}" does not exist! Cannot retry')
+
+        return [
+            doc["_id"] for doc in self.db[coll].find({"retryable": True}, {"_id": 1})
+        ]
+
+    def get_processed_codes(self) -> set[str]:
+        return set(self.db[self.bp.collection].distinct("_id"))
+
+    def write(self, result: BatchResult, replace: bool = False) -> None:
+        collection = self.db[self.bp.collection]
+
+        if replace:
+            collection.replace_one({"_id": result["_id"]}, result, upsert=True)
+        else:
+            collection.insert_one(result)
+
+    def write_summary(self, summary: dict[str, Any]) -> None:
+        info_collection = _get_info_collection(self.bp.collection)
+        self.db[info_collection].insert_one(summary)
+
+
+def _get_info_file(output: Path) -> Path:
+    return output.with_name(f"{output.stem}_info.jsonl")
+
+
+class _FileSink(Sink, ABC):
+    def __init__(self, output: Path) -> None:
+        self.output = output
+        self.lock = Lock()
+
+    def __str__(self) -> str:
+        return f"file {self.output}"
+
+    def prepare(self, overwrite: bool) -> None:
+        if overwrite:
+            Logger.info('Will overwrite file "%s" if exists', self.output)
+            self.output.unlink(missing_ok=True)
+            _get_info_file(self.output).unlink(missing_ok=True)
+
+        if self.output.exists():
+            raise SearchError(f'File "{self.output}" exists! Cannot proceed')
+
+    def write_summary(self, summary: dict[str, Any]) -> None:
+        with _get_info_file(self.output).open("a", encoding="utf-8") as f:
+            f.write(dumps(summary, default=str) + "\n")
+
+
+class JsonlSink(_FileSink):
+    """
+    A sink of one JSON document per line. Results are only ever appended, so
+    writing with replace, as when retrying failures, adds a line rather than
+    rewriting the earlier one. Readers must take the last line for each _id.
+    """
+
+    def __init__(self, output: Path) -> None:
+        super().__init__(output)
+        self.handle: TextIO | None = None
+
+    def get_retryable_codes(self) -> PdbCodes:
+        if not self.output.exists():
+            raise SearchError(f'File "{self.output}" does not exist! Cannot retry')
+
+        # Results are appended, so a later line for a code supersedes earlier ones
+        latest: dict[str, bool] = {}
+
+        with self.output.open(encoding="utf-8") as f:
+            for line in f:
+                doc = loads(line)
+                latest[doc["_id"]] = doc["retryable"]
+
+        return [code for code, retryable in latest.items() if retryable]
+
+    def attach(self) -> None:
+        # Drop a line cut short by an interrupted job, so that appended results
+        # start on a line of their own
+        if not self.output.exists():
+            return
+
+        with self.output.open("rb+") as f:
+            size = end = f.seek(0, SEEK_END)
+
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+
+                end = start
+
+            if end < size:
+                Logger.warning("Dropping a partial line at the end of %s", self)
+                f.truncate(end)
+
+    def get_processed_codes(self) -> set[str]:
+        if not self.output.exists():
+            return set()
+
+        # A line cut short by an interrupted job is not a processed entry
+        with self.output.open(encoding="utf-8") as f:
+            return {loads(line)["_id"] for line in f if line.endswith("\n")}
+
+    def write(self, result: BatchResult, replace: bool = False) -> None:
+        line = dumps(result) + "\n"
+
+        with self.lock:
+            if self.handle is None:
+                # pylint: disable-next=consider-using-with
+                self.handle = self.output.open("a", encoding="utf-8")
+
+            self.handle.write(line)
+            self.handle.flush()
+
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+
+
+class SQLiteSink(_FileSink):
+    def __init__(self, output: Path, batch_size: int = 500) -> None:
+        super().__init__(output)
+        self.batch_size = batch_size
+        self.buffer: list[tuple[str, str | None, bool, str]] = []
+        self.conn: Connection | None = None
+
+    @property
+    def connection(self) -> Connection:
+        # Only available between open() and close()
+        if self.conn is None:
+            raise SearchError(f"{self} is not open")
+
+        return self.conn
+
+    def open(self) -> None:
+        self.conn = connect(self.output, check_same_thread=False, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+
+    def prepare(self, overwrite: bool) -> None:
+        if overwrite:
+            Logger.info('Will overwrite tables in "%s" if exist', self.output)
+            self.connection.execute("DROP TABLE IF EXISTS results")
+            self.connection.execute("DROP TABLE IF EXISTS info")
+
+        if "results" in self._get_tables():
+            raise SearchError(
+                f'Table "results" exists in "{self.output}"! Cannot proceed'
+            )
+
+        self._create_tables()
+
+    def attach(self) -> None:
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(_id TEXT PRIMARY KEY, error_class TEXT, retryable INTEGER, document TEXT)"
+            )
+            self.connection.execute("CREATE TABLE IF NOT EXISTS info (document TEXT)")
+
+    def _get_tables(self) -> set[str]:
+        rows = self.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        )
+        return {row[0] for row in rows}
+
+    def get_retryable_codes(self) -> PdbCodes:
+        if "results" not in self._get_tables():
+            raise SearchError(
+                f'Table "results" does not exist in "{self.output}"! Cannot retry'
+            )
+
+        rows = self.connection.execute("SELECT _id FROM results WHERE retryable = 1")
+
+        return [row[0] for row in rows]
+
+    def get_processed_codes(self) -> set[str]:
+        return {row[0] for row in self.connection.execute("SELECT _id FROM results")}
+
+    def _flush(self) -> None:
+        if len(self.buffer) == 0:
+            return
+
+        # One transaction per buffer rather than one per result
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", self.buffer
+            )
+
+        self.buffer.clear()
+
+    def write(self, result: BatchResult, replace: bool = False) -> None:
+        row = (result["_id"], result["error_class"], result["retryable"], dumps(result))
+
+        with self.lock:
+            self.buffer.append(row)
+
+            if len(self.buffer) >= self.batch_size:
+                self._flush()
+
+    def write_summary(self, summary: dict[str, Any]) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO info VALUES (?)", (dumps(summary, default=str),)
+            )
+
+    def close(self) -> None:
+        with self.lock:
+            self._flush()
+
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def _to_column(values: list[Any]) -> Any:
+    from numpy import array, float64, int64, nan
+
+    present = [v for v in values if v is not None]
+
+    if len(present) > 0 and all(isinstance(v, (bool, int)) for v in present):
+        if len(present) == len(values):
+            return array(values, dtype=int64)
+
+    if len(present) > 0 and all(isinstance(v, (bool, int, float)) for v in present):
+        return array([nan if v is None else v for v in values], dtype=float64)
+
+    return array(["" if v is None else str(v) for v in values])
+
+
+class NpzSink(_FileSink):
+    """
+    A columnar sink. Results are accumulated column by column and written as a
+    compressed NumPy archive on close. Entry level fields are stored under the
+    "entries/" prefix and interactions, flattened to one row per interaction and
+    keyed by PDB code, under the "interactions/" prefix. The rm interactions
+    of a job run with both models go under the "interactions_rm/" prefix. With
+    several parameter sets, interaction rows also hold the name of their set.
+    """
+
+    def __init__(self, output: Path) -> None:
+        super().__init__(output)
+        self.entries: list[dict[str, Any]] = []
+        self.interactions: list[dict[str, Any]] = []
+        self.interactions_rm: list[dict[str, Any]] = []
+
+    def attach(self) -> None:
+        raise SearchError("The npz sink cannot be shared between batch workers")
+
+    def write(self, result: BatchResult, replace: bool = False) -> None:
+        entry: dict[str, Any] = {}
+        rows = [{"_id": result["_id"], **i} for i in result["interactions"] or []]
+        rows_rm = [
+            {"_id": result["_id"], **i} for i in result.get("interactions_rm") or []
+        ]
+        configs: dict[str, dict[str, Any]] = {}
+
+        for name, config in (result.get("configs") or {}).items():
+            tag = {"_id": result["_id"], "config": name}
+
+            rows.extend({**tag, **i} for i in config["interactions"] or [])
+            rows_rm.extend({**tag, **i} for i in config.get("interactions_rm") or [])
+
+            configs[name] = {
+                k: v
+                for k, v in config.items()
+                if k not in ("interactions", "interactions_rm")
+            }
+
+        for key, value in result.items():
+            if key in ("interactions", "interactions_rm"):
+                continue
+
+            if key == "configs":
+                entry[key] = dumps(configs)
+            elif isinstance(value, (list, dict)):
+                entry[key] = dumps(value)
+            else:
+                entry[key] = value
+
+        with self.lock:
+            self.entries.append(entry)
+            self.interactions.extend(rows)
+            self.interactions_rm.extend(rows_rm)
+
+    @staticmethod
+    def _to_columns(prefix: str, rows: list[dict[str, Any]]) -> dict[str, Any]:
+        keys: dict[str, None] = {}
+
+        for row in rows:
+            keys.update(dict.fromkeys(row))
+
+        return {f"{prefix}/{k}": _to_column([row.get(k) for row in rows]) for k in keys}
+
+    def close(self) -> None:
+        from numpy import savez_compressed
+
+        if len(self.entries) == 0:
+            return
+
+        columns = {
+            **self._to_columns("entries", self.entries),
+            **self._to_columns("interactions", self.interactions),
+            **self._to_columns("interactions_rm", self.interactions_rm),
+        }
+
+        with self.output.open("wb") as f:
+            savez_compressed(f, **columns)
+
+
+def get_sink(bp: BatchParams) -> Sink:
+    if bp.sink == "mongo":
+        return MongoSink(bp)
+
+    if bp.output is None:
+        raise SearchError(f"An output path is required for the {bp.sink} sink")
+
+    if bp.sink == "jsonl":
+        return JsonlSink(bp.output)
+
+    if bp.sink == "sqlite":
+        return SQLiteSink(bp.output)
+
+    return NpzSink(bp.output)
@@ -0,0 +1,204 @@
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from random import Random
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Any
+from .errors import SearchError
+
+CHUNK_SIZE = 16384
+
+
+@dataclass(frozen=True)
+class ServerProfile:
+    latency: float = 0.0
+    jitter: float = 0.0
+    bandwidth: float | None = None
+    error_rate: float = 0.0
+    max_concurrency: int | None = None
+    max_rate: float | None = None
+
+
+PROFILES = {
+    "local": ServerProfile(),
+    "lan": ServerProfile(latency=0.002, jitter=0.001, bandwidth=100e6),
+    "wan": ServerProfile(latency=0.08, jitter=0.04, bandwidth=5e6),
+    "flaky": ServerProfile(latency=0.02, jitter=0.01, error_rate=0.1),
+    "throttled": ServerProfile(latency=0.02, max_concurrency=4, max_rate=50.0),
+}
+
+
+def get_profile(name: str, **overrides: Any) -> ServerProfile:
+    if name not in PROFILES:
+        raise SearchError(f"Unknown server profile '{name}'")
+
+    fields = asdict(PROFILES[name])
+    fields.update({k: v for k, v in overrides.items() if v is not None})
+
+    return ServerProfile(**fields)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = monotonic()
+
+    def take(self) -> bool:
+        now = monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class StandInServer:
+    """
+    An HTTP server standing in for a PDB mirror. Entries are served from a
+    directory of .ent.gz files, laid out either like the wwPDB divided
+    directories or flat. Latency, bandwidth, injected errors (503) and
+    throttling (429) follow a ServerProfile.
+    """
+
+    def __init__(
+        self, directory: Path, profile: ServerProfile, seed: int | None = None
+    ) -> None:
+        if not directory.is_dir():
+            raise SearchError(f"Directory {directory} does not exist")
+
+        self.directory = directory
+        self.profile = profile
+
+        self.lock = Lock()
+        self.random = Random(seed)
+        self.bucket = (
+            None if profile.max_rate is None else _TokenBucket(profile.max_rate)
+        )
+        self.in_flight = 0
+        self.stats = {
+            "requests": 0,
+            "served": 0,
+            "bytes": 0,
+            "errors": 0,
+            "throttled": 0,
+            "not_found": 0,
+        }
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._get_handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def resolve(self, request_path: str) -> Path | None:
+        # Only ever serve files named like PDB entries, from the divided layout or a flat directory
+        name = request_path.rsplit("/", 1)[-1]
+
+        if not (name.startswith("pdb") and name.endswith(".ent.gz")):
+            return None
+
+        for path in (self.directory / name[4:6] / name, self.directory / name):
+            if path.is_file():
+                return path
+
+        return None
+
+    def admit(self) -> int:
+        # Decide the status of a request before any latency is applied
+        with self.lock:
+            self.stats["requests"] += 1
+
+            if self.bucket is not None and not self.bucket.take():
+                self.stats["throttled"] += 1
+                return 429
+
+            limit = self.profile.max_concurrency
+
+            if limit is not None and self.in_flight >= limit:
+                self.stats["throttled"] += 1
+                return 429
+
+            if self.random.random() < self.profile.error_rate:
+                self.stats["errors"] += 1
+                return 503
+
+            self.in_flight += 1
+            delay = self.profile.latency + self.random.uniform(
+                -self.profile.jitter, self.profile.jitter
+            )
+
+        sleep(max(0.0, delay))
+        return 200
+
+    def release(self, num_bytes: int, found: bool) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+            if found:
+                self.stats["served"] += 1
+                self.stats["bytes"] += num_bytes
+            else:
+                self.stats["not_found"] += 1
+
+    def _get_handler(self) -> type[BaseHTTPRequestHandler]:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                status = stand_in.admit()
+
+                if status != 200:
+                    self.send_error(status)
+                    return
+
+                path = stand_in.resolve(self.path)
+
+                if path is None:
+                    stand_in.release(0, found=False)
+                    self.send_error(404)
+                    return
+
+                data = path.read_bytes()
+
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/gzip")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self._write_paced(data)
+                finally:
+                    stand_in.release(len(data), found=True)
+
+            def _write_paced(self, data: bytes) -> None:
+                bandwidth = stand_in.profile.bandwidth
+
+                for i in range(0, len(data), CHUNK_SIZE):
+                    chunk = data[i : i + CHUNK_SIZE]
+                    self.wfile.write(chunk)
+
+                    if bandwidth is not None:
+                        sleep(len(chunk) / bandwidth)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        Thread(target=self.server.serve_forever, daemon=True, name="StandIn").start()
+        return self.url
+
+    def stop(self) -> dict[str, int]:
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.lock:
+            return dict(self.stats)
@@ -0,0 +1,269 @@
+from gzip import GzipFile
+from io import TextIOWrapper
+from math import ceil
+from pathlib import Path
+from typing import Iterator, TextIO
+from numpy import array, cos, pi, random, sin, sqrt, stack
+from .aliases import FloatArray
+from .errors import SearchError
+from .models import SyntheticParams
+
+CHAIN_IDS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+# Residue numbers above 999 run into the chain identifier column, which breaks the
+# whitespace split used when extracting coordinates. Only the filler residues,
+# which are never extracted, may therefore be numbered beyond 999
+MAX_TARGET_RESIDUES = 999
+MAX_RESIDUES = 9999
+
+# Coordinates must fit into 8 columns with a leading space. Keep them in [MARGIN, MAX_COORDINATE]
+MARGIN = 10.0
+MAX_COORDINATE = 990.0
+
+# Atom name, element and position relative to CA. Taken from 1RCY
+TEMPLATES: dict[str, list[tuple[str, str, tuple[float, float, float]]]] = {
+    "MET": [
+        ("N", "N", (1.109, -0.485, 0.812)),
+        ("CA", "C", (0.0, 0.0, 0.0)),
+        ("C", "C", (0.335, 0.054, -1.488)),
+        ("O", "O", (-0.487, -0.32, -2.325)),
+        ("CB", "C", (-0.473, 1.369, 0.49)),
+        ("CG", "C", (-1.102, 1.342, 1.881)),
+        ("SD", "S", (-1.883, 2.902, 2.28)),
+        ("CE", "C", (-0.514, 3.768, 2.948)),
+    ],
+    "PHE": [
+        ("N", "N", (0.88, -0.986, -0.604)),
+        ("CA", "C", (0.0, 0.0, 0.0)),
+        ("C", "C", (-0.418, 0.956, -1.117)),
+        ("O", "O", (0.425, 1.396, -1.903)),
+        ("CB", "C", (0.731, 0.777, 1.103)),
+        ("CG", "C", (-0.102, 1.857, 1.74)),
+        ("CD1", "C", (-0.9, 1.576, 2.84)),
+        ("CD2", "C", (-0.11, 3.15, 1.221)),
+        ("CE1", "C", (-1.695, 2.562, 3.415)),
+        ("CE2", "C", (-0.901, 4.139, 1.789)),
+        ("CZ", "C", (-1.696, 3.842, 2.89)),
+    ],
+    "TYR": [
+        ("N", "N", (0.749, 0.54, -1.127)),
+        ("CA", "C", (0.0, 0.0, 0.0)),
+        ("C", "C", (-1.159, -0.854, -0.506)),
+        ("O", "O", (-1.638, -0.663, -1.633)),
+        ("CB", "C", (-0.523, 1.142, 0.874)),
+        ("CG", "C", (0.574, 2.028, 1.421)),
+        ("CD1", "C", (1.162, 3.008, 0.621)),
+        ("CD2", "C", (1.044, 1.867, 2.729)),
+        ("CE1", "C", (2.196, 3.809, 1.107)),
+        ("CE2", "C", (2.077, 2.664, 3.227)),
+        ("CZ", "C", (2.647, 3.63, 2.411)),
+        ("OH", "O", (3.657, 4.429, 2.892)),
+    ],
+    "TRP": [
+        ("N", "N", (-1.309, 0.6, 0.125)),
+        ("CA", "C", (0.0, 0.0, 0.0)),
+        ("C", "C", (0.391, -0.811, 1.223)),
+        ("O", "O", (0.012, -0.488, 2.351)),
+        ("CB", "C", (1.029, 1.09, -0.285)),
+        ("CG", "C", (0.748, 1.84, -1.554)),
+        ("CD1", "C", (-0.042, 2.946, -1.699)),
+        ("CD2", "C", (1.248, 1.527, -2.858)),
+        ("NE1", "N", (-0.066, 3.341, -3.016)),
+        ("CE2", "C", (0.709, 2.489, -3.749)),
+        ("CE3", "C", (2.092, 0.533, -3.36)),
+        ("CZ2", "C", (0.994, 2.474, -5.117)),
+        ("CZ3", "C", (2.373, 0.523, -4.718)),
+        ("CH2", "C", (1.823, 1.486, -5.579)),
+    ],
+    "ALA": [
+        ("N", "N", (-0.594, 1.321, 0.086)),
+        ("CA", "C", (0.0, 0.0, 0.0)),
+        ("C", "C", (1.504, 0.085, 0.156)),
+        ("O", "O", (2.122, 1.067, -0.244)),
+        ("CB", "C", (-0.342, -0.641, -1.337)),
+    ],
+    "HOH": [
+        ("O", "O", (0.0, 0.0, 0.0)),
+    ],
+}
+
+
+def _get_random_rotations(rng: random.Generator, num: int) -> FloatArray:
+    # Uniformly distributed rotations from uniformly distributed unit quaternions
+    u1, u2, u3 = rng.random((3, num))
+
+    w = sqrt(1 - u1) * sin(2 * pi * u2)
+    x = sqrt(1 - u1) * cos(2 * pi * u2)
+    y = sqrt(u1) * sin(2 * pi * u3)
+    z = sqrt(u1) * cos(2 * pi * u3)
+
+    return stack(
+        [
+            stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)]),
+            stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)]),
+            stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]),
+        ]
+    ).transpose(2, 0, 1)
+
+
+def _get_sequence(params: SyntheticParams, rng: random.Generator) -> list[str]:
+    # Met and aromatic residues in random order, followed by filler and water
+    targets = (
+        ["MET"] * params.met
+        + ["PHE"] * params.phe
+        + ["TYR"] * params.tyr
+        + ["TRP"] * params.trp
+    )
+    rng.shuffle(targets)
+
+    return targets + ["ALA"] * params.filler + ["HOH"] * params.waters
+
+
+def _get_centers(
+    params: SyntheticParams, rng: random.Generator, num: int
+) -> FloatArray:
+    # Residues are placed on randomly chosen cells of a cubic lattice whose spacing is
+    # set by the density, in residues per cubic nanometer, then jittered within the cell
+    spacing = (1000.0 / params.density) ** (1 / 3)
+    cells_per_side = ceil(num ** (1 / 3))
+
+    if MARGIN + cells_per_side * spacing > MAX_COORDINATE:
+        raise SearchError(
+            "Structure does not fit into PDB coordinate columns. Increase the density"
+        )
+
+    cells = rng.choice(cells_per_side**3, size=num, replace=False)
+    indices = stack(
+        [
+            cells // cells_per_side**2,
+            (cells // cells_per_side) % cells_per_side,
+            cells % cells_per_side,
+        ],
+        axis=1,
+    )
+    jitter = rng.uniform(-0.25, 0.25, size=(num, 3))
+
+    centers: FloatArray = MARGIN + (indices + 0.5 + jitter) * spacing
+    return centers
+
+
+def _format_atom(
+    serial: int,
+    name: str,
+    residue: str,
+    chain: str,
+    position: int,
+    coords: list[float],
+    element: str,
+) -> str:
+    record = "HETATM" if residue == "HOH" else "ATOM"
+    name = name if len(name) == 4 else f" {name}"
+    x, y, z = coords
+
+    return (
+        f"{record:<6}{serial % 100000:>5} {name:<4} {residue:>3} {chain}{position:>4}    "
+        f"{x:>8.3f}{y:>8.3f}{z:>8.3f}  1.00 20.00          {element:>2}  \n"
+    )
+
+
+def _format_ter(serial: int, chain: str, residue: str, position: int) -> str:
+    return f"TER   {serial % 100000:>5}      {residue:>3} {chain}{position:>4}\n"
+
+
+def generate_pdb_lines(params: SyntheticParams) -> Iterator[str]:
+    if params.met + params.phe + params.tyr + params.trp > MAX_TARGET_RESIDUES:
+        raise SearchError(
+            f"At most {MAX_TARGET_RESIDUES} Met and aromatic residues per chain are supported"
+        )
+
+    rng = random.default_rng(params.seed)
+    sequences = [_get_sequence(params, rng) for _ in range(params.chains)]
+
+    if len(sequences[0]) > MAX_RESIDUES:
+        raise SearchError(f"At most {MAX_RESIDUES} residues per chain are supported")
+
+    residues = [
+        (chain, position, residue)
+        for chain, sequence in zip(CHAIN_IDS, sequences)
+        for position, residue in enumerate(sequence, start=1)
+    ]
+
+    centers = _get_centers(params, rng, len(residues))
+    rotations = _get_random_rotations(rng, len(residues))
+
+    # Coordinates of the first model. Further models are perturbations of the first
+    coords = []
+
+    for (_, _, residue), center, rotation in zip(residues, centers, rotations):
+        template = array([xyz for _, _, xyz in TEMPLATES[residue]])
+        coords.append(template @ rotation.T + center)
+
+    yield f"HEADER    SYNTHETIC STRUCTURE{' ' * 24}01-JAN-00   XXXX\n"
+    yield "TITLE     SYNTHETIC STRUCTURE GENERATED BY METAROMATIC\n"
+
+    for key, value in params.model_dump().items():
+        yield f"REMARK   1 {key.upper()}: {value}\n"
+
+    for model in range(1, params.models + 1):
+        if params.models > 1:
+            yield f"MODEL     {model:>4}\n"
+
+        serial = 1
+
+        # A water before the first residue means there is no chain to terminate yet
+        previous_chain = ""
+        previous_residue = "HOH"
+        previous_position = 0
+
+        for (chain, position, residue), residue_coords in zip(residues, coords):
+            # Terminate each chain after its last polymer residue, before any water
+            if previous_residue != "HOH" and (
+                residue == "HOH" or chain != previous_chain
+            ):
+                yield _format_ter(
+                    serial, previous_chain, previous_residue, previous_position
+                )
+                serial += 1
+
+            if model > 1:
+                residue_coords = residue_coords + rng.normal(
+                    0, 0.3, size=residue_coords.shape
+                )
+
+            # Python floats format several times faster than NumPy scalars
+            for (name, element, _), xyz in zip(
+                TEMPLATES[residue], residue_coords.tolist()
+            ):
+                yield _format_atom(serial, name, residue, chain, position, xyz, element)
+                serial += 1
+
+            previous_chain = chain
+            previous_residue = residue
+            previous_position = position
+
+        if params.models > 1:
+            yield "ENDMDL\n"
+
+    yield "END\n"
+
+
+def write_structure(params: SyntheticParams, path: Path) -> int:
+    # Returns the number of atom records written
+    handle: TextIO
+
+    if path.suffix == ".gz":
+        # A fixed mtime keeps the output byte for byte reproducible for a given seed
+        handle = TextIOWrapper(GzipFile(path, "wb", compresslevel=6, mtime=0))
+    else:
+        handle = path.open("w")
+
+    num_atoms = 0
+
+    with handle:
+        for line in generate_pdb_lines(params):
+            if line.startswith(("ATOM", "HETATM")):
+                num_atoms += 1
+
+            handle.write(line)
+
+    return num_atoms
@@ -1,25 +1,10 @@
 from functools import cache
-from os import get_terminal_size
 from re import compile, Pattern  # pylint: disable=redefined-builtin
 from typing import Any
 from numpy import linalg, eye, dot, degrees, arccos
 from .aliases import Residues, FloatArray
 
 
-@cache
-def _get_separator() -> str:
-    try:
-        separator = get_terminal_size()[0] * "-"
-    except OSError:
-        separator = 25 * "-"
-
-    return separator
-
-
-def print_separator() -> None:
-    print(_get_separator())
-
-
 def get_unit_vector(v: FloatArray) -> FloatArray:
     return v / linalg.norm(v)
 
@@ -1,8 +1,12 @@
+from gzip import compress
+from http.server import ThreadingHTTPServer
 from json import loads
 from pathlib import Path
+from typing import Generator
 from click.testing import CliRunner
-from pytest import fixture
-from utils import Defaults
+from pytest import fixture, TempPathFactory
+from utils import get_base_url, start_stand_in_server, Defaults, StandInHandler
+from MetAromatic.mirrors import configure_mirrors, DEFAULT_MIRRORS
 from MetAromatic.models import DictInteractions
 
 
@@ -33,3 +37,36 @@ def valid_results_1rcy(resources: Path) -> list[DictInteractions]:
 
     results: list[DictInteractions] = loads(raw_results)
     return results
+
+
+@fixture(scope="session")
+def mirror_dir(tmp_path_factory: TempPathFactory, pdb_file_1rcy: Path) -> Path:
+    # Serves 1rcy and a copy of 1rcy stripped of methionines under the made up code 9xyz
+    directory = tmp_path_factory.mktemp("mirror")
+    contents = pdb_file_1rcy.read_text()
+
+    (directory / "rc").mkdir()
+    (directory / "rc" / "pdb1rcy.ent.gz").write_bytes(compress(contents.encode()))
+
+    no_met = "".join(l for l in contents.splitlines(True) if " MET " not in l)
+    (directory / "xy").mkdir()
+    (directory / "xy" / "pdb9xyz.ent.gz").write_bytes(compress(no_met.encode()))
+
+    return directory
+
+
+@fixture
+def fast_mirror(mirror_dir: Path) -> Generator[str, None, None]:
+    server = start_stand_in_server(mirror_dir)
+    yield get_base_url(server)
+    server.shutdown()
+    configure_mirrors(DEFAULT_MIRRORS)
+
+
+@fixture
+def dead_mirror() -> str:
+    # Bind and immediately release a port so that nothing is listening on it
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    url = get_base_url(server)
+    server.server_close()
+    return url
@@ -0,0 +1,111 @@
+from gzip import compress
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from threading import Lock, Thread
+from time import sleep
+from click.testing import CliRunner
+from MetAromatic.admission import EXPANSION, MemoryBudget, estimate_entry_memory
+from MetAromatic.runner import cli
+
+
+def test_estimate_entry_memory(pdb_file_1rcy: Path) -> None:
+    contents = pdb_file_1rcy.read_bytes()
+
+    assert estimate_entry_memory(compress(contents)) == EXPANSION * len(contents)
+    assert estimate_entry_memory(b"ATOM") == EXPANSION * 4
+
+
+class Tracker:
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.reserved = 0
+        self.peak_reserved = 0
+        self.large = 0
+        self.peak_large = 0
+
+    def run(self, budget: MemoryBudget, cost: int) -> None:
+        large = min(cost, budget.budget) > budget.large_entry
+
+        with budget.admit(cost):
+            with self.lock:
+                self.reserved += min(cost, budget.budget)
+                self.peak_reserved = max(self.peak_reserved, self.reserved)
+                self.large += large
+                self.peak_large = max(self.peak_large, self.large)
+
+            sleep(0.01)
+
+            with self.lock:
+                self.reserved -= min(cost, budget.budget)
+                self.large -= large
+
+
+def test_memory_budget() -> None:
+    budget = MemoryBudget(100, large_entry=25)
+    tracker = Tracker()
+
+    # Small, large and over budget entries all get through
+    costs = [10, 20, 60, 5, 150, 30, 10, 25, 40, 10] * 3
+    threads = [Thread(target=tracker.run, args=(budget, cost)) for cost in costs]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert tracker.peak_reserved <= 100
+    assert tracker.peak_large == 1
+    assert budget.peak_reserved == tracker.peak_reserved
+    assert budget.num_large == 12
+    assert budget.reserved == 0
+
+
+def test_batch_memory_budget(
+    cli_runner: CliRunner, fast_mirror: str, tmp_path: Path
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy, 9xyz\n")
+
+    outputs: list[Path] = []
+
+    for extra in ([], ["--memory-budget", "1"]):
+        output = tmp_path / f"results_{len(outputs)}.jsonl"
+        command = [
+            "--mirror",
+            fast_mirror,
+            "batch",
+            str(batch_file),
+            "--threads",
+            "2",
+            *extra,
+            "--sink",
+            "jsonl",
+            "-o",
+            str(output),
+        ]
+
+        result = cli_runner.invoke(cli, command)
+        assert result.exit_code == EX_OK, result.output
+        outputs.append(output)
+
+    unlimited, limited = (
+        {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+        for output in outputs
+    )
+
+    doc = limited["1rcy"]
+    assert "admit" in [t["stage"] for t in doc["timings"]]
+    assert doc["memory_estimate"] >= doc["peak_memory"] > 0
+    assert doc["interactions"] == unlimited["1rcy"]["interactions"]
+
+    assert limited["9xyz"]["errmsg"] == "No MET residues"
+    assert limited["9xyz"]["peak_memory"] is None
+    assert "memory_estimate" not in unlimited["9xyz"]
+
+    info = loads((tmp_path / "results_1_info.jsonl").read_text())
+    assert info["memory_budget"] == 1
+    assert info["peak_reserved_memory"] == doc["memory_estimate"]
+    # Both entries exceed an even share of the budget, so they take turns
+    assert info["large_entries"] == 2
@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Generator
+import pytest
+from utils import compare_interactions, Defaults
+from MetAromatic import async_get_bridges, async_get_pairs_from_pdb
+from MetAromatic.aio_http import get_http_pool
+from MetAromatic.errors import DownloadError, SearchError
+from MetAromatic.mirrors import configure_mirrors, DEFAULT_MIRRORS
+from MetAromatic.models import DictInteractions
+from MetAromatic.stand_in import ServerProfile, StandInServer
+
+
+@pytest.fixture
+def keep_alive_mirror(mirror_dir: Path) -> Generator[StandInServer, None, None]:
+    server = StandInServer(mirror_dir, ServerProfile(latency=0.05))
+    configure_mirrors([server.start()])
+    yield server
+    server.stop()
+    configure_mirrors(DEFAULT_MIRRORS)
+
+
+def test_pairs(
+    keep_alive_mirror: StandInServer,
+    defaults: Defaults,
+    valid_results_1rcy: list[DictInteractions],
+) -> None:
+    fs = asyncio.run(async_get_pairs_from_pdb(pdb_code="1rcy", **defaults))
+    compare_interactions(fs.serialize_interactions(), valid_results_1rcy)
+
+
+def test_bridges(keep_alive_mirror: StandInServer) -> None:
+    async def query() -> list[set[str]]:
+        with ThreadPoolExecutor(2) as executor:
+            bs = await async_get_bridges(
+                chain="A",
+                code="1rcy",
+                cutoff_angle=109.5,
+                cutoff_distance=7.0,
+                model="cp",
+                vertices=3,
+                executor=executor,
+            )
+
+        return bs.bridges
+
+    assert asyncio.run(query()) == [{"MET148", "PHE51", "PHE54"}]
+
+
+def test_concurrent_queries_share_connections(
+    keep_alive_mirror: StandInServer, defaults: Defaults
+) -> None:
+    async def query() -> tuple[int, int]:
+        await asyncio.gather(
+            *(async_get_pairs_from_pdb(pdb_code="1rcy", **defaults) for _ in range(40))
+        )
+        pool = get_http_pool()
+        return pool.num_connections, sum(map(len, pool.idle.values()))
+
+    num_connections, num_idle = asyncio.run(query())
+
+    # Idle connections are closed once the last query is done
+    assert num_connections <= 8
+    assert num_idle == 0
+    assert keep_alive_mirror.stats["served"] == 40
+
+
+def test_invalid_code(keep_alive_mirror: StandInServer, defaults: Defaults) -> None:
+    with pytest.raises(SearchError, match="Invalid PDB entry 'spam'"):
+        asyncio.run(async_get_pairs_from_pdb(pdb_code="spam", **defaults))
+
+
+def test_invalid_params(keep_alive_mirror: StandInServer) -> None:
+    query = async_get_pairs_from_pdb(
+        pdb_code="1rcy", chain="A", cutoff_angle=109.5, cutoff_distance=-1.0, model="cp"
+    )
+
+    with pytest.raises(SearchError, match="cutoff_distance: Input should be greater"):
+        asyncio.run(query)
+
+
+def test_timeout(mirror_dir: Path, defaults: Defaults) -> None:
+    server = StandInServer(mirror_dir, ServerProfile(latency=2.0))
+    configure_mirrors([server.start()], hedge_delay=10.0)
+
+    try:
+        with pytest.raises(TimeoutError):
+            asyncio.run(
+                async_get_pairs_from_pdb(pdb_code="1rcy", timeout=0.2, **defaults)
+            )
+    finally:
+        server.stop()
+        configure_mirrors(DEFAULT_MIRRORS)
+
+
+def test_cancellation(keep_alive_mirror: StandInServer, defaults: Defaults) -> None:
+    async def query() -> None:
+        task = asyncio.create_task(
+            async_get_pairs_from_pdb(pdb_code="1rcy", **defaults)
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(query())
+
+
+def test_dead_mirror(dead_mirror: str, defaults: Defaults) -> None:
+    configure_mirrors([dead_mirror])
+
+    try:
+        with pytest.raises(DownloadError, match="All mirrors failed for '1rcy'"):
+            asyncio.run(async_get_pairs_from_pdb(pdb_code="1rcy", **defaults))
+    finally:
+        configure_mirrors(DEFAULT_MIRRORS)
+
+
+def test_non_http_mirror(
+    mirror_dir: Path, defaults: Defaults, valid_results_1rcy: list[DictInteractions]
+) -> None:
+    # Schemes other than HTTP fall back to the thread pool of the mirror pool
+    configure_mirrors([mirror_dir.as_uri()])
+
+    try:
+        fs = asyncio.run(async_get_pairs_from_pdb(pdb_code="1rcy", **defaults))
+    finally:
+        configure_mirrors(DEFAULT_MIRRORS)
+
+    compare_interactions(fs.serialize_interactions(), valid_results_1rcy)
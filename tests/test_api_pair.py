@@ -48,7 +48,7 @@ def test_pair_invalid_pdb_code(defaults: Defaults) -> None:
             "cp",
             "cutoff_angle: Input should be less than or equal to 360",
         ),
-        ("1rcy", 4.95, 109.5, "pc", "model: Input should be 'cp' or 'rm'"),
+        ("1rcy", 4.95, 109.5, "pc", "model: Input should be 'cp', 'rm' or 'both'"),
         (
             "1rcy",
             "4.95",
@@ -57,7 +57,7 @@ def test_pair_invalid_pdb_code(defaults: Defaults) -> None:
             "cutoff_distance: Input should be a valid number",
         ),
         ("1rcy", 4.95, "109.5", "cp", "cutoff_angle: Input should be a valid number"),
-        ("1rcy", 4.95, 109.5, 25, "model: Input should be 'cp' or 'rm'"),
+        ("1rcy", 4.95, 109.5, 25, "model: Input should be 'cp', 'rm' or 'both'"),
     ],
 )
 def test_pair_validation(
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+from utils import compare_interactions
+from MetAromatic import get_pairs_many
+from MetAromatic.errors import SearchError
+from MetAromatic.mirrors import configure_mirrors
+from MetAromatic.models import DictInteractions, FeatureSpace, get_params
+
+
+def test_codes_and_paths(
+    fast_mirror: str,
+    pdb_file_1rcy: Path,
+    valid_results_1rcy: list[DictInteractions],
+) -> None:
+    configure_mirrors([fast_mirror])
+    results = dict(get_pairs_many(["1rcy", pdb_file_1rcy, "spam"], workers=2))
+
+    assert sorted(results) == sorted(["1rcy", str(pdb_file_1rcy), "spam"])
+
+    for entry in ("1rcy", str(pdb_file_1rcy)):
+        fs = results[entry]
+        assert isinstance(fs, FeatureSpace)
+        compare_interactions(fs.serialize_interactions(), valid_results_1rcy)
+
+    assert isinstance(results["spam"], SearchError)
+    assert "Invalid PDB entry 'spam'" in str(results["spam"])
+
+
+def test_params(fast_mirror: str) -> None:
+    configure_mirrors([fast_mirror])
+    params = get_params(chain="B")
+
+    for _, result in get_pairs_many(["1rcy", "9xyz"], params):
+        assert isinstance(result, SearchError)
+
+
+def test_lazy_submission(pdb_file_1rcy: Path) -> None:
+    consumed = []
+
+    def entries() -> Iterator[Path]:
+        for i in range(10):
+            consumed.append(i)
+            yield pdb_file_1rcy
+
+    results = get_pairs_many(entries(), workers=1)
+    next(results)
+
+    # The first result is available long before the generator is exhausted
+    assert len(consumed) < 10
+    assert len(list(results)) == 9
+
+
+def test_process_pool(
+    pdb_file_1rcy: Path, valid_results_1rcy: list[DictInteractions]
+) -> None:
+    with ProcessPoolExecutor(2) as executor:
+        results = list(get_pairs_many([pdb_file_1rcy] * 3, executor=executor))
+
+    assert len(results) == 3
+
+    for _, fs in results:
+        assert isinstance(fs, FeatureSpace)
+        compare_interactions(fs.serialize_interactions(), valid_results_1rcy)
@@ -0,0 +1,90 @@
+from json import dumps, loads
+from os import EX_OK
+from pathlib import Path
+from click.testing import CliRunner
+from MetAromatic.benchmark import find_regressions, run_benchmarks
+from MetAromatic.models import MetAromaticParams
+from MetAromatic.runner import cli
+
+PARAMS = MetAromaticParams(
+    chain="A", cutoff_angle=109.5, cutoff_distance=4.9, model="cp"
+)
+
+
+def test_run_benchmarks(pdb_file_1rcy: Path) -> None:
+    results = run_benchmarks([pdb_file_1rcy], PARAMS, repeats=2, warmup=0)
+
+    assert results["repeats"] == 2
+    assert results["throughput"]["entries_per_second"] > 0
+    assert [name.split("/")[1] for name in results["results"]] == [
+        "load",
+        "parse",
+        "prefilter",
+        "lone_pairs",
+        "midpoints",
+        "criteria",
+        "bridges",
+        "serialization",
+        "end_to_end",
+    ]
+
+
+def test_find_regressions() -> None:
+    baseline = {"results": {"a": {"median": 0.010}, "b": {"median": 0.010}}}
+    results = {
+        "results": {
+            "a": {"median": 0.020},
+            "b": {"median": 0.011},
+            "c": {"median": 1.0},
+        }
+    }
+
+    regressions = find_regressions(results, baseline, threshold=0.25)
+
+    assert [r.name for r in regressions] == ["a"]
+    assert regressions[0].ratio == 2.0
+
+
+def test_find_regressions_ignores_noise() -> None:
+    baseline = {"results": {"a": {"median": 1e-6}}}
+    results = {"results": {"a": {"median": 10e-6}}}
+
+    assert find_regressions(results, baseline, threshold=0.25) == []
+
+
+def test_benchmark_gates_on_baseline(
+    cli_runner: CliRunner, pdb_file_1rcy: Path, tmp_path: Path
+) -> None:
+    baseline = tmp_path / "baseline.json"
+
+    command = f"benchmark {pdb_file_1rcy} --repeats 1 -o {baseline}"
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    command = (
+        f"benchmark {pdb_file_1rcy} --repeats 1 --baseline {baseline} --threshold 100"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    data = loads(baseline.read_text())
+
+    for summary in data["results"].values():
+        summary["median"] /= 1000
+
+    baseline.write_text(dumps(data))
+
+    command = f"benchmark {pdb_file_1rcy} --repeats 1 --baseline {baseline}"
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code != EX_OK
+    assert "Regression in data_1rcy.pdb/end_to_end" in result.output
+
+
+def test_benchmark_missing_baseline(
+    cli_runner: CliRunner, pdb_file_1rcy: Path, tmp_path: Path
+) -> None:
+    command = f"benchmark {pdb_file_1rcy} --baseline {tmp_path / 'missing.json'}"
+
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code != EX_OK
+    assert "does not exist" in result.output
@@ -0,0 +1,86 @@
+from io import StringIO
+from os import pipe
+from pathlib import Path
+from threading import Event, Thread
+from typing import Iterator
+import pytest
+from MetAromatic.code_source import CodeSet, CodeSource, BLOCK_SIZE
+from MetAromatic.errors import SearchError
+
+
+def test_normalize_and_deduplicate(tmp_path: Path) -> None:
+    path = tmp_path / "codes.txt"
+    path.write_text("1RCY, 1rcy;2ca1\n\n 1abc  spam 2CA1,1a_c\n1a_c\n")
+
+    source = CodeSource(path)
+
+    assert list(source) == ["1rcy", "2ca1", "1abc", "spam", "1a_c"]
+    assert source.num_codes == 5
+    assert source.num_duplicates == 3
+
+
+def test_codes_split_across_blocks() -> None:
+    codes = [f"{i:04x}" for i in range(BLOCK_SIZE // 4)]
+    source = CodeSource(StringIO(",".join(codes)))
+
+    assert list(source) == codes
+
+
+def test_generator_is_read_lazily() -> None:
+    consumed = []
+
+    def get_lines() -> Iterator[str]:
+        for line in ("1rcy 2ca1", "1abc"):
+            consumed.append(line)
+            yield line
+
+    source = CodeSource(get_lines())
+
+    assert next(source) == "1rcy"
+    assert consumed == ["1rcy 2ca1"]
+
+
+def test_pipe_is_read_incrementally() -> None:
+    read_fd, write_fd = pipe()
+    received, closed = Event(), Event()
+
+    def write_codes() -> None:
+        with open(write_fd, "w", encoding="utf-8") as f:
+            f.write("1rcy\n")
+            f.flush()
+
+            received.wait(timeout=5)
+            f.write("2ca1\n")
+
+        closed.set()
+
+    writer = Thread(target=write_codes)
+    writer.start()
+
+    with open(read_fd, encoding="utf-8") as f:
+        source = CodeSource(f)
+
+        assert next(source) == "1rcy"
+        assert not closed.is_set()
+
+        received.set()
+        assert list(source) == ["2ca1"]
+
+    writer.join()
+
+
+def test_missing_file(tmp_path: Path) -> None:
+    with pytest.raises(SearchError, match="does not exist"):
+        CodeSource(tmp_path / "missing.txt")
+
+
+def test_code_set() -> None:
+    codes = CodeSet()
+
+    assert codes.add("zzzz")
+    assert codes.add("0000")
+    assert codes.add("1-ab")
+    assert not codes.add("zzzz")
+    assert not codes.add("1-ab")
+    assert "0000" in codes
+    assert "0001" not in codes
@@ -0,0 +1,98 @@
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from time import monotonic
+from click.testing import CliRunner
+import pytest
+from MetAromatic.errors import DownloadError, SearchError
+from MetAromatic.harness import find_pdb_codes
+from MetAromatic.mirrors import MirrorPool
+from MetAromatic.runner import cli
+from MetAromatic.stand_in import ServerProfile, StandInServer, get_profile
+
+
+def fetch(
+    directory: Path, profile: ServerProfile, code: str
+) -> tuple[bytes, dict[str, int]]:
+    server = StandInServer(directory, profile, seed=0)
+    pool = MirrorPool([server.start()], timeout=5)
+
+    try:
+        return pool.fetch(code), server.stats
+    finally:
+        server.stop()
+
+
+def test_serves_divided_and_flat_layouts(mirror_dir: Path, tmp_path: Path) -> None:
+    data, stats = fetch(mirror_dir, ServerProfile(), "1rcy")
+    assert stats["served"] == 1
+
+    (tmp_path / "pdb1rcy.ent.gz").write_bytes(data)
+    assert fetch(tmp_path, ServerProfile(), "1rcy")[0] == data
+
+
+def test_missing_entry(mirror_dir: Path) -> None:
+    with pytest.raises(SearchError, match="Invalid PDB entry 'abcd'"):
+        fetch(mirror_dir, ServerProfile(), "abcd")
+
+
+def test_injected_errors(mirror_dir: Path) -> None:
+    with pytest.raises(DownloadError, match="Service Unavailable"):
+        fetch(mirror_dir, ServerProfile(error_rate=1.0), "1rcy")
+
+
+def test_bandwidth_limit(mirror_dir: Path) -> None:
+    size = (mirror_dir / "rc" / "pdb1rcy.ent.gz").stat().st_size
+    start = monotonic()
+
+    fetch(mirror_dir, ServerProfile(bandwidth=size / 0.5), "1rcy")
+    assert monotonic() - start >= 0.45
+
+
+def test_get_profile() -> None:
+    profile = get_profile("wan", latency=0.5, error_rate=None)
+
+    assert profile.latency == 0.5
+    assert profile.bandwidth == 5e6
+
+    with pytest.raises(SearchError, match="Unknown server profile 'spam'"):
+        get_profile("spam")
+
+
+def test_find_pdb_codes(mirror_dir: Path) -> None:
+    assert find_pdb_codes(mirror_dir) == ["1rcy", "9xyz"]
+
+
+def test_batch_harness(cli_runner: CliRunner, mirror_dir: Path, tmp_path: Path) -> None:
+    output = tmp_path / "results.jsonl"
+    report = tmp_path / "report.json"
+
+    # A single thread, and retries with enough backoff that a request sent before
+    # the server released the previous one cannot exhaust them
+    command = (
+        f"batch-harness {mirror_dir} -o {output} --report {report} "
+        "--server-profile throttled --max-concurrency 1 --threads 1 "
+        "--backoff 0.1 --retries 5"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    data = loads(report.read_text())
+
+    assert data["entries"] == 2
+    assert data["errors"] == {"no_interaction": 1}
+    assert data["server"]["served"] == 2
+    assert data["profile"]["max_concurrency"] == 1
+    assert 0 < data["latency"]["p50"] <= data["latency"]["p99"]
+    assert data["cpu"]["seconds"] > 0
+    assert "Throughput:" in result.output
+
+
+def test_batch_harness_rejects_empty_directory(
+    cli_runner: CliRunner, tmp_path: Path
+) -> None:
+    command = f"batch-harness {tmp_path} -o {tmp_path / 'results.jsonl'}"
+
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code != EX_OK
+    assert "No .ent.gz files found" in result.output
@@ -0,0 +1,86 @@
+from pathlib import Path
+import pytest
+from MetAromatic import get_pairs_from_file
+from MetAromatic.get_bridge import isolate_bridges
+from MetAromatic.models import FeatureSpace, Interactions
+
+
+def get_feature_space(pairs: list[tuple[str, int, int]]) -> FeatureSpace:
+    fs = FeatureSpace()
+
+    for residue, aromatic_position, methionine_position in pairs:
+        fs.interactions.append(
+            Interactions(
+                aromatic_position=aromatic_position,
+                aromatic_residue=residue,
+                met_phi_angle=0.0,
+                met_theta_angle=0.0,
+                methionine_position=methionine_position,
+                norm=5.0,
+            )
+        )
+
+    return fs
+
+
+@pytest.fixture
+def fs() -> FeatureSpace:
+    # PHE1 - MET10 - TYR2, TRP3 - MET11 - PHE4 - MET12 and a lone PHE5 - MET13 pair
+    return get_feature_space(
+        [
+            ("PHE", 1, 10),
+            ("TYR", 2, 10),
+            ("PHE", 1, 10),
+            ("TRP", 3, 11),
+            ("PHE", 4, 11),
+            ("PHE", 4, 12),
+            ("PHE", 5, 13),
+        ]
+    )
+
+
+def test_bridges(fs: FeatureSpace) -> None:
+    bs = isolate_bridges(fs, vertices=3)
+
+    assert bs.bridges == [{"PHE1", "MET10", "TYR2"}]
+    assert len(bs.interactions) == 6
+
+
+def test_bridges_with_inverse(fs: FeatureSpace) -> None:
+    bs = isolate_bridges(fs, vertices=4)
+    assert bs.bridges == [{"TRP3", "MET11", "PHE4", "MET12"}]
+
+    # Two MET and two aromatic vertices are not an inverse bridge
+    assert isolate_bridges(fs, vertices=4, remove_inverse=True).bridges == bs.bridges
+
+
+def test_remove_inverse_bridges() -> None:
+    fs = get_feature_space([("PHE", 1, 10), ("PHE", 1, 11), ("TYR", 2, 12)])
+
+    assert isolate_bridges(fs, vertices=3).bridges == [{"PHE1", "MET10", "MET11"}]
+    assert isolate_bridges(fs, vertices=3, remove_inverse=True).bridges == []
+
+
+@pytest.mark.parametrize(
+    "cutoff_distance, vertices, bridges",
+    [
+        (7.0, 3, [{"MET148", "PHE51", "PHE54"}]),
+        (8.0, 4, [{"MET148", "PHE51", "PHE54", "PHE76"}]),
+        (4.9, 3, []),
+    ],
+)
+def test_bridges_1rcy(
+    pdb_file_1rcy: Path,
+    cutoff_distance: float,
+    vertices: int,
+    bridges: list[set[str]],
+) -> None:
+    fs = get_pairs_from_file(
+        filepath=pdb_file_1rcy,
+        chain="A",
+        cutoff_angle=109.5,
+        cutoff_distance=cutoff_distance,
+        model="cp",
+    )
+
+    assert isolate_bridges(fs, vertices).bridges == bridges
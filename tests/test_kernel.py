@@ -0,0 +1,79 @@
+from pathlib import Path
+from numpy import array
+import pytest
+from MetAromatic.algorithm import MetAromatic
+from MetAromatic.aliases import Models
+from MetAromatic.errors import SearchError
+from MetAromatic.kernel import get_pairs
+from MetAromatic.load_resources import load_local_pdb_file
+from MetAromatic.models import MetAromaticParams, SyntheticParams, get_params
+from MetAromatic.synthetic import write_structure
+
+
+def test_get_pairs() -> None:
+    # Three entries with 2 x 3, 0 x 2 and 1 x 1 MET/midpoint rows
+    entry, met, midpoint = get_pairs(array([0, 2, 2, 3]), array([0, 3, 5, 6]))
+
+    assert entry.tolist() == [0, 0, 0, 0, 0, 0, 2]
+    assert met.tolist() == [0, 0, 0, 1, 1, 1, 2]
+    assert midpoint.tolist() == [0, 1, 2, 0, 1, 2, 5]
+
+
+def parse_structures(tmp_path: Path, params: MetAromaticParams) -> list[MetAromatic]:
+    structures = []
+
+    for seed in range(20):
+        path = tmp_path / f"synthetic_{seed}.pdb"
+        write_structure(
+            SyntheticParams(met=1 + seed % 6, phe=seed % 5, tyr=2, trp=1, seed=seed),
+            path,
+        )
+
+        ma = MetAromatic(params, load_local_pdb_file(path))
+        ma.parse()
+        structures.append(ma)
+
+    return structures
+
+
+@pytest.mark.parametrize("model", ["cp", "rm", "both"])
+@pytest.mark.parametrize("top_k", [None, 1])
+def test_compute_batch_matches_compute(
+    tmp_path: Path, model: Models, top_k: int | None
+) -> None:
+    params = get_params(cutoff_distance=6.0, model=model, top_k=top_k)
+    batch = MetAromatic.compute_batch(parse_structures(tmp_path, params))
+
+    assert any(isinstance(result, SearchError) for result in batch)
+
+    for ma, result in zip(parse_structures(tmp_path, params), batch):
+        try:
+            fs = ma.compute()
+        except SearchError as error:
+            assert isinstance(result, SearchError)
+            assert str(result) == str(error)
+            continue
+
+        assert not isinstance(result, SearchError)
+        assert result.serialize_interactions() == fs.serialize_interactions()
+        assert result.serialize_interactions_rm() == fs.serialize_interactions_rm()
+
+        criteria = [t for t in result.timings if t.stage == "criteria"]
+        assert [t.count for t in criteria] == [
+            len(fs.interactions) + len(fs.interactions_rm)
+        ]
+
+
+def test_compute_batch_mixed_params(pdb_file_1rcy: Path) -> None:
+    structures = []
+
+    for cutoff_distance in (4.9, 6.0):
+        ma = MetAromatic(
+            get_params(cutoff_distance=cutoff_distance),
+            load_local_pdb_file(pdb_file_1rcy),
+        )
+        ma.parse()
+        structures.append(ma)
+
+    with pytest.raises(ValueError, match="must share parameters"):
+        MetAromatic.compute_batch(structures)
@@ -0,0 +1,117 @@
+from json import loads
+from logging import INFO
+from os import EX_OK
+from pathlib import Path
+from re import search
+from urllib.request import urlopen
+from click.testing import CliRunner
+import pytest
+from MetAromatic.metrics import BatchMetrics, Histogram, start_metrics_server
+from MetAromatic.runner import cli
+
+
+def test_histogram_quantiles() -> None:
+    histogram = Histogram()
+
+    for value in [0.002] * 98 + [0.2, 120.0]:
+        histogram.observe(value)
+
+    assert histogram.count == 100
+    assert histogram.get_quantile(0.5) == 0.005
+    assert histogram.get_quantile(0.99) == 0.25
+    assert histogram.get_quantile(1.0) == 120.0
+
+
+def test_snapshot_counts_entries_and_errors() -> None:
+    metrics = BatchMetrics(total=3)
+
+    for error_class in (None, "network", "no_interaction"):
+        metrics.start_entry()
+
+        with metrics.time_stage("fetch"):
+            pass
+
+        metrics.finish_entry(error_class)
+
+    snapshot = metrics.get_snapshot()
+
+    assert snapshot["processed"] == 3
+    assert snapshot["queue_depth"] == 0
+    assert snapshot["errors"] == {"network": 1, "no_interaction": 1}
+    assert snapshot["stages"]["fetch"]["count"] == 3
+    assert snapshot["stages"]["parse"]["count"] == 0
+
+
+def test_prometheus_endpoint() -> None:
+    metrics = BatchMetrics(total=10)
+    metrics.start_entry()
+    metrics.finish_entry("parse")
+
+    server = start_metrics_server(metrics, port=0)
+
+    try:
+        with urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as r:
+            body = r.read().decode()
+    finally:
+        server.shutdown()
+
+    assert "# TYPE metaromatic_stage_seconds histogram" in body
+    assert "metaromatic_entries_processed_total 1" in body
+    assert "metaromatic_queue_depth 9" in body
+    assert 'metaromatic_errors_total{error_class="parse"} 1' in body
+    assert 'metaromatic_stage_seconds_bucket{stage="fetch",le="+Inf"} 0' in body
+
+
+def test_batch_metrics_snapshot_and_summary(
+    cli_runner: CliRunner, fast_mirror: str, tmp_path: Path
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy, 9xyz, spam\n")
+
+    output = tmp_path / "results.jsonl"
+    snapshot = tmp_path / "metrics.json"
+
+    command = (
+        f"--mirror {fast_mirror} batch {batch_file} --sink jsonl -o {output} "
+        f"--metrics-file {snapshot}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    metrics = loads(snapshot.read_text())
+    assert metrics["processed"] == 3
+    assert metrics["errors"] == {"no_interaction": 2}
+
+    for stage in ("fetch", "write"):
+        assert metrics["stages"][stage]["count"] == 3
+
+    assert metrics["stages"]["compute"]["count"] == 1
+
+    summary = loads((tmp_path / "results_info.jsonl").read_text())
+    assert summary["metrics"]["processed"] == 3
+
+
+def test_batch_metrics_port_zero(
+    cli_runner: CliRunner,
+    fast_mirror: str,
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy\n")
+
+    command = (
+        f"--mirror {fast_mirror} batch {batch_file} --sink jsonl "
+        f"-o {tmp_path / 'results.jsonl'} --metrics-port 0"
+    )
+
+    with caplog.at_level(INFO, logger="met-aromatic"):
+        result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code == EX_OK, result.output
+
+    # The port bound by the system is logged rather than 0
+    matches = [search(r"127\.0\.0\.1:(\d+)/metrics", m) for m in caplog.messages]
+    ports = [int(match.group(1)) for match in matches if match is not None]
+
+    assert len(ports) == 1 and ports[0] > 0
@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+from gzip import decompress
+from pathlib import Path
+from time import monotonic
+from typing import Generator
+import pytest
+from utils import compare_interactions, get_base_url, start_stand_in_server, Defaults
+from MetAromatic import get_pairs_from_pdb
+from MetAromatic.errors import DownloadError, SearchError
+from MetAromatic.mirrors import MirrorPool, configure_mirrors
+from MetAromatic.models import DictInteractions
+
+
+@pytest.fixture
+def slow_mirror(mirror_dir: Path) -> Generator[str, None, None]:
+    server = start_stand_in_server(mirror_dir, delay=3.0)
+    yield get_base_url(server)
+    server.shutdown()
+
+
+@pytest.fixture
+def empty_mirror(tmp_path: Path) -> Generator[str, None, None]:
+    # A stale mirror that has none of the entries
+    server = start_stand_in_server(tmp_path)
+    yield get_base_url(server)
+    server.shutdown()
+
+
+def test_fetch_from_primary(fast_mirror: str, pdb_file_1rcy: Path) -> None:
+    pool = MirrorPool([fast_mirror])
+    assert decompress(pool.fetch("1rcy")) == pdb_file_1rcy.read_bytes()
+
+
+def test_failover_on_dead_mirror(dead_mirror: str, fast_mirror: str) -> None:
+    pool = MirrorPool([dead_mirror, fast_mirror])
+    assert len(pool.fetch("1rcy")) > 0
+    assert pool.mirrors[0].consecutive_failures == 1
+
+
+def test_hedged_request_on_slow_mirror(slow_mirror: str, fast_mirror: str) -> None:
+    pool = MirrorPool([slow_mirror, fast_mirror], hedge_delay=0.2)
+
+    start = monotonic()
+    pool.fetch("1rcy")
+
+    assert monotonic() - start < 2.0
+
+
+def test_concurrent_fetches_do_not_queue(mirror_dir: Path, fast_mirror: str) -> None:
+    server = start_stand_in_server(mirror_dir, delay=1.0)
+    pool = MirrorPool([get_base_url(server), fast_mirror], hedge_delay=1.5)
+
+    start = monotonic()
+    with ThreadPoolExecutor(15) as executor:
+        list(executor.map(lambda _: pool.fetch("1rcy"), range(15)))
+
+    elapsed = monotonic() - start
+    server.shutdown()
+
+    assert elapsed < 1.5
+    assert pool.mirrors[1].num_requests == 0
+
+
+def test_missing_entry_raises_search_error(fast_mirror: str) -> None:
+    pool = MirrorPool([fast_mirror])
+
+    with pytest.raises(SearchError, match="Invalid PDB entry 'spam'"):
+        pool.fetch("spam")
+
+
+def test_failover_on_mirror_missing_entry(empty_mirror: str, fast_mirror: str) -> None:
+    pool = MirrorPool([empty_mirror, fast_mirror])
+    assert len(pool.fetch("1rcy")) > 0
+
+
+def test_missing_entry_on_every_mirror_raises_search_error(
+    empty_mirror: str, fast_mirror: str
+) -> None:
+    pool = MirrorPool([empty_mirror, fast_mirror])
+
+    with pytest.raises(SearchError, match="Invalid PDB entry 'spam'"):
+        pool.fetch("spam")
+
+
+def test_missing_entry_and_dead_mirror_raises_download_error(
+    empty_mirror: str, dead_mirror: str
+) -> None:
+    pool = MirrorPool([empty_mirror, dead_mirror], timeout=1.0)
+
+    with pytest.raises(DownloadError):
+        pool.fetch("1rcy")
+
+
+def test_all_mirrors_down_raises_download_error(dead_mirror: str) -> None:
+    pool = MirrorPool([dead_mirror], timeout=1.0)
+
+    with pytest.raises(DownloadError):
+        pool.fetch("1rcy")
+
+
+def test_circuit_breaker_skips_failing_mirror(
+    dead_mirror: str, fast_mirror: str
+) -> None:
+    pool = MirrorPool([dead_mirror, fast_mirror], failure_threshold=2)
+
+    for _ in range(4):
+        pool.fetch("1rcy")
+
+    assert pool.mirrors[0].num_requests == 2
+    assert pool.mirrors[1].num_requests == 4
+
+
+def test_get_pairs_from_configured_mirrors(
+    dead_mirror: str,
+    fast_mirror: str,
+    defaults: Defaults,
+    valid_results_1rcy: list[DictInteractions],
+) -> None:
+    configure_mirrors([dead_mirror, fast_mirror])
+    fs = get_pairs_from_pdb(pdb_code="1rcy", **defaults)
+
+    compare_interactions(fs.serialize_interactions(), valid_results_1rcy)
@@ -0,0 +1,116 @@
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from click.testing import CliRunner
+from numpy import load
+import pytest
+from MetAromatic.algorithm import MetAromatic
+from MetAromatic.aliases import Models
+from MetAromatic.load_resources import load_local_pdb_file
+from MetAromatic.models import FeatureSpace, get_params
+from MetAromatic.runner import cli
+
+
+def get_interactions(
+    path: Path, model: Models, cutoff_distance: float, cutoff_angle: float
+) -> FeatureSpace:
+    params = get_params(
+        cutoff_distance=cutoff_distance, cutoff_angle=cutoff_angle, model=model
+    )
+    return MetAromatic(params, load_local_pdb_file(path)).get_interactions()
+
+
+@pytest.mark.parametrize("cutoff_distance", [4.9, 6.0])
+@pytest.mark.parametrize("cutoff_angle", [60.0, 109.5])
+def test_both_matches_separate_runs(
+    pdb_file_1rcy: Path, cutoff_distance: float, cutoff_angle: float
+) -> None:
+    fs = get_interactions(pdb_file_1rcy, "both", cutoff_distance, cutoff_angle)
+    fs_cp = get_interactions(pdb_file_1rcy, "cp", cutoff_distance, cutoff_angle)
+    fs_rm = get_interactions(pdb_file_1rcy, "rm", cutoff_distance, cutoff_angle)
+
+    assert fs.serialize_interactions() == fs_cp.serialize_interactions()
+    assert fs.serialize_interactions_rm() == fs_rm.serialize_interactions()
+    assert len(fs.lone_pairs_met) == len(fs.lone_pairs_met_rm)
+
+
+def test_model_differences(pdb_file_1rcy: Path) -> None:
+    differences = get_interactions(
+        pdb_file_1rcy, "both", 4.9, 109.5
+    ).get_model_differences()
+
+    assert [(i["aromatic_position"], i["norm"]) for i in differences["cp_only"]] == [
+        (54, 4.777)
+    ]
+    assert not differences["rm_only"]
+
+    differences = get_interactions(
+        pdb_file_1rcy, "both", 4.9, 60.0
+    ).get_model_differences()
+
+    assert not differences["cp_only"]
+    assert [(i["aromatic_position"], i["norm"]) for i in differences["rm_only"]] == [
+        (122, 3.954)
+    ]
+
+
+def test_cli_both(cli_runner: CliRunner, pdb_file_1rcy: Path) -> None:
+    result = cli_runner.invoke(
+        cli, ["--model", "both", "read-local", str(pdb_file_1rcy)]
+    )
+    assert result.exit_code == EX_OK, result.output
+
+    labels = [
+        line for line in result.output.splitlines() if line.endswith(("cp", "rm"))
+    ]
+    assert labels == [
+        "Found by cp",
+        "Found by rm",
+        "Only found by cp",
+        "Only found by rm",
+    ]
+    assert result.output.count("4.777") == 2
+
+
+def test_cli_both_connect(cli_runner: CliRunner) -> None:
+    command = ["--model", "both", "--connect", "unix:/tmp/x.sock", "pair", "1rcy"]
+    result = cli_runner.invoke(cli, command)
+
+    assert result.exit_code != EX_OK
+    assert "--connect does not support --model both" in result.output
+
+
+@pytest.mark.parametrize("sink", ["jsonl", "npz"])
+def test_batch_local_both(
+    cli_runner: CliRunner, pdb_file_1rcy: Path, tmp_path: Path, sink: str
+) -> None:
+    output = tmp_path / f"results.{sink}"
+    command = [
+        "--model",
+        "both",
+        "batch-local",
+        str(pdb_file_1rcy),
+        "--workers",
+        "1",
+        "--sink",
+        sink,
+        "-o",
+        str(output),
+    ]
+
+    result = cli_runner.invoke(cli, command)
+    assert result.exit_code == EX_OK, result.output
+
+    if sink == "npz":
+        with load(output) as columns:
+            assert len(columns["interactions/norm"]) == 9
+            assert len(columns["interactions_rm/norm"]) == 8
+            differences = loads(columns["entries/model_differences"][0])
+    else:
+        doc = loads(output.read_text())
+        assert len(doc["interactions"]) == 9
+        assert len(doc["interactions_rm"]) == 8
+        differences = doc["model_differences"]
+
+    assert len(differences["cp_only"]) == 1
+    assert len(differences["rm_only"]) == 0
@@ -0,0 +1,121 @@
+from os import EX_OK
+from pathlib import Path
+from click.testing import CliRunner
+import pytest
+from MetAromatic import get_pairs_from_file
+from MetAromatic.errors import SearchError
+from MetAromatic.models import FeatureSpace, Interactions
+from MetAromatic.motifs import iter_motifs
+from MetAromatic.runner import cli
+
+
+@pytest.fixture
+def fs() -> FeatureSpace:
+    # A chain PHE1 - MET10 - TYR2 - MET11 - TRP3 plus PHE4 - MET11
+    fs = FeatureSpace()
+
+    for residue, aromatic_position, methionine_position in [
+        ("PHE", 1, 10),
+        ("TYR", 2, 10),
+        ("TYR", 2, 11),
+        ("TRP", 3, 11),
+        ("PHE", 4, 11),
+    ]:
+        fs.interactions.append(
+            Interactions(
+                aromatic_position=aromatic_position,
+                aromatic_residue=residue,
+                met_phi_angle=0.0,
+                met_theta_angle=0.0,
+                methionine_position=methionine_position,
+                norm=5.0,
+            )
+        )
+
+    return fs
+
+
+def test_subgraphs(fs: FeatureSpace) -> None:
+    motifs = list(iter_motifs(fs, vertices=3))
+
+    # Every connected set of three residues is found, not just whole components
+    assert sorted(map(sorted, motifs)) == [
+        ["MET10", "MET11", "TYR2"],
+        ["MET10", "PHE1", "TYR2"],
+        ["MET11", "PHE4", "TRP3"],
+        ["MET11", "PHE4", "TYR2"],
+        ["MET11", "TRP3", "TYR2"],
+    ]
+
+
+def test_subgraphs_with_pattern(fs: FeatureSpace) -> None:
+    motifs = iter_motifs(fs, vertices=4, pattern="ARO-MET-TRP-MET")
+    assert sorted(map(sorted, motifs)) == [["MET10", "MET11", "TRP3", "TYR2"]]
+
+
+def test_paths(fs: FeatureSpace) -> None:
+    motifs = list(
+        iter_motifs(fs, vertices=5, pattern="ARO-MET-TYR-MET-ARO", paths=True)
+    )
+
+    assert sorted(motifs) == [
+        ["PHE1", "MET10", "TYR2", "MET11", "PHE4"],
+        ["PHE1", "MET10", "TYR2", "MET11", "TRP3"],
+    ]
+
+
+def test_paths_are_oriented_by_pattern(fs: FeatureSpace) -> None:
+    assert list(iter_motifs(fs, vertices=3, pattern="MET-ARO-MET", paths=True)) == [
+        ["MET10", "TYR2", "MET11"]
+    ]
+    assert list(iter_motifs(fs, vertices=2, pattern="TRP-MET", paths=True)) == [
+        ["TRP3", "MET11"]
+    ]
+
+
+@pytest.mark.parametrize(
+    "vertices, pattern, error",
+    [
+        (1, None, "vertices: Input should be greater than or equal to 2"),
+        (3, "ARO-MET-HIS", "Invalid residue type 'HIS' in pattern"),
+        (3, "ARO-MET", "Pattern ARO-MET has 2 residues, not 3 vertices"),
+    ],
+)
+def test_invalid_arguments(
+    fs: FeatureSpace, vertices: int, pattern: str | None, error: str
+) -> None:
+    with pytest.raises(SearchError, match=error):
+        iter_motifs(fs, vertices=vertices, pattern=pattern)
+
+
+def test_motifs_inside_larger_bridge(pdb_file_1rcy: Path) -> None:
+    # At 8.0 Angstroms MET148, PHE51, PHE54 and PHE76 form a single 4-bridge
+    fs = get_pairs_from_file(
+        filepath=pdb_file_1rcy,
+        chain="A",
+        cutoff_angle=109.5,
+        cutoff_distance=8.0,
+        model="cp",
+    )
+
+    assert len(list(iter_motifs(fs, vertices=3))) == 3
+    assert len(list(iter_motifs(fs, vertices=3, pattern="MET-ARO-MET"))) == 0
+
+
+def test_cli_motifs(cli_runner: CliRunner, fast_mirror: str) -> None:
+    command = (
+        f"--mirror {fast_mirror} --cutoff-distance 8.0 "
+        "motifs 1rcy --pattern ARO-MET-ARO --paths --limit 2"
+    )
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code == EX_OK, result.output
+    assert result.output.count("{MET148}") == 2
+
+
+def test_cli_motifs_none_found(cli_runner: CliRunner, fast_mirror: str) -> None:
+    command = f"--mirror {fast_mirror} motifs 1rcy --vertices 4"
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code == EX_OK, result.output
+    assert "Found 0 motifs" in result.output
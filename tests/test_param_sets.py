@@ -0,0 +1,144 @@
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from click.testing import CliRunner
+from numpy import load
+import pytest
+from MetAromatic.errors import SearchError
+from MetAromatic.models import get_params, load_param_sets
+from MetAromatic.profiling import PARSE_STAGES
+from MetAromatic.runner import cli
+
+PARAM_SETS = """
+[strict]
+cutoff_distance = 4.9
+cutoff_angle = 109.5
+
+[loose]
+cutoff_distance = 6.0
+cutoff_angle = 360.0
+model = "rm"
+
+[chain_b]
+chain = "B"
+"""
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> Path:
+    path = tmp_path / "params.toml"
+    path.write_text(PARAM_SETS)
+    return path
+
+
+def test_load_param_sets(config: Path) -> None:
+    param_sets = load_param_sets(config, get_params(cutoff_angle=60.0))
+
+    assert list(param_sets) == ["strict", "loose", "chain_b"]
+    assert param_sets["loose"] == get_params(
+        cutoff_distance=6.0, cutoff_angle=360.0, model="rm"
+    )
+
+    # Missing parameters are taken from the defaults
+    assert param_sets["chain_b"] == get_params(chain="B", cutoff_angle=60.0)
+
+
+@pytest.mark.parametrize(
+    "contents, error",
+    [
+        ("", "No parameter sets in"),
+        ("cutoff_distance = 4.9", "Parameter set 'cutoff_distance' is not a table"),
+        ("[a]\ncutoff = 4.9", "Unknown parameter 'cutoff' in parameter set 'a'"),
+        ("[a]\ncutoff_distance = -1.0", "a: cutoff_distance: Input should be greater"),
+        ("[a]\nmodel = 'pc'", "a: model: Input should be 'cp', 'rm' or 'both'"),
+        ("[a", "Could not load"),
+    ],
+)
+def test_load_param_sets_invalid(tmp_path: Path, contents: str, error: str) -> None:
+    path = tmp_path / "params.toml"
+    path.write_text(contents)
+
+    with pytest.raises(SearchError, match=error):
+        load_param_sets(path, get_params())
+
+
+def test_batch_config(
+    cli_runner: CliRunner, fast_mirror: str, config: Path, tmp_path: Path
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy, 9xyz\n")
+    output = tmp_path / "results.jsonl"
+
+    command = (
+        f"--mirror {fast_mirror} batch {batch_file} --config {config} "
+        f"--bridges 3 --sink jsonl -o {output}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    docs = {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+    configs = docs["1rcy"]["configs"]
+
+    assert docs["1rcy"]["error_class"] is None
+    assert len(configs["strict"]["interactions"]) == 9
+    assert len(configs["loose"]["interactions"]) > 9
+    assert configs["loose"]["bridges"] == []
+    assert configs["chain_b"]["errmsg"] == "No MET residues"
+    assert configs["chain_b"]["bridges"] is None
+
+    # Chain A is parsed once for both of the parameter sets searching it
+    stages = [t["stage"] for t in docs["1rcy"]["timings"]]
+    assert stages == [
+        "fetch",
+        "decompress",
+        *PARSE_STAGES,
+        "first_model",
+        "met_coordinates",
+    ]
+
+    assert {c["errmsg"] for c in docs["9xyz"]["configs"].values()} == {
+        "No MET residues"
+    }
+
+    info = loads((tmp_path / "results_info.jsonl").read_text())
+    assert info["configs"]["loose"]["cutoff_distance"] == 6.0
+    assert info["configs"]["chain_b"]["chain"] == "B"
+
+
+def test_batch_config_npz(
+    cli_runner: CliRunner, fast_mirror: str, config: Path, tmp_path: Path
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy\n")
+    output = tmp_path / "results.npz"
+
+    command = (
+        f"--mirror {fast_mirror} batch {batch_file} --config {config} "
+        f"--sink npz -o {output}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    with load(output) as columns:
+        names = list(columns["interactions/config"])
+        entry_configs = loads(columns["entries/configs"][0])
+
+    assert names.count("strict") == 9
+    assert set(names) == {"strict", "loose"}
+    assert "interactions" not in entry_configs["strict"]
+
+
+def test_batch_invalid_config(cli_runner: CliRunner, tmp_path: Path) -> None:
+    config = tmp_path / "params.toml"
+    config.write_text("[a]\ncutoff = 4.9\n")
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy\n")
+
+    command = (
+        f"batch {batch_file} --config {config} --sink jsonl -o {tmp_path / 'out.jsonl'}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code != EX_OK
+    assert "Unknown parameter 'cutoff' in parameter set 'a'" in result.output
+    assert not (tmp_path / "out.jsonl").exists()
@@ -0,0 +1,99 @@
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from pstats import Stats
+from click.testing import CliRunner
+from MetAromatic.algorithm import MetAromatic
+from MetAromatic.load_resources import load_local_pdb_file
+from MetAromatic.models import MetAromaticParams, StageTiming
+from MetAromatic.profiling import COMPUTE_STAGES, PARSE_STAGES
+from MetAromatic.runner import cli
+
+
+def test_timings_attached_to_feature_space(pdb_file_1rcy: Path) -> None:
+    recorded: list[StageTiming] = []
+
+    ma = MetAromatic(
+        params=MetAromaticParams(
+            chain="A", cutoff_angle=109.5, cutoff_distance=4.9, model="cp"
+        ),
+        raw_data=load_local_pdb_file(pdb_file_1rcy),
+        hook=recorded.append,
+    )
+    fs = ma.get_interactions()
+
+    assert [t.stage for t in fs.timings] == [*PARSE_STAGES, *COMPUTE_STAGES]
+    assert recorded == fs.timings
+
+    counts = {t.stage: t.count for t in fs.timings}
+
+    assert counts["met_coordinates"] == len(fs.coords_met)
+    assert counts["lone_pairs"] == len(fs.lone_pairs_met)
+    assert counts["criteria"] == len(fs.interactions)
+    assert all(t.wall_time >= 0 and t.cpu_time >= 0 for t in fs.timings)
+
+
+def test_batch_documents_contain_timings(
+    cli_runner: CliRunner, fast_mirror: str, tmp_path: Path
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy\n")
+    output = tmp_path / "results.jsonl"
+
+    command = f"--mirror {fast_mirror} batch {batch_file} --sink jsonl -o {output}"
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    doc = loads(output.read_text())
+    stages = [t["stage"] for t in doc["timings"]]
+
+    assert stages == ["fetch", "decompress", *PARSE_STAGES, *COMPUTE_STAGES]
+
+
+def test_profile_pstats(
+    cli_runner: CliRunner, pdb_file_1rcy: Path, tmp_path: Path
+) -> None:
+    profile = tmp_path / "read_local.prof"
+
+    result = cli_runner.invoke(
+        cli, ["--profile", str(profile), "read-local", str(pdb_file_1rcy)]
+    )
+    assert result.exit_code == EX_OK
+
+    functions = {name for _, _, name in Stats(str(profile)).stats}  # type: ignore[attr-defined]
+    assert "apply_met_aromatic_criteria" in functions
+
+
+def test_profile_collapsed_stacks(
+    cli_runner: CliRunner, pdb_file_1rcy: Path, tmp_path: Path
+) -> None:
+    profile = tmp_path / "read_local.folded"
+
+    result = cli_runner.invoke(
+        cli, ["--profile", str(profile), "read-local", str(pdb_file_1rcy)]
+    )
+    assert result.exit_code == EX_OK
+
+    lines = profile.read_text().splitlines()
+
+    assert any("MetAromatic.apply_met_aromatic_criteria" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_pstats_batch(
+    cli_runner: CliRunner, fast_mirror: str, tmp_path: Path
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy\n")
+    profile = tmp_path / "batch.prof"
+
+    command = (
+        f"--profile {profile} --mirror {fast_mirror} batch {batch_file} "
+        f"--sink jsonl -o {tmp_path / 'results.jsonl'}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    # Entries are searched in worker threads, which are profiled too
+    functions = {name for _, _, name in Stats(str(profile)).stats}  # type: ignore[attr-defined]
+    assert "apply_met_aromatic_criteria" in functions
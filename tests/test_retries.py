@@ -0,0 +1,33 @@
+from urllib.error import URLError
+import pytest
+from MetAromatic.errors import DownloadError, SearchError
+from MetAromatic.retries import classify_error, get_backoff_delay, is_retryable
+
+
+@pytest.mark.parametrize(
+    "error, error_class",
+    [
+        (DownloadError("All mirrors failed"), "network"),
+        (URLError("Connection reset"), "network"),
+        (TimeoutError("timed out"), "network"),
+        (ConnectionResetError("reset by peer"), "network"),
+        (SearchError("No MET residues"), "no_interaction"),
+        (SearchError("Invalid PDB entry 'spam'"), "no_interaction"),
+        (IndexError("list index out of range"), "parse"),
+        (ValueError("could not convert string to float"), "parse"),
+    ],
+)
+def test_classify_error(error: Exception, error_class: str) -> None:
+    assert classify_error(error) == error_class
+
+
+def test_only_network_errors_are_retryable() -> None:
+    assert is_retryable(DownloadError("All mirrors failed"))
+    assert not is_retryable(SearchError("No MET residues"))
+    assert not is_retryable(IndexError("list index out of range"))
+
+
+@pytest.mark.parametrize("attempt", range(8))
+def test_backoff_delay_is_bounded(attempt: int) -> None:
+    delay = get_backoff_delay(attempt, backoff=0.5, max_backoff=10.0)
+    assert 0 <= delay <= min(10.0, 0.5 * 2**attempt)
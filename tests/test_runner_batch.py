@@ -103,6 +103,7 @@ def test_2ca1(mongo_coll: Results) -> None:
 
     assert len(results["interactions"]) == 7
     assert results["errmsg"] is None
+    assert results["error_class"] is None
 
 
 def test_2fyg(mongo_coll: Results) -> None:
@@ -166,6 +167,8 @@ def test_spam(mongo_coll: Results) -> None:
 
     assert results["interactions"] is None
     assert results["errmsg"] == "Invalid PDB entry 'spam'"
+    assert results["error_class"] == "no_interaction"
+    assert not results["retryable"]
 
 
 def test_check_valid_info_doc(mongo_coll_info: collection.Collection) -> None:
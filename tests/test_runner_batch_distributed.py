@@ -0,0 +1,111 @@
+from os import EX_OK
+from pathlib import Path
+from sqlite3 import connect
+from subprocess import Popen, DEVNULL, STDOUT
+from time import sleep
+from click.testing import CliRunner
+import pytest
+from MetAromatic.job_queue import SQLiteJobQueue
+from MetAromatic.runner import cli
+
+
+@pytest.fixture
+def queue(tmp_path: Path, cli_runner: CliRunner) -> Path:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy, 9xyz, spam\n")
+
+    path = tmp_path / "queue.db"
+    command = f"batch-submit {batch_file} --queue {path} --chunk-size 1"
+
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    return path
+
+
+def get_results(output: Path) -> dict[str, str]:
+    with connect(output) as conn:
+        return dict(conn.execute("SELECT _id, error_class FROM results").fetchall())
+
+
+def test_submit_refuses_existing_queue(
+    cli_runner: CliRunner, queue: Path, pdb_file_1rcy: Path
+) -> None:
+    command = f"batch-submit {pdb_file_1rcy} --queue {queue}"
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code != EX_OK
+    assert "exists! Cannot proceed" in result.output
+
+
+def test_workers_drain_queue(fast_mirror: str, queue: Path, tmp_path: Path) -> None:
+    output = tmp_path / "results.db"
+    command = (
+        f"runner --mirror {fast_mirror} batch-worker --queue {queue} "
+        f"--sink sqlite -o {output} --threads 2"
+    )
+
+    workers = [
+        Popen(
+            command.split() + ["--worker-id", f"worker-{i}"],
+            stdout=DEVNULL,
+            stderr=STDOUT,
+        )
+        for i in range(3)
+    ]
+
+    assert all(worker.wait(timeout=60) == EX_OK for worker in workers)
+    assert get_results(output) == {
+        "1rcy": None,
+        "9xyz": "no_interaction",
+        "spam": "no_interaction",
+    }
+
+    progress = SQLiteJobQueue(queue).get_progress()
+    assert progress.done == 3
+    assert progress.is_finished()
+
+
+def test_expired_lease_is_reclaimed(
+    cli_runner: CliRunner, fast_mirror: str, queue: Path, tmp_path: Path
+) -> None:
+    # Simulate a worker that claimed a chunk and then died
+    job_queue = SQLiteJobQueue(queue)
+    lease = job_queue.claim("dead-worker", lease=0.1)
+    assert lease is not None
+
+    sleep(0.2)
+
+    output = tmp_path / "results.db"
+    command = (
+        f"--mirror {fast_mirror} batch-worker --queue {queue} --sink sqlite -o {output}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code == EX_OK, result.output
+    assert set(get_results(output)) == {"1rcy", "9xyz", "spam"}
+
+
+def test_complete_requires_lease(queue: Path) -> None:
+    job_queue = SQLiteJobQueue(queue)
+    stale = job_queue.claim("slow-worker", lease=0.1)
+    assert stale is not None
+
+    sleep(0.2)
+
+    # The expired chunk is claimed again before the slow worker finishes it
+    lease = job_queue.claim("other-worker", lease=60.0)
+    assert lease is not None and lease.chunk_id == stale.chunk_id
+
+    assert not job_queue.complete(stale.chunk_id, "slow-worker")
+    assert job_queue.get_progress().done == 0
+
+    assert job_queue.complete(lease.chunk_id, "other-worker")
+    assert job_queue.get_progress().done == 1
+
+
+def test_batch_status(cli_runner: CliRunner, queue: Path) -> None:
+    result = cli_runner.invoke(cli, f"batch-status --queue {queue}".split())
+
+    assert result.exit_code == EX_OK
+    assert "Pending: 3 Leased: 0 Done: 0 Total: 3" in result.output
@@ -0,0 +1,190 @@
+from gzip import compress
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from sqlite3 import connect
+from typing import Any
+from click.testing import CliRunner
+import pytest
+from MetAromatic.runner import cli
+
+
+@pytest.fixture
+def structures(tmp_path: Path, pdb_file_1rcy: Path) -> Path:
+    directory = tmp_path / "structures"
+    (directory / "nested").mkdir(parents=True)
+
+    contents = pdb_file_1rcy.read_bytes()
+    (directory / "1rcy.pdb").write_bytes(contents)
+    (directory / "nested" / "pdb1rcy.ent.gz").write_bytes(compress(contents))
+    (directory / "nested" / "lorem.pdb").write_text("Lorem ipsum\n")
+    (directory / "notes.txt").write_text("Not a structure\n")
+
+    return directory
+
+
+def run_batch_local(cli_runner: CliRunner, source: str, *options: str) -> str:
+    result = cli_runner.invoke(cli, ["batch-local", source, "--workers", "2", *options])
+
+    assert result.exit_code == EX_OK, result.output
+    return result.output
+
+
+def load_results(output: Path) -> dict[str, dict[str, Any]]:
+    return {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+
+
+def test_batch_local_directory(
+    cli_runner: CliRunner, structures: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.jsonl"
+    run_batch_local(cli_runner, str(structures), "--sink", "jsonl", "-o", str(output))
+
+    docs = load_results(output)
+    assert set(docs) == {
+        str(structures / "1rcy.pdb"),
+        str(structures / "nested" / "pdb1rcy.ent.gz"),
+        str(structures / "nested" / "lorem.pdb"),
+    }
+
+    assert len(docs[str(structures / "1rcy.pdb")]["interactions"]) == 9
+    assert len(docs[str(structures / "nested" / "pdb1rcy.ent.gz")]["interactions"]) == 9
+    assert docs[str(structures / "nested" / "lorem.pdb")]["errmsg"] == (
+        "Not a valid PDB file"
+    )
+
+    info = loads((tmp_path / "results_info.jsonl").read_text())
+    assert info["number_of_entries"] == 3
+    assert info["num_workers"] == 2
+
+
+def test_batch_local_glob_mmap(
+    cli_runner: CliRunner, structures: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.db"
+    run_batch_local(
+        cli_runner,
+        f"{structures}/**/*.gz",
+        "--mmap",
+        "--sink",
+        "sqlite",
+        "-o",
+        str(output),
+    )
+
+    with connect(output) as conn:
+        rows = dict(conn.execute("SELECT _id, document FROM results").fetchall())
+
+    assert list(rows) == [str(structures / "nested" / "pdb1rcy.ent.gz")]
+    assert len(loads(next(iter(rows.values())))["interactions"]) == 9
+
+
+def test_batch_local_group_size(
+    cli_runner: CliRunner, structures: Path, tmp_path: Path
+) -> None:
+    grouped, single = tmp_path / "grouped.jsonl", tmp_path / "single.jsonl"
+
+    run_batch_local(
+        cli_runner,
+        str(structures),
+        "--group-size",
+        "2",
+        "--sink",
+        "jsonl",
+        "-o",
+        str(grouped),
+    )
+    run_batch_local(cli_runner, str(structures), "--sink", "jsonl", "-o", str(single))
+
+    docs_grouped, docs_single = load_results(grouped), load_results(single)
+    assert set(docs_grouped) == set(docs_single)
+
+    for path, doc in docs_grouped.items():
+        assert doc["interactions"] == docs_single[path]["interactions"]
+        assert doc["errmsg"] == docs_single[path]["errmsg"]
+
+
+def test_batch_local_group_with_bad_file(
+    cli_runner: CliRunner, pdb_file_1rcy: Path, tmp_path: Path
+) -> None:
+    directory = tmp_path / "structures"
+    directory.mkdir()
+
+    # A file that parses but cannot be computed must not fail the rest of its group
+    contents = pdb_file_1rcy.read_text()
+    sd_line = next(l for l in contents.splitlines() if " SD  MET " in l)
+
+    (directory / "good.pdb").write_text(contents)
+    (directory / "bad.pdb").write_text(
+        contents.replace(sd_line, sd_line[:30] + "    spam" + sd_line[38:])
+    )
+
+    output = tmp_path / "results.jsonl"
+    run_batch_local(
+        cli_runner,
+        str(directory),
+        "--group-size",
+        "2",
+        "--sink",
+        "jsonl",
+        "-o",
+        str(output),
+    )
+
+    docs = load_results(output)
+    assert docs[str(directory / "good.pdb")]["errmsg"] is None
+    assert len(docs[str(directory / "good.pdb")]["interactions"]) == 9
+    assert (
+        "could not convert string to float"
+        in docs[str(directory / "bad.pdb")]["errmsg"]
+    )
+
+
+def test_batch_local_skips_processed_files(
+    cli_runner: CliRunner, structures: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.jsonl"
+    options = ("--sink", "jsonl", "-o", str(output))
+
+    run_batch_local(cli_runner, f"{structures}/*.pdb", *options)
+    run_batch_local(cli_runner, str(structures), *options)
+
+    lines = output.read_text().splitlines()
+    assert len(lines) == 3
+    assert len(load_results(output)) == 3
+
+    infos = (tmp_path / "results_info.jsonl").read_text().splitlines()
+    assert loads(infos[-1])["number_skipped"] == 1
+
+    # Overwriting starts from scratch
+    run_batch_local(cli_runner, str(structures), *options, "-x")
+    assert len(output.read_text().splitlines()) == 3
+
+
+def test_batch_local_no_files(cli_runner: CliRunner, tmp_path: Path) -> None:
+    result = cli_runner.invoke(
+        cli, ["batch-local", str(tmp_path), "--sink", "jsonl", "-o", "out.jsonl"]
+    )
+
+    assert result.exit_code != EX_OK
+    assert f"No structure files found in {tmp_path}" in result.output
+
+
+def test_batch_local_resumes_after_partial_line(
+    cli_runner: CliRunner, structures: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.jsonl"
+    options = ("--sink", "jsonl", "-o", str(output))
+
+    run_batch_local(cli_runner, f"{structures}/*.pdb", *options)
+
+    # An interrupted job can leave a line cut short at the end of the file
+    with output.open("a") as f:
+        f.write('{"_id": "interrupted", "retr')
+
+    run_batch_local(cli_runner, f"{structures}/nested/lorem.pdb", *options)
+    run_batch_local(cli_runner, str(structures), *options)
+
+    assert output.read_text().endswith("}\n")
+    assert len(output.read_text().splitlines()) == 3
+    assert "interrupted" not in load_results(output)
@@ -0,0 +1,192 @@
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from sqlite3 import connect
+from click.testing import CliRunner
+from numpy import load
+import pytest
+from MetAromatic.runner import cli
+from MetAromatic.sinks import Sink
+
+
+@pytest.fixture
+def batch_file(tmp_path: Path) -> Path:
+    path = tmp_path / "codes.txt"
+    path.write_text("1rcy, 9xyz, spam\n")
+    return path
+
+
+def run_batch(
+    cli_runner: CliRunner, mirror: str, batch_file: Path, sink: str, output: Path
+) -> str:
+    command = (
+        f"--mirror {mirror} batch {batch_file} --threads 2 --sink {sink} -o {output}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code == EX_OK, result.output
+    return result.output
+
+
+def test_batch_jsonl_sink(
+    cli_runner: CliRunner, fast_mirror: str, batch_file: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.jsonl"
+    stdout = run_batch(cli_runner, fast_mirror, batch_file, "jsonl", output)
+
+    assert "Username" not in stdout
+
+    docs = {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+    assert len(docs["1rcy"]["interactions"]) == 9
+    assert docs["9xyz"]["errmsg"] == "No MET residues"
+    assert docs["spam"]["errmsg"] == "Invalid PDB entry 'spam'"
+    assert docs["spam"]["error_class"] == "no_interaction"
+
+    info = loads((tmp_path / "results_info.jsonl").read_text())
+    assert info["number_of_entries"] == 3
+    assert info["sink"] == "jsonl"
+
+
+def test_batch_sqlite_sink(
+    cli_runner: CliRunner, fast_mirror: str, batch_file: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.db"
+    run_batch(cli_runner, fast_mirror, batch_file, "sqlite", output)
+
+    with connect(output) as conn:
+        rows = dict(conn.execute("SELECT _id, document FROM results").fetchall())
+        info = conn.execute("SELECT document FROM info").fetchone()
+
+    assert set(rows) == {"1rcy", "9xyz", "spam"}
+    assert len(loads(rows["1rcy"])["interactions"]) == 9
+    assert loads(info[0])["number_of_entries"] == 3
+
+
+def test_batch_npz_sink(
+    cli_runner: CliRunner, fast_mirror: str, batch_file: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.npz"
+    run_batch(cli_runner, fast_mirror, batch_file, "npz", output)
+
+    with load(output) as data:
+        assert sorted(data["entries/_id"]) == ["1rcy", "9xyz", "spam"]
+        assert len(data["interactions/norm"]) == 9
+        assert set(data["interactions/_id"]) == {"1rcy"}
+
+
+def test_batch_from_stdin(
+    cli_runner: CliRunner, fast_mirror: str, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.jsonl"
+
+    command = f"--mirror {fast_mirror} batch - --threads 2 --sink jsonl -o {output}"
+    result = cli_runner.invoke(
+        cli, command.split(), input="1RCY, 9xyz\n1rcy\n9XYZ, spam\n"
+    )
+    assert result.exit_code == EX_OK, result.output
+
+    docs = [loads(line) for line in output.read_text().splitlines()]
+    assert sorted(doc["_id"] for doc in docs) == ["1rcy", "9xyz", "spam"]
+
+    info = loads((tmp_path / "results_info.jsonl").read_text())
+    assert info["number_of_entries"] == 3
+    assert info["number_duplicates"] == 2
+
+
+def test_batch_bridges(
+    cli_runner: CliRunner, fast_mirror: str, batch_file: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.jsonl"
+
+    command = (
+        f"--mirror {fast_mirror} --cutoff-distance 7.0 batch {batch_file} "
+        f"--bridges 3 --remove-inverse --sink jsonl -o {output}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    docs = {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+    assert docs["1rcy"]["bridges"] == [["MET148", "PHE51", "PHE54"]]
+    assert docs["9xyz"]["bridges"] is None
+    assert any(t["stage"] == "bridges" for t in docs["1rcy"]["timings"])
+
+    info = loads((tmp_path / "results_info.jsonl").read_text())
+    assert info["bridges"] == 3
+    assert info["remove_inverse"]
+
+
+def test_batch_refuses_to_overwrite_output(
+    cli_runner: CliRunner, fast_mirror: str, batch_file: Path, tmp_path: Path
+) -> None:
+    output = tmp_path / "results.jsonl"
+    run_batch(cli_runner, fast_mirror, batch_file, "jsonl", output)
+
+    command = f"--mirror {fast_mirror} batch {batch_file} --sink jsonl -o {output}"
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code != EX_OK
+    assert "exists! Cannot proceed" in result.output
+
+
+def test_batch_retry_failed_jsonl(
+    cli_runner: CliRunner,
+    fast_mirror: str,
+    dead_mirror: str,
+    batch_file: Path,
+    tmp_path: Path,
+) -> None:
+    output = tmp_path / "results.jsonl"
+
+    command = f"--mirror {dead_mirror} batch {batch_file} --retries 0 --sink jsonl -o {output}"
+    assert cli_runner.invoke(cli, command.split()).exit_code == EX_OK
+
+    command = f"--mirror {fast_mirror} batch --retry-failed --sink jsonl -o {output}"
+    assert cli_runner.invoke(cli, command.split()).exit_code == EX_OK
+
+    latest = {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+    assert len(latest["1rcy"]["interactions"]) == 9
+    assert not any(doc["retryable"] for doc in latest.values())
+
+
+def test_batch_retry_failed_jsonl_with_partial_last_line(
+    cli_runner: CliRunner,
+    fast_mirror: str,
+    dead_mirror: str,
+    batch_file: Path,
+    tmp_path: Path,
+) -> None:
+    output = tmp_path / "results.jsonl"
+
+    command = f"--mirror {dead_mirror} batch {batch_file} --retries 0 --sink jsonl -o {output}"
+    assert cli_runner.invoke(cli, command.split()).exit_code == EX_OK
+
+    # An interrupted job leaves its last line cut short
+    with output.open("a") as f:
+        f.write('{"_id": "1rcy", "retry')
+
+    command = f"--mirror {fast_mirror} batch --retry-failed --sink jsonl -o {output}"
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    latest = {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+    assert len(latest["1rcy"]["interactions"]) == 9
+    assert not any(doc["retryable"] for doc in latest.values())
+
+
+def test_batch_output_required_for_file_sinks(
+    cli_runner: CliRunner, batch_file: Path
+) -> None:
+    result = cli_runner.invoke(cli, f"batch {batch_file} --sink sqlite".split())
+
+    assert result.exit_code != EX_OK
+    assert "An output path is required" in result.output
+
+
+def test_incomplete_sink_fails_on_creation() -> None:
+    class PrepareOnlySink(Sink):  # pylint: disable=abstract-method
+        def prepare(self, overwrite: bool) -> None:
+            pass
+
+    with pytest.raises(TypeError, match="abstract method"):
+        # pylint: disable-next=abstract-class-instantiated
+        PrepareOnlySink()  # type: ignore[abstract]
@@ -17,3 +17,24 @@ def test_read_local_missing_file(cli_runner: CliRunner) -> None:
     result = cli_runner.invoke(cli, command.split())
     assert result.exit_code != EX_OK
     assert "File '/tmp/foo/bar/1rcy.pdb' does not exist." in result.output
+
+
+def test_read_local_many(cli_runner: CliRunner, pdb_file_1rcy: Path) -> None:
+    single = cli_runner.invoke(cli, ["read-local", str(pdb_file_1rcy)])
+    result = cli_runner.invoke(
+        cli, ["read-local", str(pdb_file_1rcy), str(pdb_file_1rcy), "--workers", "2"]
+    )
+
+    assert result.exit_code == EX_OK
+    assert result.output == 2 * f"{pdb_file_1rcy}\n{single.output}"
+
+
+def test_read_local_many_invalid_file(
+    cli_runner: CliRunner, pdb_file_1rcy: Path, resources: Path
+) -> None:
+    invalid = resources / "data_lorem_ipsum.pdb"
+    result = cli_runner.invoke(cli, ["read-local", str(pdb_file_1rcy), str(invalid)])
+
+    assert result.exit_code != EX_OK
+    assert f"{invalid}: Not a valid PDB file" in result.output
+    assert f"{pdb_file_1rcy}\n" in result.output
@@ -0,0 +1,102 @@
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from click.testing import CliRunner
+import pytest
+from utils import compare_interactions, Defaults
+from MetAromatic import screen_many
+from MetAromatic.algorithm import MetAromatic
+from MetAromatic.aliases import Models
+from MetAromatic.errors import SearchError
+from MetAromatic.load_resources import load_local_pdb_file
+from MetAromatic.models import DictInteractions, get_params
+from MetAromatic.runner import cli
+
+
+@pytest.mark.parametrize("model", ["cp", "rm"])
+@pytest.mark.parametrize("cutoff_distance", [4.9, 6.0, 8.0])
+@pytest.mark.parametrize("cutoff_angle", [60.0, 109.5, 360.0])
+def test_screen_finds_every_interaction(
+    pdb_file_1rcy: Path, model: Models, cutoff_distance: float, cutoff_angle: float
+) -> None:
+    params = get_params(
+        chain="A",
+        cutoff_angle=cutoff_angle,
+        cutoff_distance=cutoff_distance,
+        model=model,
+    )
+    raw_data = load_local_pdb_file(pdb_file_1rcy)
+
+    try:
+        expected = MetAromatic(params, raw_data).get_interactions()
+    except SearchError:
+        expected = None
+
+    ma = MetAromatic(params, raw_data)
+    count = ma.screen(limit=1000)
+
+    if expected is None:
+        assert count == 0
+    else:
+        assert count == len(expected.interactions)
+        compare_interactions(
+            ma.f.serialize_interactions(), expected.serialize_interactions()
+        )
+
+
+def test_screen_stops_at_limit(
+    pdb_file_1rcy: Path, valid_results_1rcy: list[DictInteractions]
+) -> None:
+    raw_data = load_local_pdb_file(pdb_file_1rcy)
+    ma = MetAromatic(get_params(), raw_data)
+
+    assert ma.screen(limit=4) == 4
+    assert len(ma.f.interactions) == 4
+    assert all(i.to_dict() in valid_results_1rcy for i in ma.f.interactions)
+    assert [t.stage for t in ma.f.timings][-1] == "screen"
+
+
+def test_screen_many(pdb_file_1rcy: Path, defaults: Defaults, tmp_path: Path) -> None:
+    no_met = tmp_path / "no_met.pdb"
+    no_met.write_text(
+        "".join(
+            line
+            for line in pdb_file_1rcy.read_text().splitlines(True)
+            if " MET " not in line
+        )
+    )
+
+    results = dict(
+        screen_many(
+            [pdb_file_1rcy, no_met], get_params(**defaults), limit=20, workers=2
+        )
+    )
+
+    assert results == {str(pdb_file_1rcy): 9, str(no_met): 0}
+
+
+def test_cli_screen(cli_runner: CliRunner, fast_mirror: str) -> None:
+    command = f"--mirror {fast_mirror} screen 1rcy 9xyz -k 3"
+    result = cli_runner.invoke(cli, command.split())
+
+    assert result.exit_code == EX_OK, result.output
+    assert sorted(result.output.splitlines()) == ["1rcy\t3", "9xyz\t0"]
+
+
+def test_batch_screen(cli_runner: CliRunner, fast_mirror: str, tmp_path: Path) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy, 9xyz, spam\n")
+    output = tmp_path / "results.jsonl"
+
+    command = (
+        f"--mirror {fast_mirror} batch {batch_file} --screen 1 --sink jsonl -o {output}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    docs = {doc["_id"]: doc for doc in map(loads, output.read_text().splitlines())}
+    assert docs["1rcy"]["hits"] == 1
+    assert docs["1rcy"]["interactions"] is None
+    assert docs["1rcy"]["error_class"] is None
+    assert docs["9xyz"]["hits"] == 0
+    assert docs["spam"]["hits"] == 0
@@ -0,0 +1,241 @@
+import asyncio
+from pathlib import Path
+from threading import Thread
+from typing import Any, Generator
+from click.testing import CliRunner
+from pytest import fixture, raises
+from utils import compare_interactions
+from MetAromatic.client import ServerClient
+from MetAromatic.errors import SearchError
+from MetAromatic.mirrors import configure_mirrors
+from MetAromatic.models import DictInteractions
+from MetAromatic.runner import cli
+from MetAromatic.server import AnalysisServer
+
+
+@fixture
+def server(fast_mirror: str) -> Generator[tuple[AnalysisServer, str], None, None]:
+    configure_mirrors([fast_mirror])
+
+    loop = asyncio.new_event_loop()
+    thread = Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    analysis_server = AnalysisServer(workers=2, cache_size=4)
+    address = asyncio.run_coroutine_threadsafe(
+        analysis_server.start(port=0), loop
+    ).result()
+
+    yield analysis_server, address
+
+    asyncio.run_coroutine_threadsafe(analysis_server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_pair(
+    server: tuple[AnalysisServer, str], valid_results_1rcy: list[DictInteractions]
+) -> None:
+    _, address = server
+    client = ServerClient(address)
+
+    response = client.request("pair", {"code": "1rcy"})
+    compare_interactions(response["interactions"], valid_results_1rcy)
+
+
+def test_structure_cache(server: tuple[AnalysisServer, str]) -> None:
+    analysis_server, address = server
+    client = ServerClient(address)
+
+    for cutoff_distance in (4.9, 6.0, 4.9):
+        client.request("pair", {"code": "1RCY", "cutoff_distance": cutoff_distance})
+
+    health = client.request("health")
+    assert health["cache_misses"] == 1
+    assert health["cache_hits"] == 2
+    assert analysis_server.stats["requests"] == 3
+
+
+def test_read_local(
+    server: tuple[AnalysisServer, str],
+    pdb_file_1rcy: Path,
+    valid_results_1rcy: list[DictInteractions],
+) -> None:
+    _, address = server
+
+    response = ServerClient(address).request("read-local", {"path": str(pdb_file_1rcy)})
+    compare_interactions(response["interactions"], valid_results_1rcy)
+
+
+def test_bridge(server: tuple[AnalysisServer, str]) -> None:
+    _, address = server
+
+    response = ServerClient(address).request(
+        "bridge", {"code": "1rcy", "cutoff_distance": 7.0, "vertices": 3}
+    )
+    assert response["bridges"] == [["MET148", "PHE51", "PHE54"]]
+
+
+def test_top_k(server: tuple[AnalysisServer, str]) -> None:
+    _, address = server
+    client = ServerClient(address)
+
+    response = client.request("pair", {"code": "1rcy", "top_k": 1})
+    assert [i["norm"] for i in response["interactions"]] == [3.954, 4.61]
+
+    # Bridges are found among all interactions
+    response = client.request(
+        "bridge", {"code": "1rcy", "cutoff_distance": 7.0, "top_k": 1}
+    )
+    assert response["bridges"] == [["MET148", "PHE51", "PHE54"]]
+
+
+def test_invalid_params(server: tuple[AnalysisServer, str]) -> None:
+    _, address = server
+
+    with raises(SearchError, match="cutoff_distance: Input should be greater than 0"):
+        ServerClient(address).request("pair", {"code": "1rcy", "cutoff_distance": -1.0})
+
+
+def test_model_both(server: tuple[AnalysisServer, str], pdb_file_1rcy: Path) -> None:
+    _, address = server
+    payload = {"path": str(pdb_file_1rcy), "model": "both"}
+
+    with raises(SearchError, match="does not support model 'both'"):
+        ServerClient(address).request("read-local", payload)
+
+
+def test_invalid_code(server: tuple[AnalysisServer, str]) -> None:
+    _, address = server
+
+    with raises(SearchError, match="Invalid PDB entry 'spam'"):
+        ServerClient(address).request("pair", {"code": "spam"})
+
+
+def test_unknown_endpoint(server: tuple[AnalysisServer, str]) -> None:
+    _, address = server
+
+    with raises(SearchError, match="Unknown endpoint '/foo'"):
+        ServerClient(address).request("foo", {})
+
+
+def test_unexpected_error(server: tuple[AnalysisServer, str]) -> None:
+    analysis_server, address = server
+    client = ServerClient(address)
+
+    async def fail(_: dict[str, Any]) -> dict[str, Any]:
+        raise RuntimeError("spam")
+
+    analysis_server.routes["/pair"] = fail
+
+    with raises(SearchError, match="Internal server error: spam"):
+        client.request("pair", {"code": "1rcy"})
+
+    assert client.request("health")["errors"] == 1
+
+
+def test_no_server() -> None:
+    with raises(SearchError, match="Could not connect to server"):
+        ServerClient("unix:/nonexistent.sock").request("health")
+
+
+def test_cli_connect(
+    server: tuple[AnalysisServer, str], cli_runner: CliRunner, pdb_file_1rcy: Path
+) -> None:
+    _, address = server
+
+    local = cli_runner.invoke(cli, ["read-local", str(pdb_file_1rcy)])
+    remote = cli_runner.invoke(
+        cli, ["--connect", address, "read-local", str(pdb_file_1rcy)]
+    )
+
+    assert remote.exit_code == 0
+    assert remote.output == local.output
+
+
+def test_cli_connect_unsupported_command(cli_runner: CliRunner) -> None:
+    result = cli_runner.invoke(cli, ["--connect", "unix:/tmp/x.sock", "batch"])
+
+    assert result.exit_code != 0
+    assert "--connect only supports" in result.output
+
+
+def test_unix_socket(
+    tmp_path: Path,
+    pdb_file_1rcy: Path,
+    valid_results_1rcy: list[DictInteractions],
+) -> None:
+    async def query() -> list[DictInteractions]:
+        analysis_server = AnalysisServer(workers=1)
+        address = await analysis_server.start(socket_path=tmp_path / "ma.sock")
+        client = ServerClient(address)
+
+        try:
+            response = await asyncio.to_thread(
+                client.request, "read-local", {"path": str(pdb_file_1rcy)}
+            )
+        finally:
+            client.close()
+            await analysis_server.close()
+
+        interactions: list[DictInteractions] = response["interactions"]
+        return interactions
+
+    compare_interactions(asyncio.run(query()), valid_results_1rcy)
+    assert not (tmp_path / "ma.sock").exists()
+
+
+def test_cli_connect_many(
+    server: tuple[AnalysisServer, str], cli_runner: CliRunner
+) -> None:
+    _, address = server
+    result = cli_runner.invoke(cli, ["--connect", address, "pair", "1rcy", "9xyz"])
+
+    assert result.exit_code != 0
+    assert result.output.startswith("1rcy\n")
+    assert "9xyz: No MET residues" in result.output
+
+
+def read_local_from(
+    analysis_server: AnalysisServer, host: str, path: str
+) -> list[DictInteractions]:
+    async def query() -> list[DictInteractions]:
+        address = await analysis_server.start(host=host, port=0)
+        client = ServerClient(address)
+
+        try:
+            response = await asyncio.to_thread(
+                client.request, "read-local", {"path": path}
+            )
+        finally:
+            client.close()
+            await analysis_server.close()
+
+        interactions: list[DictInteractions] = response["interactions"]
+        return interactions
+
+    return asyncio.run(query())
+
+
+def test_read_local_data_dir(
+    resources: Path, valid_results_1rcy: list[DictInteractions]
+) -> None:
+    analysis_server = AnalysisServer(workers=1, data_dir=resources)
+    interactions = read_local_from(analysis_server, "0.0.0.0", "data_1rcy.pdb")
+
+    compare_interactions(interactions, valid_results_1rcy)
+
+
+def test_read_local_outside_data_dir(resources: Path) -> None:
+    analysis_server = AnalysisServer(workers=1, data_dir=resources)
+
+    with raises(SearchError, match="outside of the data directory"):
+        read_local_from(analysis_server, "127.0.0.1", "../utils.py")
+
+
+def test_read_local_refused_without_data_dir(pdb_file_1rcy: Path) -> None:
+    analysis_server = AnalysisServer(workers=1)
+
+    with raises(SearchError, match="requires --data-dir"):
+        read_local_from(analysis_server, "0.0.0.0", str(pdb_file_1rcy))
@@ -0,0 +1,117 @@
+from gzip import compress
+from json import loads
+from multiprocessing import get_context
+from os import EX_OK, _exit
+from pathlib import Path
+from typing import Any
+from click.testing import CliRunner
+import pytest
+from MetAromatic.runner import cli
+from MetAromatic.shared_buffers import BufferDescriptor, SharedBuffers, attach_buffer
+
+
+def read_buffer(descriptor: BufferDescriptor) -> bytes:
+    with attach_buffer(descriptor) as view:
+        return bytes(view)
+
+
+def crash_while_attached(descriptor: BufferDescriptor) -> None:
+    with attach_buffer(descriptor):
+        _exit(1)
+
+
+def test_share_with_process() -> None:
+    buffers = SharedBuffers()
+
+    with get_context("spawn").Pool(1) as pool:
+        with buffers.share(b"ATOM" * 1000) as descriptor:
+            assert pool.apply(read_buffer, (descriptor,)) == b"ATOM" * 1000
+
+        with buffers.share(b"") as descriptor:
+            assert pool.apply(read_buffer, (descriptor,)) == b""
+
+    assert len(buffers) == 0
+
+    with pytest.raises(FileNotFoundError):
+        read_buffer(descriptor)
+
+
+def test_crashed_process_does_not_leak() -> None:
+    # compress() stamps the current time, so the same bytes are compared later
+    data = compress(b"HEADER")
+
+    buffers = SharedBuffers()
+    descriptor = buffers.put(data)
+
+    process = get_context("spawn").Process(
+        target=crash_while_attached, args=(descriptor,)
+    )
+    process.start()
+    process.join()
+
+    assert process.exitcode == 1
+
+    # The owner still holds the segment and releases it on close
+    assert read_buffer(descriptor) == data
+    buffers.close()
+
+    assert len(buffers) == 0
+
+    with pytest.raises(FileNotFoundError):
+        read_buffer(descriptor)
+
+
+def load_docs(output: Path) -> dict[str, dict[str, Any]]:
+    docs = {}
+
+    for doc in map(loads, output.read_text().splitlines()):
+        del doc["timings"]
+        docs[doc["_id"]] = doc
+
+    return docs
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--model", "both"],
+        ["--cutoff-distance", "6.0"],
+    ],
+)
+def test_batch_compute_processes(
+    cli_runner: CliRunner, fast_mirror: str, tmp_path: Path, options: list[str]
+) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy, 9xyz\n")
+
+    outputs: list[Path] = []
+
+    for extra in ([], ["--compute-processes", "2"]):
+        output = tmp_path / f"results_{len(outputs)}.jsonl"
+        command = [
+            "--mirror",
+            fast_mirror,
+            *options,
+            "batch",
+            str(batch_file),
+            "--bridges",
+            "3",
+            *extra,
+            "--sink",
+            "jsonl",
+            "-o",
+            str(output),
+        ]
+
+        result = cli_runner.invoke(cli, command)
+        assert result.exit_code == EX_OK, result.output
+        outputs.append(output)
+
+    threads, processes = map(load_docs, outputs)
+
+    assert threads == processes
+    assert len(processes["1rcy"]["interactions"]) >= 9
+    assert processes["9xyz"]["errmsg"] == "No MET residues"
+
+    info = loads((tmp_path / "results_1_info.jsonl").read_text())
+    assert info["compute_processes"] == 2
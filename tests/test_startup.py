@@ -0,0 +1,70 @@
+from os import environ
+from subprocess import run
+import sys
+import pytest
+
+HEAVY_MODULES = ("numpy", "pydantic", "pymongo")
+
+# Cumulative import time of MetAromatic.runner, in microseconds. The default is several
+# times the usual import time, as wall clock budgets vary between machines, but still
+# well under the time it takes to import the heavy modules
+IMPORT_BUDGET_US = int(environ.get("METAROMATIC_IMPORT_BUDGET_US", "300000"))
+
+
+def get_import_times(statement: str) -> dict[str, int]:
+    # Parse the "import time: self | cumulative | module" lines written by -X importtime
+    result = run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    times = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+
+    return times
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import MetAromatic",
+        "import MetAromatic.runner",
+        "from MetAromatic.runner import cli; cli(['--help'], standalone_mode=False)",
+    ],
+)
+def test_startup_skips_heavy_modules(statement: str) -> None:
+    imported = get_import_times(statement)
+
+    assert [m for m in HEAVY_MODULES if m in imported] == []
+
+
+def test_pair_skips_pymongo() -> None:
+    imported = get_import_times("import MetAromatic.get_pair")
+
+    assert "numpy" in imported
+    assert "pymongo" not in imported
+
+
+def test_lazy_package_attributes() -> None:
+    imported = get_import_times("from MetAromatic import get_pairs_from_file")
+
+    assert "MetAromatic.algorithm" in imported
+    assert "pymongo" not in imported
+
+
+def test_import_time_budget() -> None:
+    # Take the best of several runs to keep noise from failing the budget
+    best = min(
+        get_import_times("import MetAromatic.runner")["MetAromatic.runner"]
+        for _ in range(5)
+    )
+
+    assert best < IMPORT_BUDGET_US, f"Import took {best} us"
@@ -0,0 +1,107 @@
+from gzip import decompress
+from os import EX_OK
+from pathlib import Path
+from click.testing import CliRunner
+import pytest
+from MetAromatic.algorithm import MetAromatic
+from MetAromatic.aliases import Models
+from MetAromatic.errors import SearchError
+from MetAromatic.load_resources import _is_valid_pdb_file, load_local_pdb_file
+from MetAromatic.models import MetAromaticParams, SyntheticParams
+from MetAromatic.runner import cli
+from MetAromatic.synthetic import generate_pdb_lines, write_structure
+
+
+def test_generated_file_is_valid(tmp_path: Path) -> None:
+    path = tmp_path / "synthetic.pdb"
+    params = SyntheticParams(chains=3, met=4, phe=3, tyr=2, trp=1, filler=5, waters=2)
+
+    num_atoms = write_structure(params, path)
+    lines = path.read_text().splitlines()
+
+    assert _is_valid_pdb_file(lines)
+    assert num_atoms == 3 * (4 * 8 + 3 * 11 + 2 * 12 + 1 * 14 + 5 * 5 + 2)
+    assert sum(line.startswith("TER") for line in lines) == 3
+    assert {line[21] for line in lines if line.startswith("ATOM")} == {"A", "B", "C"}
+
+
+def test_generated_file_is_reproducible() -> None:
+    params = SyntheticParams(seed=5)
+
+    assert list(generate_pdb_lines(params)) == list(generate_pdb_lines(params))
+    assert list(generate_pdb_lines(params)) != list(
+        generate_pdb_lines(SyntheticParams(seed=6))
+    )
+
+
+def test_generated_models() -> None:
+    lines = list(generate_pdb_lines(SyntheticParams(models=3)))
+
+    assert sum(line.startswith("MODEL") for line in lines) == 3
+    assert sum(line.startswith("ENDMDL") for line in lines) == 3
+
+
+@pytest.mark.parametrize("model", ["cp", "rm"])
+def test_generated_file_yields_interactions(tmp_path: Path, model: Models) -> None:
+    path = tmp_path / "synthetic.pdb"
+    write_structure(SyntheticParams(chains=2, met=30, phe=30, tyr=10, trp=10), path)
+
+    params = MetAromaticParams(
+        chain="B", cutoff_angle=109.5, cutoff_distance=4.9, model=model
+    )
+    fs = MetAromatic(params, load_local_pdb_file(path)).get_interactions()
+
+    # Residues out of reach of one another are dropped before lone pairs and midpoints
+    assert 0 < len(fs.lone_pairs_met) <= 30
+    assert len(fs.midpoints_phe) <= 30 * 6
+    assert len(fs.midpoints_trp) <= 10 * 6
+    assert len(fs.interactions) > 0
+
+
+def test_prefilter_keeps_all_interactions(tmp_path: Path) -> None:
+    path = tmp_path / "synthetic.pdb"
+    write_structure(SyntheticParams(met=40, phe=40, tyr=10, trp=10, seed=3), path)
+
+    params = MetAromaticParams(
+        chain="A", cutoff_angle=109.5, cutoff_distance=6.0, model="cp"
+    )
+    ma = MetAromatic(params, load_local_pdb_file(path))
+    fs = ma.get_interactions()
+
+    assert len(fs.nearby_met) < len(fs.coords_met)
+    assert len(fs.nearby_phe) < len(fs.coords_phe)
+
+    # Computing lone pairs and midpoints for every residue finds nothing more
+    fs.nearby_met, fs.nearby_phe = fs.coords_met, fs.coords_phe
+    fs.nearby_tyr, fs.nearby_trp = fs.coords_tyr, fs.coords_trp
+    interactions = fs.serialize_interactions()
+
+    fs.lone_pairs_met, fs.interactions = [], []
+    ma.get_met_lone_pairs_cp()
+    ma.get_midpoints()
+    ma.apply_met_aromatic_criteria()
+
+    assert len(fs.lone_pairs_met) == 40
+    assert fs.serialize_interactions() == interactions
+
+
+def test_too_many_target_residues() -> None:
+    with pytest.raises(SearchError, match="At most 999 Met and aromatic residues"):
+        list(generate_pdb_lines(SyntheticParams(met=1000)))
+
+
+def test_structure_too_sparse() -> None:
+    with pytest.raises(SearchError, match="does not fit into PDB coordinate columns"):
+        list(generate_pdb_lines(SyntheticParams(filler=9000, density=0.001)))
+
+
+def test_generate_gzip(cli_runner: CliRunner, tmp_path: Path) -> None:
+    output = tmp_path / "pdb9syn.ent.gz"
+
+    result = cli_runner.invoke(cli, f"generate {output} --seed 1".split())
+    assert result.exit_code == EX_OK, result.output
+
+    lines = decompress(output.read_bytes()).decode().splitlines()
+    assert _is_valid_pdb_file(lines)
+    num_atoms = sum(line.startswith(("ATOM", "HETATM")) for line in lines)
+    assert result.output == f"Wrote {num_atoms} atoms to {output}\n"
@@ -0,0 +1,118 @@
+from json import loads
+from os import EX_OK
+from pathlib import Path
+from click.testing import CliRunner
+import pytest
+from MetAromatic import get_pairs_from_file
+from MetAromatic.algorithm import MetAromatic
+from MetAromatic.aliases import TopKPer
+from MetAromatic.errors import SearchError
+from MetAromatic.load_resources import load_local_pdb_file
+from MetAromatic.models import DictInteractions, SyntheticParams, get_params
+from MetAromatic.runner import cli
+from MetAromatic.synthetic import write_structure
+
+
+def get_residue(row: DictInteractions, top_k_per: TopKPer) -> tuple[str, int]:
+    if top_k_per == "met":
+        return "MET", row["methionine_position"]
+
+    return row["aromatic_residue"], row["aromatic_position"]
+
+
+def sort_and_group(
+    rows: list[DictInteractions], k: int, top_k_per: TopKPer
+) -> list[DictInteractions]:
+    # The post-processing pass that top-k queries replace
+    kept: dict[tuple[str, int], list[int]] = {}
+
+    for index in sorted(range(len(rows)), key=lambda i: rows[i]["norm"]):
+        kept.setdefault(get_residue(rows[index], top_k_per), []).append(index)
+
+    indices = sorted(i for group in kept.values() for i in group[:k])
+    return [rows[i] for i in indices]
+
+
+@pytest.mark.parametrize("top_k_per", ["met", "aromatic"])
+@pytest.mark.parametrize("k", [1, 2, 5])
+def test_top_k_matches_sort_and_group(
+    tmp_path: Path, k: int, top_k_per: TopKPer
+) -> None:
+    path = tmp_path / "synthetic.pdb"
+    write_structure(SyntheticParams(met=40, phe=40, tyr=10, trp=10, seed=3), path)
+    params = get_params(cutoff_distance=6.0)
+
+    fs = MetAromatic(params, load_local_pdb_file(path)).get_interactions()
+    rows = fs.serialize_interactions()
+
+    params = get_params(cutoff_distance=6.0, top_k=k, top_k_per=top_k_per)
+    fs = MetAromatic(params, load_local_pdb_file(path)).get_interactions()
+
+    assert len(fs.interactions) < len(rows)
+    assert fs.serialize_interactions() == sort_and_group(rows, k, top_k_per)
+
+
+def test_nearest_1rcy(pdb_file_1rcy: Path) -> None:
+    fs = get_pairs_from_file(
+        pdb_file_1rcy,
+        chain="A",
+        cutoff_angle=109.5,
+        cutoff_distance=4.9,
+        model="cp",
+        top_k=1,
+    )
+
+    rows = [
+        (i.aromatic_position, i.methionine_position, i.norm) for i in fs.interactions
+    ]
+    assert rows == [(122, 18, 3.954), (54, 148, 4.61)]
+
+
+def test_invalid_top_k(pdb_file_1rcy: Path) -> None:
+    with pytest.raises(SearchError, match="top_k: Input should be greater than 0"):
+        get_pairs_from_file(
+            pdb_file_1rcy,
+            chain="A",
+            cutoff_angle=109.5,
+            cutoff_distance=4.9,
+            model="cp",
+            top_k=0,
+        )
+
+
+def test_cli_nearest(cli_runner: CliRunner, pdb_file_1rcy: Path) -> None:
+    nearest = cli_runner.invoke(cli, ["--nearest", "read-local", str(pdb_file_1rcy)])
+    top_1 = cli_runner.invoke(cli, ["--top-k", "1", "read-local", str(pdb_file_1rcy)])
+
+    assert nearest.exit_code == EX_OK, nearest.output
+    assert nearest.output == top_1.output
+    assert "3.954" in nearest.output
+    assert "4.211" not in nearest.output
+
+
+def test_cli_nearest_with_top_k(cli_runner: CliRunner, pdb_file_1rcy: Path) -> None:
+    command = ["--nearest", "--top-k", "2", "read-local", str(pdb_file_1rcy)]
+    result = cli_runner.invoke(cli, command)
+
+    assert result.exit_code != EX_OK
+    assert "--nearest cannot be combined with --top-k" in result.output
+
+
+def test_batch_top_k(cli_runner: CliRunner, fast_mirror: str, tmp_path: Path) -> None:
+    batch_file = tmp_path / "codes.txt"
+    batch_file.write_text("1rcy\n")
+    output = tmp_path / "results.jsonl"
+
+    command = (
+        f"--mirror {fast_mirror} --top-k 2 --top-k-per aromatic "
+        f"batch {batch_file} --sink jsonl -o {output}"
+    )
+    result = cli_runner.invoke(cli, command.split())
+    assert result.exit_code == EX_OK, result.output
+
+    doc = loads(output.read_text())
+    assert [i["norm"] for i in doc["interactions"]] == [3.954, 4.051, 4.61, 4.756]
+
+    info = loads((tmp_path / "results_info.jsonl").read_text())
+    assert info["top_k"] == 2
+    assert info["top_k_per"] == "aromatic"
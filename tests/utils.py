@@ -1,4 +1,9 @@
-from typing import TypedDict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+from time import sleep
+from typing import Any, TypedDict
 from unittest import TestCase
 from MetAromatic.aliases import Models
 from MetAromatic.models import DictInteractions
@@ -17,3 +22,27 @@ def compare_interactions(
     tc = TestCase()
     tc.maxDiff = None
     tc.assertCountEqual(left, right)
+
+
+class StandInHandler(SimpleHTTPRequestHandler):
+    delay = 0.0
+
+    def do_GET(self) -> None:
+        sleep(self.delay)
+        super().do_GET()
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def start_stand_in_server(directory: Path, delay: float = 0.0) -> ThreadingHTTPServer:
+    handler = type("Handler", (StandInHandler,), {"delay": delay})
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(handler, directory=str(directory))
+    )
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def get_base_url(server: ThreadingHTTPServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"